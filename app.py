@@ -1,8 +1,9 @@
 import streamlit as st
 import logging
-from src.pipeline.eda_pipeline import run_eda_pipeline, edit_chart
-from src.pipeline.QNA_pipeline import run_qna_pipeline
-from src.utils.helpers import display_visualization
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from src.utils.helpers import render_charts
+from src.utils.context import get_pipeline_context
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -32,34 +33,92 @@ CUSTOM_CSS = """
 </style>
 """
 
+# Chart edits kept for undo/redo, including the generated chart
+EDIT_HISTORY_SIZE = 20
+
 def initialize_session_state():
     """Initialize session state variables."""
     try:
-        for key in ['result_data', 'df', 'fig', 'last_option', 'qna_answer', 'chart', 'summary', 'lida', 'edit_mode']:
+        for key in ['result_data', 'df', 'image', 'last_option', 'qna_answer', 'chart', 'summary', 'lida', 'edit_mode',
+                    'edit_history', 'edit_position']:
             if key not in st.session_state:
                 st.session_state[key] = None
     except Exception as e:
         logger.error(f"Error initializing session state: {str(e)}", exc_info=True)
         st.error("An error occurred while initializing the application. Please try reloading the page.")
 
-def run_pipeline(option, user_query):
-    """Run the selected pipeline based on user input."""
+def run_pipeline(option, user_query, answer_container=None):
+    """Run the selected pipeline based on user input, streaming Q&A answers into `answer_container`."""
     try:
+        # Each pipeline is imported on first use, so the page loads without the LLM and LIDA backends
         if option == "Perform EDA":
-            st.session_state['df'], st.session_state['fig'], st.session_state['chart'], \
-            st.session_state['summary'], st.session_state['lida'] = run_eda_pipeline(user_query)
+            from src.pipeline.eda_pipeline import run_eda_pipeline
+            progress = st.empty()
+            script_context = get_script_run_ctx()
+
+            def report_progress(rows, n_bytes):
+                # Called from the pipeline's fetch stage thread, which needs the script context to update the page
+                add_script_run_ctx(threading.current_thread(), script_context)
+                progress.text(f"Fetched {rows:,} rows ({n_bytes / 1e6:.1f} MB)...")
+
+            st.session_state['df'], st.session_state['image'], st.session_state['chart'], \
+            st.session_state['summary'], st.session_state['lida'] = run_eda_pipeline(user_query, progress_callback=report_progress)
+            progress.empty()
+            start_edit_history()
+            fetch = st.session_state['df'].attrs.get('fetch', {})
+            if fetch.get('truncated') or fetch.get('sampled'):
+                st.warning(f"The result was {'sampled' if fetch.get('sampled') else 'truncated'} to "
+                           f"{fetch['rows']:,} of {fetch['rows_scanned']:,}+ rows.")
         else:  # Ask Questions
-            answer, df = run_qna_pipeline(user_query)
-            st.session_state['qna_answer'] = answer
-            st.session_state['df'] = df
+            from src.pipeline.QNA_pipeline import stream_qna_pipeline
+            status, answer_area, answer = st.empty(), (answer_container or st).empty(), ""
+            # Progress and the answer are shown as the pipeline produces them
+            for event in stream_qna_pipeline(user_query):
+                if event['event'] == 'sql':
+                    status.text(f"Generated SQL: {event['query']}")
+                elif event['event'] == 'rows':
+                    status.text(f"Fetched {event['rows']:,} rows, writing the answer...")
+                elif event['event'] == 'token':
+                    answer += event['text']
+                    answer_area.info(f"Answer: {answer}▌")
+                else:
+                    st.session_state['qna_answer'] = event['answer']
+                    st.session_state['df'] = event['df']
+            # The final answer is shown with the data below
+            status.empty()
+            answer_area.empty()
         st.success(f"{option} pipeline completed!")
     except Exception as e:
         logger.error(f"Error in {option} pipeline: {str(e)}", exc_info=True)
         st.error(f"An error occurred while running the {option} pipeline. Please check the logs for details.")
 
+def start_edit_history():
+    """Start the edit history at the chart the pipeline generated."""
+    st.session_state['edit_history'] = [{"chart": st.session_state['chart'], "image": st.session_state['image'],
+                                         "instructions": []}]
+    st.session_state['edit_position'] = 0
+
+def show_edit(position):
+    """Make an entry of the edit history the current chart, without calling the LLM or rendering."""
+    entry = st.session_state['edit_history'][position]
+    st.session_state['edit_position'] = position
+    st.session_state['chart'], st.session_state['image'] = entry['chart'], entry['image']
+
 def handle_chart_editing():
-    """Handle chart editing functionality."""
+    """Handle chart editing functionality, with undo and redo over the edit history."""
     try:
+        history, position = st.session_state['edit_history'] or [], st.session_state['edit_position'] or 0
+        if len(history) > 1:
+            undo_col, redo_col, info_col = st.columns([1, 1, 4])
+            if undo_col.button("Undo", disabled=position == 0):
+                show_edit(position - 1)
+                st.rerun()
+            if redo_col.button("Redo", disabled=position >= len(history) - 1):
+                show_edit(position + 1)
+                st.rerun()
+            info_col.caption(f"Edit {position} of {len(history) - 1}: "
+                             f"{'; '.join(history[position]['instructions']) or 'original chart'}")
+
         if st.button("Edit Chart" if not st.session_state['edit_mode'] else "Cancel Edit"):
             st.session_state['edit_mode'] = not st.session_state['edit_mode']
 
@@ -67,12 +126,19 @@ def handle_chart_editing():
             instructions = st.text_area("Enter editing instructions (comma-separated):", height=100)
             if st.button("Apply Edits") and instructions:
                 with st.spinner("Editing chart..."):
+                    from src.pipeline.eda_pipeline import edit_chart
                     instructions_list = [instr.strip() for instr in instructions.split(',')]
+                    # Only the new instructions are applied, on top of the current edit
                     edited_chart = edit_chart(st.session_state['lida'], st.session_state['chart'].code,
                                               st.session_state['summary'], instructions_list)
-                    st.session_state['fig'] = display_visualization(edited_chart)
+                    entry = {"chart": edited_chart, "image": render_charts(edited_chart),
+                             "instructions": history[position]['instructions'] + instructions_list if history
+                             else instructions_list}
+                    # A new edit drops the undone ones after the current position
+                    st.session_state['edit_history'] = (history[:position + 1] + [entry])[-EDIT_HISTORY_SIZE:]
+                    show_edit(len(st.session_state['edit_history']) - 1)
                     st.success("Chart edited successfully!")
-                    st.pyplot(st.session_state['fig'])
+                    st.image(st.session_state['image'])
                     st.session_state['edit_mode'] = False
             elif not instructions:
                 st.warning("Please enter editing instructions before applying edits.")
@@ -80,6 +146,20 @@ def handle_chart_editing():
         logger.error(f"Error handling chart editing: {str(e)}", exc_info=True)
         st.error("An error occurred while editing the chart. Please try again.")
 
+def render_context_controls():
+    """Show shared client timings and allow rebuilding the shared clients."""
+    try:
+        context = get_pipeline_context()
+        with st.sidebar:
+            st.markdown("### Shared Clients")
+            if st.button("Refresh connections"):
+                context.refresh()
+                st.success("Connections will be rebuilt on the next run.")
+            with st.expander("Cold vs warm timings", expanded=False):
+                st.json(context.stats())
+    except Exception as e:
+        logger.error(f"Error rendering context controls: {str(e)}", exc_info=True)
+
 def main():
     try:
         st.title("Data Exploration and Q&A with LLM")
@@ -87,6 +167,7 @@ def main():
         st.markdown('<p class="big-font">This app allows you to either perform Exploratory Data Analysis (EDA) or ask questions about your data using an LLM-based pipeline.</p>', unsafe_allow_html=True)
 
         initialize_session_state()
+        render_context_controls()
 
         col1, col2 = st.columns([1, 2])
 
@@ -95,7 +176,8 @@ def main():
             option = st.selectbox("Select an option:", ("Select an option", "Perform EDA", "Ask Questions"))
 
             if option != st.session_state['last_option']:
-                for key in ['fig', 'df', 'result_data', 'qna_answer', 'chart', 'summary', 'lida', 'edit_mode']:
+                for key in ['image', 'df', 'result_data', 'qna_answer', 'chart', 'summary', 'lida', 'edit_mode',
+                            'edit_history', 'edit_position']:
                     st.session_state[key] = None
                 st.session_state['last_option'] = option
 
@@ -104,11 +186,11 @@ def main():
 
                 if user_query and st.button(f"Run {option} Pipeline", key="run_pipeline"):
                     with st.spinner(f"Running {option} pipeline..."):
-                        run_pipeline(option, user_query)
+                        run_pipeline(option, user_query, answer_container=col2)
 
         with col2:
-            if option == "Perform EDA" and st.session_state['fig'] is not None:
-                st.pyplot(st.session_state['fig'])
+            if option == "Perform EDA" and st.session_state['image'] is not None:
+                st.image(st.session_state['image'])
                 handle_chart_editing()
             elif option == "Ask Questions" and st.session_state['qna_answer'] is not None:
                 st.info(f"Answer: {st.session_state['qna_answer']}")
@@ -0,0 +1,65 @@
+"""
+Benchmark the time to the first visible answer, blocking vs streamed QnA.
+
+Runs the QnA pipeline end to end against a seeded SQLite table with a fake
+LLM (see benchmarks/fakes.py) that waits a fixed latency before its first word
+and a fixed latency per word. `run_qna_pipeline` shows nothing until the whole
+answer is generated; `stream_qna_pipeline` reports the generated SQL, the
+fetched rows and each answer chunk as they arrive. For each answer length the
+median time to each of those events and to the full answer is printed.
+
+Usage:
+    python -m benchmarks.answer_streaming --llm-latency 0.5 --token-latency 0.02 --words 20 200
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+import src.pipeline.QNA_pipeline as qna_pipeline
+from benchmarks.fakes import make_context, seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds before the first word of a call")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds per generated word")
+    parser.add_argument("--words", type=int, nargs="+", default=[20, 200], help="answer lengths in words")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, "sales.db")
+        seed_database(database, rows=args.rows)
+        qna_pipeline.DATABASE_URI = f"sqlite:///{database}"
+        print(f"LLM latency {args.llm_latency}s + {args.token_latency}s per word, median of {args.runs} runs")
+        for words in args.words:
+            answer = " ".join(["amount"] * words)
+            context = make_context(args.llm_latency, 0.0, os.path.join(workdir, "llmx"),
+                                   token_latency=args.token_latency, answer=answer)
+            blocking, streamed = [], {"sql": [], "rows": [], "first token": [], "answer": []}
+            for i in range(args.runs + 1):
+                # A new question each run, so the SQL cache does not answer it
+                question = f"Amount by region ({words} words, run {i})"
+                start = time.perf_counter()
+                qna_pipeline.run_qna_pipeline(f"{question}, blocking", context=context)
+                blocking.append(time.perf_counter() - start)
+
+                start, seen = time.perf_counter(), {}
+                for event in qna_pipeline.stream_qna_pipeline(f"{question}, streamed", context=context):
+                    name = "first token" if event["event"] == "token" else event["event"]
+                    seen.setdefault(name, time.perf_counter() - start)
+                for name, timings in streamed.items():
+                    timings.append(seen[name])
+            # The first run warms the clients and the schema cache
+            print(f"  {words} word answer:")
+            print(f"    blocking answer: {statistics.median(blocking[1:]):.3f} s")
+            print("    streamed " + ", ".join(f"{name}: {statistics.median(timings[1:]):.3f} s"
+                                            for name, timings in streamed.items()))
+
+
+if __name__ == "__main__":
+    main()
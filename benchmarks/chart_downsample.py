@@ -0,0 +1,93 @@
+"""
+Benchmark plotting large query results with and without chart-aware reduction.
+
+For generated frames of increasing size, runs chart code of the kind LIDA
+writes (a seaborn line plot over time, a scatter plot and a histogram) through
+LIDA's chart executor, once on the full frame and once on what
+`reduce_for_chart` keeps for the question; the reduction time is included in
+the reduced timing. Histogram code on pre-binned data weights by `count`, as
+the annotated summary tells the LLM to.
+
+Usage:
+    python -m benchmarks.chart_downsample --rows 100000 1000000 5000000
+"""
+import argparse
+import logging
+import time
+import numpy as np
+import pandas as pd
+from lida.components import ChartExecutor
+from src.utils.downsample import reduce_for_chart
+
+CHARTS = {
+    "line": ("Show the trend of amount over time",
+             "sns.lineplot(data=data, x='ordered_at', y='amount', hue='region', errorbar=None)"),
+    "scatter": ("What is the relationship between amount and quantity?",
+                "sns.scatterplot(data=data, x='quantity', y='amount', hue='region', s=5)"),
+    "histogram": ("Show the distribution of amount",
+                  "sns.histplot(data=data, x='amount', hue='region', bins=50{weights})"),
+}
+
+TEMPLATE = """import seaborn as sns
+import matplotlib.pyplot as plt
+
+def plot(data):
+    {body}
+    plt.title('benchmark')
+    return plt
+
+chart = plot(data)
+"""
+
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 10**8, n_rows)), unit="s"),
+        "region": rng.choice(["north", "south", "east", "west"], n_rows),
+        "quantity": rng.integers(1, 100, n_rows),
+        "amount": np.cumsum(rng.normal(0, 5, n_rows)) + rng.normal(0, 20, n_rows),
+    })
+
+
+def summary_of(df):
+    return {"name": "benchmark", "file_name": "", "dataset_description": "", "field_names": list(df.columns),
+            "fields": []}
+
+
+def plot(executor, code, df):
+    start = time.perf_counter()
+    chart = executor.execute([code], df, summary_of(df), library="seaborn", return_error=True)[0]
+    if not chart.status:
+        raise RuntimeError(chart.error["message"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--max-points", type=int, default=None, help="rows kept (default: DOWNSAMPLE_CONFIG)")
+    parser.add_argument("--skip-full", action="store_true", help="skip plotting the full frames")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    executor = ChartExecutor()
+    for n_rows in args.rows:
+        df = make_frame(n_rows)
+        print(f"rows: {n_rows:,}")
+        for name, (goal, body) in CHARTS.items():
+            full = "skipped"
+            if not args.skip_full:
+                full = f"{plot(executor, TEMPLATE.format(body=body.format(weights='')), df):.2f} s"
+            start = time.perf_counter()
+            reduced = reduce_for_chart(df, goal, max_points=args.max_points)
+            reduction = reduced.attrs["reduction"]
+            weights = ", weights='count'" if reduction["mode"] == "histogram" else ""
+            seconds = time.perf_counter() - start + plot(executor, TEMPLATE.format(body=body.format(weights=weights)),
+                                                         reduced)
+            print(f"  {name:>9}: full {full}, reduced {seconds:.2f} s "
+                  f"({reduction['mode']}, {reduction['rows']:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
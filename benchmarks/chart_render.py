@@ -0,0 +1,116 @@
+"""
+Benchmark rendering EDA charts for the Streamlit page.
+
+Compares the previous path, `legacy_display_visualization` (decode LIDA's PNG,
+draw it into a new 10x7 inch matplotlib figure per chart) followed by what `st.pyplot`
+does on every rerun (`savefig` at 200 dpi), with `render_charts` (the PNG decoded
+and passed through, grids composed with PIL) whose result `st.image` sends as is
+and whose grids later reruns take from the render cache. Charts are rendered like LIDA's executor
+does (seaborn at 100 dpi). Each mode runs in a fresh process so its peak
+resident memory can be reported.
+
+Usage:
+    python -m benchmarks.chart_render --charts 1 3 --reruns 20
+"""
+import argparse
+import base64
+import io
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+
+def make_charts(n, seed=0):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    charts = []
+    for i in range(n):
+        plt.figure()
+        plt.bar([f"region_{j}" for j in range(8)], rng.random(8) * 1000)
+        plt.title(f"Amount by region ({i})")
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format="png", dpi=100, pad_inches=0.2)
+        plt.close()
+        charts.append(SimpleNamespace(code=f"# chart {i}", raster=base64.b64encode(buffer.getvalue()).decode("ascii")))
+    return charts
+
+
+def legacy_display_visualization(charts):
+    """The matplotlib figure the EDA page passed to `st.pyplot` before `render_charts`."""
+    import matplotlib.pyplot as plt
+    from PIL import Image
+    n_cols = min(3, len(charts))
+    n_rows = (len(charts) - 1) // n_cols + 1
+    fig = plt.figure(figsize=(10 * n_cols, 7 * n_rows))
+    for i, chart in enumerate(charts):
+        ax = fig.add_subplot(n_rows, n_cols, i + 1)
+        ax.imshow(Image.open(io.BytesIO(base64.b64decode(chart.raster))))
+        ax.axis('off')
+    plt.tight_layout(pad=3.0)
+    plt.subplots_adjust(left=0.2)
+    return fig
+
+
+def run(mode, n_charts, reruns, results):
+    logging.disable(logging.WARNING)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from src.utils.helpers import render_charts
+    charts = make_charts(n_charts)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == "pyplot":
+        fig = legacy_display_visualization(charts)
+        image = io.BytesIO()
+        fig.savefig(image, bbox_inches="tight", dpi=200, format="png")
+    else:
+        image = render_charts(charts)
+    first = time.perf_counter() - start
+
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        if mode == "pyplot":
+            image = io.BytesIO()
+            fig.savefig(image, bbox_inches="tight", dpi=200, format="png")
+            size = len(image.getvalue())
+        else:
+            size = len(render_charts(charts))
+        timings.append(time.perf_counter() - start)
+    if mode == "pyplot":
+        plt.close(fig)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform != "darwin" else 1 / 1024
+    results.put((first, statistics.median(timings), size, (peak - baseline) * scale))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    for n_charts in args.charts:
+        print(f"charts: {n_charts}, reruns: {args.reruns}")
+        for mode in ("pyplot", "image"):
+            results = context.Queue()
+            process = context.Process(target=run, args=(mode, n_charts, args.reruns, results))
+            process.start()
+            first, rerun, size, peak_kib = results.get()
+            process.join()
+            print(f"  {mode:>6}: first render {first * 1000:,.1f} ms, rerun {rerun * 1000:,.2f} ms, "
+                  f"PNG {size / 1024:,.0f} KiB, peak RSS growth {peak_kib / 1024:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
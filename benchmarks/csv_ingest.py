@@ -0,0 +1,93 @@
+"""
+Benchmark loading a CSV into an existing table.
+
+Compares the previous /api/upload_csv path (read the whole file, then
+`DataFrame.to_sql`) with the chunked, transactional `ingest_csv`. Each run
+happens in a fresh process so its peak resident memory can be reported. The
+target defaults to a temporary SQLite database; pass --uri to load into MySQL or
+PostgreSQL instead (the table `ingest_benchmark` is recreated there).
+
+Usage:
+    python -m benchmarks.csv_ingest --rows 1000000 10000000
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+TABLE = "ingest_benchmark"
+CREATE_TABLE = (f"CREATE TABLE {TABLE} (region VARCHAR(16) NOT NULL, product VARCHAR(32), "
+                "quantity INTEGER, amount DOUBLE PRECISION, ordered_at VARCHAR(32))")
+
+
+def write_csv(path, n_rows, chunk_size=1000000, seed=0):
+    rng = np.random.default_rng(seed)
+    regions = np.array(["north", "south", "east", "west", "central"])
+    for start in range(0, n_rows, chunk_size):
+        size = min(chunk_size, n_rows - start)
+        pd.DataFrame({
+            "region": regions[rng.integers(0, len(regions), size)],
+            "product": np.char.add("product_", rng.integers(0, 5000, size).astype(str)),
+            "quantity": rng.integers(1, 100, size),
+            "amount": np.round(rng.random(size) * 1000, 2),
+            "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(start, start + size), unit="s"),
+        }).to_csv(path, mode="a" if start else "w", header=not start, index=False)
+
+
+def reset_table(executor):
+    with executor.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(CREATE_TABLE))
+
+
+def run(method, path, uri, results):
+    logging.disable(logging.WARNING)
+    from src.utils.executor import get_query_executor
+    from src.utils.ingest import ingest_csv
+    executor = get_query_executor(uri)
+    reset_table(executor)
+    start = time.perf_counter()
+    if method == "to_sql":
+        df = pd.read_csv(path)
+        df.to_sql(TABLE, executor.engine, if_exists="append", index=False)
+        rows = len(df)
+    else:
+        with open(path, "rb") as file:
+            rows = ingest_csv(file, TABLE, executor)["rows"]
+    seconds = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((rows, seconds, peak_kib * (1 if sys.platform != "darwin" else 1 / 1024)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        uri = args.uri or f"sqlite:///{os.path.join(workdir, 'ingest.db')}"
+        for n_rows in args.rows:
+            path = os.path.join(workdir, f"rows_{n_rows}.csv")
+            write_csv(path, n_rows)
+            print(f"rows: {n_rows:,}, file: {os.path.getsize(path) / 2**20:,.0f} MiB")
+            for method in ("to_sql", "ingest_csv"):
+                results = context.Queue()
+                process = context.Process(target=run, args=(method, path, uri, results))
+                process.start()
+                rows, seconds, peak_kib = results.get()
+                process.join()
+                print(f"  {method:>10}: {seconds:.1f} s, {rows / seconds:,.0f} rows/s, "
+                      f"peak RSS {peak_kib / 1024:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
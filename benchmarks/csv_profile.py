@@ -0,0 +1,95 @@
+"""
+Benchmark profiling a wide CSV for /api/describe_table.
+
+Compares the previous analysis (read the whole file into pandas, then
+`dropna`, `isnull().sum()` and `astype(str).str.len().max()` per column) with
+the chunked `profile_csv`, exact and in sampled fast mode. Each run happens in a
+fresh process so its peak resident memory can be reported.
+
+Usage:
+    python -m benchmarks.csv_profile --megabytes 2048 --columns 200
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def write_csv(path, megabytes, n_columns, chunk_rows=20000, seed=0):
+    """Append chunks of mixed int, float, text and timestamp columns until the file reaches the size."""
+    rng = np.random.default_rng(seed)
+    kinds = ["int", "float", "text", "time"]
+    written = 0
+    while os.path.exists(path) is False or os.path.getsize(path) < megabytes * 2**20:
+        columns = {}
+        for position in range(n_columns):
+            kind = kinds[position % len(kinds)]
+            if kind == "int":
+                values = rng.integers(0, 10**6, chunk_rows)
+            elif kind == "float":
+                values = np.where(rng.random(chunk_rows) < 0.05, np.nan, rng.random(chunk_rows) * 1000)
+            elif kind == "text":
+                values = np.char.add("label_", rng.integers(0, 1000, chunk_rows).astype(str))
+            else:
+                values = (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10**7, chunk_rows), unit="s"))
+            columns[f"{kind}_{position}"] = values
+        pd.DataFrame(columns).to_csv(path, mode="a" if written else "w", header=not written, index=False)
+        written += chunk_rows
+
+
+def legacy_describe(path):
+    df = pd.read_csv(path)
+    column_info = []
+    for column in df.columns:
+        sample_value = df[column].dropna().iloc[0] if not df[column].empty else None
+        column_info.append({
+            "name": ''.join(e for e in column if e.isalnum() or e == '_'),
+            "original_dtype": str(df[column].dtype),
+            "sample_value": str(sample_value),
+            "has_nulls": bool(df[column].isnull().sum() > 0),
+            "max_length": int(df[column].astype(str).str.len().max())
+        })
+    return len(df)
+
+
+def run(method, path, results):
+    logging.disable(logging.WARNING)
+    from src.utils.csv_profile import profile_csv
+    start = time.perf_counter()
+    if method == "legacy":
+        rows = legacy_describe(path)
+    else:
+        with open(path, "rb") as file:
+            rows = profile_csv(file, fast=method == "fast")["total_rows"]
+    results.put((rows, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, default=256)
+    parser.add_argument("--columns", type=int, default=200)
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the in-memory analysis (large files)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "wide.csv")
+        write_csv(path, args.megabytes, args.columns)
+        print(f"file: {os.path.getsize(path) / 2**20:,.0f} MiB, {args.columns} columns")
+        methods = ["exact", "fast"] if args.skip_legacy else ["legacy", "exact", "fast"]
+        for method in methods:
+            results = context.Queue()
+            process = context.Process(target=run, args=(method, path, results))
+            process.start()
+            rows, seconds, peak_kib = results.get()
+            process.join()
+            print(f"  {method:>6}: {seconds:.1f} s, {rows:,} rows, peak RSS {peak_kib / 1024:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
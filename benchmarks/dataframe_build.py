@@ -0,0 +1,87 @@
+"""
+Benchmark DataFrame construction from query rows.
+
+Compares the previous `create_dataframe` (object DataFrame from row tuples,
+types guessed from the first value) with the type-driven, columnar version on
+a synthetic result shaped like a typical EDA query: an integer key, a Decimal
+amount, a timestamp, a low-cardinality text column, free text and a nullable
+integer. Reports build time, peak traced memory during the build and the size
+of the resulting DataFrame.
+
+Usage:
+    python -m benchmarks.dataframe_build --rows 1000000
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pandas as pd
+from src.utils.helpers import create_dataframe
+
+COLUMN_NAMES = ["order_id", "amount", "ordered_at", "region", "note", "quantity"]
+# Kinds as reported for a PostgreSQL result by QueryExecutor.column_types
+COLUMN_TYPES = ["int", "decimal", "datetime", "text", "text", "int"]
+REGIONS = ["north", "south", "east", "west", "central"]
+
+
+def legacy_create_dataframe(data, column_names):
+    """`create_dataframe` as it was before type-driven conversion."""
+    df = pd.DataFrame(data, columns=column_names)
+    for col in df.columns:
+        if df[col].dtype == object:
+            if len(df[col]) > 0 and isinstance(df[col].iloc[0], Decimal):
+                df[col] = df[col].astype(float)
+            elif len(df[col]) > 0 and isinstance(df[col].iloc[0], datetime):
+                df[col] = pd.to_datetime(df[col])
+            else:
+                df[col] = pd.to_numeric(df[col], errors='ignore')
+    return df
+
+
+def build_rows(n_rows):
+    start = datetime(2024, 1, 1)
+    return [
+        (i, Decimal(i % 100000) / 100, start + timedelta(minutes=i), REGIONS[i % len(REGIONS)],
+         f"note {i}", None if i % 10 == 0 else i % 50)
+        for i in range(n_rows)
+    ]
+
+
+def measure(build, rows):
+    start = time.perf_counter()
+    df = build(rows)
+    seconds = time.perf_counter() - start
+    del df
+
+    tracemalloc.start()
+    df = build(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, int(df.memory_usage(deep=True).sum()), df.dtypes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rows = build_rows(args.rows)
+    results = {
+        "legacy": measure(lambda data: legacy_create_dataframe(data, COLUMN_NAMES), rows),
+        "typed": measure(lambda data: create_dataframe(data, COLUMN_NAMES, COLUMN_TYPES), rows),
+    }
+
+    print(f"rows: {args.rows:,}")
+    for name, (seconds, peak, size, _) in results.items():
+        print(f"{name:>7}: build {seconds:.2f} s, peak memory {peak / 2**20:,.1f} MiB, "
+              f"DataFrame {size / 2**20:,.1f} MiB")
+    print("dtypes (legacy -> typed):")
+    for column in COLUMN_NAMES:
+        print(f"  {column}: {results['legacy'][3][column]} -> {results['typed'][3][column]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark the EDA pipeline's stage scheduling with simulated client latencies.
+
+Runs `run_eda_pipeline` end to end against a seeded SQLite database, a fake LLM
+for SQL generation and a fake LIDA text generator, each sleeping for a fixed
+latency per call and per client build. The same runs are repeated with one
+stage worker (every stage in sequence) and with the configured number of
+workers, cold (fresh clients, empty schema cache) and warm, and the per-stage
+breakdown of the last cold scheduled run is printed.
+
+Usage:
+    python -m benchmarks.eda_stages --llm-latency 1.0 --build-latency 0.5 --candidates 3
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+import src.pipeline.eda_pipeline as eda_pipeline
+from src.utils.constants import STAGE_CONFIG, VIZ_CONFIG
+from src.utils.schema_cache import get_schema_cache
+from benchmarks.fakes import make_context, seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--build-latency", type=float, default=0.5)
+    parser.add_argument("--candidates", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=STAGE_CONFIG["max_workers"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, "eda.db")
+        seed_database(database)
+        eda_pipeline.POSTGRESQL_DATABASE_URI = f"sqlite:///{database}"
+        VIZ_CONFIG["n"] = args.candidates
+        print(f"LLM latency {args.llm_latency}s, client build {args.build_latency}s, {args.candidates} candidate(s)")
+
+        for workers in (1, args.workers):
+            STAGE_CONFIG["max_workers"] = workers
+            cold, warm = [], []
+            for _ in range(args.repeat):
+                get_schema_cache().invalidate()
+                context = make_context(args.llm_latency, args.build_latency, os.path.join(workdir, "llmx"))
+                for timings in (cold, warm):
+                    # The question changes per run so the SQL cache does not answer it
+                    start = time.perf_counter()
+                    df, *_ = eda_pipeline.run_eda_pipeline(f"Amount by region {time.perf_counter()}", context=context)
+                    timings.append(time.perf_counter() - start)
+                    if timings is cold:
+                        stages = df.attrs["stages"]["stages"]
+            print(f"  {workers} stage worker(s): cold {statistics.median(cold):.2f} s, "
+                  f"warm {statistics.median(warm):.2f} s")
+        for name, timing in stages.items():
+            print(f"    {name:>10}: start {timing['start']:.2f} s, {timing['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
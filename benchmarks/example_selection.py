@@ -0,0 +1,119 @@
+"""
+Benchmark few-shot example selection from a large example store.
+
+Generates question/SQL pairs over a synthetic schema, loads them into an
+ExampleStore and reports the time to build the store, the latency of
+selecting the top k examples for held-out questions (and of rendering the
+whole QnA prompt with them), the latency of adding and removing a single
+example, how often a selected example queries the question's table, and the
+few-shot part of the prompt in tokens with the selected examples vs every
+example in the store.
+
+Usage:
+    python -m benchmarks.example_selection --examples 10000 --k 5 --questions 1000
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+from langchain_core.prompts import FewShotPromptTemplate
+from src.utils.constants import EXAMPLE_PROMPT
+from src.utils.example_store import ExampleStore, StoreExampleSelector, example_id
+from src.utils.text_index import estimate_tokens
+
+TABLES = ["customers", "orders", "order_items", "products", "categories", "suppliers", "employees", "shipments",
+          "invoices", "payments", "returns", "warehouses", "inventory", "regions", "stores", "promotions",
+          "campaigns", "leads", "accounts", "contracts", "tickets", "agents", "subscriptions", "plans", "devices",
+          "sensors", "readings", "vehicles", "drivers", "routes", "flights", "bookings", "hotels", "rooms",
+          "patients", "doctors", "appointments", "prescriptions", "courses", "students", "enrollments",
+          "teachers", "projects", "tasks", "timesheets", "budgets", "expenses", "assets", "vendors", "audits"]
+
+COLUMNS = ["amount", "price", "quantity", "status", "created_at", "country", "city", "rating", "score", "duration",
+           "discount", "cost", "revenue", "weight", "priority", "category", "channel", "balance", "age", "level"]
+
+TEMPLATES = [
+    ("List all {table} where {column} is {value}.", "SELECT * FROM {table} WHERE {column} = '{value}';"),
+    ("What is the total {column} of {table} by {group}?",
+     "SELECT {group}, SUM({column}) FROM {table} GROUP BY {group};"),
+    ("Find the average {column} of {table} per {group}.",
+     "SELECT {group}, AVG({column}) FROM {table} GROUP BY {group};"),
+    ("Show the top {n} {table} by {column}.", "SELECT * FROM {table} ORDER BY {column} DESC LIMIT {n};"),
+    ("How many {table} have {column} above {n}?", "SELECT COUNT(*) FROM {table} WHERE {column} > {n};"),
+    ("List {table} created in the last {n} days.",
+     "SELECT * FROM {table} WHERE created_at >= CURRENT_DATE - INTERVAL '{n} days';"),
+]
+
+
+def make_example(rng):
+    """A random question/SQL pair and the table it queries."""
+    question, sql = rng.choice(TEMPLATES)
+    column, group = rng.sample(COLUMNS, 2)
+    values = {"table": rng.choice(TABLES), "column": column, "group": group,
+              "value": rng.choice(["open", "closed", "gold", "Germany", "Canada"]), "n": rng.randint(2, 90)}
+    return {"input": question.format(**values), "query": sql.format(**values)}, values["table"]
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", type=int, default=10000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    rng = random.Random(0)
+
+    examples = [make_example(rng)[0] for _ in range(args.examples)]
+    start = time.perf_counter()
+    store = ExampleStore(examples, k=args.k)
+    build = time.perf_counter() - start
+    print(f"{len(store):,} unique examples, built in {build:.2f} s ({build / args.examples * 1e6:,.0f} us each)")
+
+    template = FewShotPromptTemplate(
+        example_selector=StoreExampleSelector(store), example_prompt=EXAMPLE_PROMPT,
+        prefix="Here is the relevant table info: {table_info}", suffix="User input: {input}\nSQL query: ",
+        input_variables=["input", "table_info"],
+    )
+    questions = [make_example(rng) for _ in range(args.questions)]
+    select, render, hits, selected_tokens = [], [], 0, []
+    for question, table in questions:
+        start = time.perf_counter()
+        selected = store.select(question["input"])
+        select.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        template.format(input=question["input"], table_info="")
+        render.append(time.perf_counter() - start)
+        hits += any(f"FROM {table} " in example["query"] for example in selected)
+        selected_tokens.append(sum(estimate_tokens(EXAMPLE_PROMPT.format(**example)) for example in selected))
+    print(f"select top {args.k}: median {statistics.median(select) * 1000:.2f} ms, "
+          f"p95 {percentile(select, 0.95) * 1000:.2f} ms")
+    print(f"render prompt (selection included): median {statistics.median(render) * 1000:.2f} ms, "
+          f"p95 {percentile(render, 0.95) * 1000:.2f} ms")
+    print(f"selected examples query the question's table for {hits / len(questions):.0%} of questions")
+
+    added, removed = [], []
+    # New examples only, so removing one leaves the store as it was
+    for _ in range(200):
+        example = make_example(rng)[0]
+        if example_id(example) in store:
+            continue
+        start = time.perf_counter()
+        key = store.add(example)
+        added.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        store.remove(key)
+        removed.append(time.perf_counter() - start)
+    print(f"add: median {statistics.median(added) * 1e6:,.0f} us, "
+          f"remove: median {statistics.median(removed) * 1e6:,.0f} us")
+
+    unique = {(example["input"], example["query"]): example for example in examples}.values()
+    every = sum(estimate_tokens(EXAMPLE_PROMPT.format(**example)) for example in unique)
+    print(f"few-shot prompt tokens: {statistics.median(selected_tokens):,.0f} selected vs {every:,} for every example")
+
+
+if __name__ == "__main__":
+    main()
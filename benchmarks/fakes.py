@@ -0,0 +1,103 @@
+"""
+Deterministic stand-ins for the services the pipelines call, shared by the benchmarks.
+
+`SlowLLM` answers SQL prompts with canned SQL and answer prompts with a canned
+answer, streamed word by word when asked to stream, and `SlowTextGenerator`
+answers LIDA with fixed chart code, each after a fixed latency per call (and,
+for `SlowLLM`, per generated word). `make_context` builds a PipelineContext from them that
+also sleeps for a fixed latency per client build, and `seed_database` writes a
+seeded SQLite sales table to query.
+"""
+import time
+import numpy as np
+import pandas as pd
+from langchain_community.llms.fake import FakeListLLM
+from langchain_core.outputs import GenerationChunk
+from llmx import TextGenerator
+from llmx.datamodel import Message, TextGenerationResponse
+from sqlalchemy import create_engine
+from src.utils.context import PipelineContext
+
+SQL = "SELECT region, amount FROM sales"
+
+ANSWER = "The east region has the highest total amount."
+
+CHART_CODE = """```python
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+def plot(data: pd.DataFrame):
+    sns.barplot(data=data, x="region", y="amount")
+    plt.title("Amount by region", wrap=True)
+    return plt
+
+chart = plot(data)
+```"""
+
+
+class SlowLLM(FakeListLLM):
+    """
+    FakeListLLM answering SQL prompts with its first response and answer prompts with `answer`.
+
+    A call waits `latency` seconds before the first word and `token_latency` seconds per
+    word, whether the response is returned whole or streamed word by word.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    answer: str = ANSWER
+
+    def _response(self, prompt):
+        return self.answer if prompt.rstrip().endswith("Answer:") else self.responses[0]
+
+    def _call(self, prompt, *args, **kwargs):
+        response = self._response(prompt)
+        time.sleep(self.latency + self.token_latency * len(response.split()))
+        return response
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for i, word in enumerate(self._response(prompt).split(" ")):
+            time.sleep(self.token_latency)
+            chunk = GenerationChunk(text=word if i == 0 else " " + word)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class SlowTextGenerator(TextGenerator):
+    """LIDA text generator returning fixed chart code after a delay, whatever the candidate count."""
+
+    def __init__(self, latency, cache_dir):
+        super().__init__(provider="fake", cache_dir=cache_dir)
+        self.latency = latency
+
+    def generate(self, messages, config=None, **kwargs):
+        time.sleep(self.latency)
+        n = getattr(config, "n", 1) or 1
+        return TextGenerationResponse(text=[Message(role="assistant", content=CHART_CODE)] * n, config=config)
+
+    def count_tokens(self, text):
+        return len(text) // 4
+
+
+def seed_database(path, rows=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    pd.DataFrame({
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "amount": np.round(rng.random(rows) * 1000, 2),
+    }).to_sql("sales", engine, index=False, chunksize=100000)
+    engine.dispose()
+
+
+def make_context(llm_latency, build_latency, cache_dir, sql=SQL, token_latency=0.0, answer=ANSWER):
+    def build_llm():
+        time.sleep(build_latency)
+        return SlowLLM(responses=[sql], latency=llm_latency, token_latency=token_latency, answer=answer)
+
+    def build_text_gen():
+        time.sleep(build_latency)
+        return SlowTextGenerator(llm_latency, cache_dir)
+
+    return PipelineContext(builders={"llm": build_llm, "text_gen": build_text_gen})
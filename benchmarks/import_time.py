@@ -0,0 +1,128 @@
+"""
+Benchmark and guard the import time of the app's entry modules.
+
+Imports each entry module in a fresh interpreter under `python -X importtime`
+and reports the median cumulative import time, its heaviest top-level packages
+and which heavy backends (LIDA, LangChain, Vertex AI, matplotlib, PIL, database
+drivers, ...) the import loaded. Backends load with the capability that needs
+them: the configuration, helpers and Flask API import none of them, the QnA
+pipeline only LangChain, the EDA pipeline LIDA and its plotting stack, and a
+database driver loads with the first connection pool.
+
+An entry module that loads a backend it must not is reported as a violation;
+tests/test_import_time.py checks the same rules, which unlike the timings do
+not depend on the machine.
+Results can be saved as a baseline, and later runs compared against it: an
+import that grew by more than the tolerance (and by more than a small
+absolute margin) is reported as a regression. Either exits with status 1.
+
+Usage:
+    python -m benchmarks.import_time --repeat 5 --save-baseline
+    python -m benchmarks.import_time --repeat 5 --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "import_time.json")
+
+BACKENDS = ["lida", "llmx", "langchain", "langchain_core", "langchain_community", "langchain_google_vertexai",
+            "google.generativeai", "matplotlib", "seaborn", "PIL", "psycopg2", "mysql.connector"]
+
+# Backends each entry module must not load on import
+NO_BACKENDS = BACKENDS
+ENTRY_MODULES = {
+    "src.utils.constants": NO_BACKENDS,
+    "src.utils.metrics": NO_BACKENDS,
+    "src.utils.helpers": NO_BACKENDS,
+    "src.utils.context": NO_BACKENDS,
+    "src.utils.ingest": NO_BACKENDS,
+    "src.pipeline.QNA_pipeline": ["lida", "llmx", "langchain_google_vertexai", "google.generativeai",
+                                  "matplotlib", "seaborn", "PIL", "psycopg2", "mysql.connector"],
+    "src.pipeline.eda_pipeline": ["langchain_google_vertexai", "google.generativeai", "psycopg2", "mysql.connector"],
+    "new_app": NO_BACKENDS,
+}
+
+# Absolute growth below which an import is never a regression
+MIN_SECONDS = 0.05
+
+MARKER = "-- entry module import --"
+
+
+def import_once(module):
+    """Import a module in a fresh interpreter; return its cumulative seconds, top packages and loaded backends."""
+    # The marker separates the interpreter's own startup imports from the module's
+    probe = (f"import sys, json; sys.stderr.write('{MARKER}\\n'); sys.stderr.flush(); import {module}; "
+             f"print(json.dumps([b for b in {BACKENDS!r} if b in sys.modules]))")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True,
+                             env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+    if process.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{process.stderr[-2000:]}")
+    total, packages = 0, {}
+    lines = process.stderr.splitlines()
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip()
+        # Lines of imports made directly by the statement are not indented
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+        if "." not in package and not package.startswith("_") and package != module.split(".")[0]:
+            packages[package] = max(packages.get(package, 0), int(cumulative))
+    backends = json.loads(process.stdout.strip().splitlines()[-1])
+    return total / 1e6, packages, backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", choices=list(ENTRY_MODULES), default=list(ENTRY_MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3, help="heaviest top-level packages shown per module")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare against and save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative growth reported as a regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+
+    report, failures = {}, []
+    print(f"Median of {args.repeat} fresh-interpreter import(s)")
+    for module in args.modules:
+        runs = [import_once(module) for _ in range(args.repeat)]
+        seconds = statistics.median(run[0] for run in runs)
+        packages, backends = runs[-1][1], runs[-1][2]
+        report[module] = {"seconds": round(seconds, 4), "backends": backends}
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        print(f"{module}: {seconds * 1000:,.0f} ms, backends: {', '.join(backends) or 'none'}")
+        print(f"  heaviest: {', '.join(f'{name} {micros / 1000:,.0f} ms' for name, micros in heaviest)}")
+        forbidden = [backend for backend in backends if backend in ENTRY_MODULES[module]]
+        if forbidden:
+            failures.append(f"VIOLATION {module} loads {', '.join(forbidden)}")
+        previous = baseline.get("results", {}).get(module, {}).get("seconds")
+        if previous is not None and seconds > previous * (1 + args.tolerance) and seconds - previous > MIN_SECONDS:
+            failures.append(f"REGRESSION {module}: {previous * 1000:,.0f} ms -> {seconds * 1000:,.0f} ms "
+                            f"(+{(seconds / previous - 1) * 100:.0f}%)")
+
+    if baseline:
+        print(f"\nCompared with {args.baseline} ({baseline.get('created')}):")
+    print("\n".join(f"  {line}" for line in failures) or "  no violations or regressions")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        saved = {**baseline, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": {"repeat": args.repeat},
+                 "results": {**baseline.get("results", {}), **report}}
+        with open(args.baseline, "w") as handle:
+            json.dump(saved, handle, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
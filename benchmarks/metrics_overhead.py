@@ -0,0 +1,80 @@
+"""
+Benchmark the overhead of the built-in metrics and tracing.
+
+Times a bare function call against the same call in a metrics span, with
+metrics disabled, enabled, and enabled inside a trace; then runs the QnA and
+EDA pipelines end to end (fake LLM and LIDA text generator, seeded SQLite, see
+benchmarks/fakes.py) with metrics off, on, and on with every run traced to
+disk.
+
+Usage:
+    python -m benchmarks.metrics_overhead --calls 200000 --runs 20
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+import src.pipeline.QNA_pipeline as qna_pipeline
+import src.pipeline.eda_pipeline as eda_pipeline
+from src.utils.constants import METRICS_CONFIG
+from src.utils.metrics import get_metrics, timed, trace
+from benchmarks.fakes import make_context, seed_database
+
+
+def noop():
+    return None
+
+
+def per_call(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    instrumented = timed("benchmark.noop")(noop)
+    bare = per_call(noop, args.calls)
+    print(f"span overhead per call ({args.calls:,} calls, bare call {bare * 1e9:,.0f} ns):")
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in ("disabled", "enabled", "traced"):
+            METRICS_CONFIG["enabled"] = mode != "disabled"
+            METRICS_CONFIG["trace_dir"] = os.path.join(workdir, "traces") if mode == "traced" else None
+            with trace("benchmark"):
+                seconds = per_call(instrumented, args.calls if mode != "traced" else min(args.calls, 100000))
+            print(f"  {mode:>8}: +{(seconds - bare) * 1e9:,.0f} ns")
+
+        database = os.path.join(workdir, "sales.db")
+        seed_database(database, rows=args.rows)
+        qna_pipeline.DATABASE_URI = eda_pipeline.POSTGRESQL_DATABASE_URI = f"sqlite:///{database}"
+        context = make_context(0.0, 0.0, os.path.join(workdir, "llmx"))
+        print(f"pipelines, {args.rows:,} rows, median of {args.runs} runs:")
+        for name, run in (("qna", qna_pipeline.run_qna_pipeline), ("eda", eda_pipeline.run_eda_pipeline)):
+            for mode in ("off", "on", "traced"):
+                METRICS_CONFIG["enabled"] = mode != "off"
+                METRICS_CONFIG["trace_dir"] = os.path.join(workdir, "traces") if mode == "traced" else None
+                timings = []
+                for i in range(args.runs + 1):
+                    start = time.perf_counter()
+                    with trace(name):
+                        # A new question each run, so the SQL cache does not answer it
+                        run(f"Amount by region ({mode} {i})", context=context)
+                    timings.append(time.perf_counter() - start)
+                # The first run warms the clients and the caches
+                print(f"  {name} metrics {mode:>6}: {statistics.median(timings[1:]) * 1000:,.2f} ms")
+        METRICS_CONFIG["trace_dir"] = None
+        series = get_metrics().snapshot()
+        print(f"series recorded: {len(series['counters'])} counters, {len(series['histograms'])} histograms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Offline benchmark suite for the QnA and EDA pipelines, with regression tracking.
+
+Runs `run_qna_pipeline` and `run_eda_pipeline` end to end without Vertex AI,
+PaLM or a live database: SQL and answers come from a deterministic fake LLM,
+chart code from a fake LIDA text generator (see benchmarks/fakes.py), each
+sleeping for a configurable latency, and the SQL runs against a seeded SQLite
+table of each requested size. Every run starts from fresh clients and empty
+schema, SQL, result, summary and render caches, so it pays for all of its work.
+
+Each pipeline and size runs in a fresh process, which reports the median
+wall time, the median time of each pipeline stage (db_context: schema load,
+query: SQL generation, rows: execution, df: DataFrame build, or streamed
+execution and build for EDA, summary: summarize, charts: visualize, image:
+render) and its peak resident memory.
+
+Every run is compared against a baseline: a timing or memory figure that grew
+by more than the tolerance (and by more than a small absolute margin) is
+reported as a regression and the exit status is 1. Timings depend on the
+machine, so the baseline is recorded locally with `--save-baseline` before the
+first comparison; a run without a baseline, with scenarios missing from it or
+with other fake latencies than it was recorded with fails instead of passing
+unchecked.
+
+Usage:
+    python -m benchmarks.pipelines --rows 1000 100000 --save-baseline
+    python -m benchmarks.pipelines --rows 1000 100000 --tolerance 0.25
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "pipelines.json")
+
+# Absolute growth below which a figure is never a regression
+MIN_SECONDS = 0.05
+MIN_MIB = 16
+
+
+def reset_caches():
+    """Drop the process-wide caches so a run does all of its work again."""
+    import src.utils.render_cache as render_cache
+    import src.utils.result_cache as result_cache
+    import src.utils.sql_cache as sql_cache
+    import src.utils.summary_cache as summary_cache
+    from src.utils.schema_cache import get_schema_cache
+    sql_cache._sql_cache = None
+    result_cache._result_cache = None
+    render_cache._render_cache = None
+    summary_cache._summary_cache = summary_cache.SummaryCache()
+    get_schema_cache().invalidate()
+
+
+def run(pipeline, database, args, results):
+    logging.disable(logging.WARNING)
+    import src.pipeline.QNA_pipeline as qna_pipeline
+    import src.pipeline.eda_pipeline as eda_pipeline
+    from src.utils.constants import SQL_CACHE_CONFIG
+    from benchmarks.fakes import make_context
+
+    uri = f"sqlite:///{database}"
+    qna_pipeline.DATABASE_URI = eda_pipeline.POSTGRESQL_DATABASE_URI = uri
+    SQL_CACHE_CONFIG["path"] = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        walls, stages = [], {}
+        for i in range(args.repeat):
+            reset_caches()
+            context = make_context(args.llm_latency, args.build_latency, cache_dir)
+            question = f"What is the amount by region? ({i})"
+            start = time.perf_counter()
+            if pipeline == "qna":
+                _, df = qna_pipeline.run_qna_pipeline(question, context=context)
+            else:
+                df, *_ = eda_pipeline.run_eda_pipeline(question, context=context)
+            walls.append(time.perf_counter() - start)
+            for name, timing in df.attrs["stages"]["stages"].items():
+                stages.setdefault(name, []).append(timing["seconds"])
+            del df
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / 1024 / 1024
+    results.put({
+        "wall_seconds": round(statistics.median(walls), 4),
+        "stages": {name: round(statistics.median(seconds), 4) for name, seconds in stages.items()},
+        "peak_rss_mib": round(peak * scale, 1),
+    })
+
+
+def compare(name, result, baseline, tolerance):
+    """Regressions of a scenario against its baseline, as printable lines."""
+    checks = [("wall_seconds", result["wall_seconds"], baseline.get("wall_seconds"), MIN_SECONDS, "s"),
+              ("peak_rss_mib", result["peak_rss_mib"], baseline.get("peak_rss_mib"), MIN_MIB, " MiB")]
+    checks += [(f"stage {stage}", seconds, baseline.get("stages", {}).get(stage), MIN_SECONDS, "s")
+               for stage, seconds in result["stages"].items()]
+    regressions = []
+    for figure, value, previous, margin, unit in checks:
+        if previous is not None and value > previous * (1 + tolerance) and value - previous > margin:
+            regressions.append(f"{name} {figure}: {previous:,.2f}{unit} -> {value:,.2f}{unit} "
+                               f"(+{(value / previous - 1) * 100 if previous else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", nargs="+", choices=["qna", "eda"], default=["qna", "eda"])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--build-latency", type=float, default=0.0, help="seconds per fake client build")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare against and save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative growth reported as a regression")
+    args = parser.parse_args()
+
+    from benchmarks.fakes import seed_database
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    elif not args.save_baseline:
+        parser.error(f"no baseline at {args.baseline}; record one on this machine first with --save-baseline")
+    settings = {"llm_latency": args.llm_latency, "build_latency": args.build_latency}
+    recorded = {key: baseline.get("settings", {}).get(key) for key in settings}
+    if baseline and recorded != settings and not args.save_baseline:
+        parser.error(f"the baseline was recorded with {recorded}, not {settings}; "
+                     f"pass the same latencies or record a new baseline with --save-baseline")
+
+    context = multiprocessing.get_context("spawn")
+    report, regressions, missing = {}, [], []
+    print(f"LLM latency {args.llm_latency}s, client build {args.build_latency}s, median of {args.repeat} run(s)")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            database = os.path.join(workdir, f"sales_{rows}.db")
+            seed_database(database, rows=rows)
+            for pipeline in args.pipelines:
+                results = context.Queue()
+                process = context.Process(target=run, args=(pipeline, database, args, results))
+                process.start()
+                result = results.get()
+                process.join()
+                name = f"{pipeline}/{rows}"
+                report[name] = result
+                print(f"{name}: {result['wall_seconds']:.3f} s, peak RSS {result['peak_rss_mib']:,.0f} MiB")
+                for stage, seconds in result["stages"].items():
+                    print(f"  {stage:>10}: {seconds:.3f} s")
+                if name in baseline.get("results", {}):
+                    regressions += compare(name, result, baseline["results"][name], args.tolerance)
+                elif not args.save_baseline:
+                    missing.append(name)
+
+    if baseline:
+        print(f"\nCompared with {args.baseline} ({baseline.get('created')}):")
+        print("\n".join(f"  REGRESSION {line}" for line in regressions) or "  no regressions")
+    if missing:
+        print(f"  MISSING {', '.join(missing)}: not in the baseline, record them with --save-baseline")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        saved = {**baseline, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "settings": {**settings, "repeat": args.repeat},
+                 # Results recorded with other latencies are not comparable and are dropped
+                 "results": {**(baseline.get("results", {}) if recorded == settings else {}), **report}}
+        with open(args.baseline, "w") as handle:
+            json.dump(saved, handle, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    sys.exit(1 if regressions or missing else 0)
+
+
+if __name__ == "__main__":
+    main()
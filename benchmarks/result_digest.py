@@ -0,0 +1,83 @@
+"""
+Benchmark the answer prompt with the raw SQL result versus its digest.
+
+For synthetic results of increasing size, reports the estimated prompt tokens
+when the rows are stringified into `answer_prompt` (as before) and when
+`digest_result` is used, and the end-to-end answer latency through a fake LLM
+whose latency grows with the prompt (a fixed overhead plus a per-token prefill
+cost). Prompts beyond the context window count as rejected.
+
+Usage:
+    python -m benchmarks.result_digest --rows 10 1000 50000
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+from src.utils.constants import answer_prompt
+from src.utils.helpers import create_dataframe
+from src.utils.result_digest import digest_result
+from src.utils.text_index import estimate_tokens
+
+COLUMN_NAMES = ["order_id", "customer", "region", "amount", "ordered_at"]
+REGIONS = ["north", "south", "east", "west", "central"]
+QUESTION = "What is the total order amount per region?"
+QUERY = "SELECT order_id, customer, region, amount, ordered_at FROM orders"
+
+
+def build_rows(n_rows, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [(i, f"customer_{rng.randint(1, 5000)}", rng.choice(REGIONS),
+             Decimal(rng.randint(100, 100000)) / 100, start + timedelta(minutes=i))
+            for i in range(n_rows)]
+
+
+def fake_llm(overhead, per_token, context_window):
+    def respond(prompt):
+        tokens = estimate_tokens(prompt.to_string())
+        if tokens > context_window:
+            raise ValueError(f"prompt of {tokens} tokens exceeds the context window")
+        time.sleep(overhead + per_token * tokens)
+        return "The total amount per region is ..."
+    return RunnableLambda(respond)
+
+
+def answer(chain, build_result):
+    start = time.perf_counter()
+    try:
+        chain.invoke({"question": QUESTION, "query": QUERY, "result": build_result()})
+        return time.perf_counter() - start
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--overhead", type=float, default=0.3, help="fixed LLM latency in seconds")
+    parser.add_argument("--per-token", type=float, default=0.00005, help="prefill seconds per prompt token")
+    parser.add_argument("--context-window", type=int, default=128000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    chain = answer_prompt | fake_llm(args.overhead, args.per_token, args.context_window) | StrOutputParser()
+    print(f"{'rows':>8} {'raw tokens':>12} {'digest tokens':>14} {'raw latency':>12} {'digest latency':>15}")
+    for n_rows in args.rows:
+        data = build_rows(n_rows)
+        df = create_dataframe(data, COLUMN_NAMES)
+        raw_tokens = estimate_tokens(answer_prompt.format(question=QUESTION, query=QUERY, result=data))
+        digest_tokens = estimate_tokens(answer_prompt.format(question=QUESTION, query=QUERY,
+                                                             result=digest_result(df)))
+        raw_latency = answer(chain, lambda: data)
+        digest_latency = answer(chain, lambda: digest_result(df))
+        print(f"{n_rows:>8,} {raw_tokens:>12,} {digest_tokens:>14,} "
+              f"{'rejected' if raw_latency is None else f'{raw_latency:.2f} s':>12} {digest_latency:>13.2f} s")
+
+
+if __name__ == "__main__":
+    main()
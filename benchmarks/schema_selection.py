@@ -0,0 +1,104 @@
+"""
+Benchmark schema selection on a synthetic warehouse schema.
+
+Reports the prompt size with and without pruning, how often the table a question
+is about survives selection, and selection latency (cold, including the index
+build, and warm).
+
+Usage:
+    python -m benchmarks.schema_selection --tables 1000 --questions 200
+"""
+import argparse
+import random
+import statistics
+import time
+from src.utils.constants import QNA_PROMPT_TEMPLATE
+from src.utils.schema_selector import select_schema, get_schema_index
+from src.utils.text_index import estimate_tokens
+
+DOMAINS = ["sales", "customer", "product", "inventory", "shipment", "invoice", "payment", "employee",
+           "supplier", "warehouse", "campaign", "ticket", "contract", "account", "region", "store"]
+QUALIFIERS = ["daily", "monthly", "archive", "staging", "detail", "summary", "history", "audit",
+              "snapshot", "backup", "raw", "clean", "legacy", "forecast", "target", "adjustment"]
+COLUMN_WORDS = ["amount", "price", "quantity", "status", "name", "code", "date", "created_at", "updated_at",
+                "discount", "tax", "currency", "country", "city", "email", "phone", "score", "category",
+                "priority", "balance", "weight", "channel", "segment", "rating", "revenue", "cost"]
+COLUMN_TYPES = ["INTEGER", "NUMERIC(12, 2)", "VARCHAR(255)", "DATE", "TIMESTAMP", "BOOLEAN", "TEXT"]
+
+
+def build_schema(n_tables, seed=0):
+    """Build a schema context shaped like `SchemaCache.get_context` output."""
+    rng = random.Random(seed)
+    tables = {}
+    for i in range(n_tables):
+        name = f"{rng.choice(DOMAINS)}_{rng.choice(QUALIFIERS)}_{i}"
+        columns = [{"name": "id", "type": "INTEGER", "comment": None}]
+        columns += [{"name": f"{word}_{j}" if j else word, "type": rng.choice(COLUMN_TYPES), "comment": None}
+                    for j, word in enumerate(rng.sample(COLUMN_WORDS, rng.randint(8, 20)))]
+        foreign_keys = []
+        if tables and rng.random() < 0.5:
+            referred = rng.choice(list(tables))
+            columns.append({"name": f"{referred}_id", "type": "INTEGER", "comment": None})
+            foreign_keys.append({"columns": [f"{referred}_id"], "referred_table": referred, "referred_columns": ["id"]})
+        ddl = ",\n\t".join(f"{column['name']} {column['type']}" for column in columns)
+        header = "\t".join(column["name"] for column in columns)
+        rows = "\n".join("\t".join(str(rng.randint(0, 9999)) for _ in columns) for _ in range(3))
+        info = f"CREATE TABLE {name} (\n\t{ddl}\n)\n\n/*\n3 rows from {name} table:\n{header}\n{rows}\n*/"
+        tables[name] = {"columns": columns, "foreign_keys": foreign_keys, "comment": None, "info": info}
+    return {
+        "fingerprint": f"synthetic-{n_tables}-{seed}",
+        "table_names": list(tables),
+        "table_info": "\n\n".join(table["info"] for table in tables.values()),
+        "tables": tables,
+    }
+
+
+def build_questions(schema_context, n_questions, seed=0):
+    rng = random.Random(seed)
+    questions = []
+    for table_name in rng.sample(schema_context["table_names"], n_questions):
+        domain, qualifier, _ = table_name.split("_", 2)
+        column = rng.choice(schema_context["tables"][table_name]["columns"][1:])["name"].split("_")[0]
+        questions.append((f"What is the total {column} in the {qualifier} {domain} data?", table_name))
+    return questions
+
+
+def prompt_tokens(question, table_info):
+    return estimate_tokens(QNA_PROMPT_TEMPLATE.format(input=question, top_k=3, table_info=table_info))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--token-budget", type=int, default=None)
+    args = parser.parse_args()
+
+    schema_context = build_schema(args.tables)
+    questions = build_questions(schema_context, min(args.questions, args.tables))
+
+    start = time.perf_counter()
+    get_schema_index(schema_context)
+    index_seconds = time.perf_counter() - start
+
+    latencies, full_sizes, pruned_sizes, hits = [], [], [], 0
+    for question, table_name in questions:
+        start = time.perf_counter()
+        selection = select_schema(question, schema_context, token_budget=args.token_budget)
+        latencies.append(time.perf_counter() - start)
+        full_sizes.append(prompt_tokens(question, schema_context["table_info"]))
+        pruned_sizes.append(prompt_tokens(question, selection["table_info"]))
+        hits += table_name in selection["table_names"]
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    print(f"tables: {args.tables}, questions: {len(questions)}")
+    print(f"index build (cold): {index_seconds * 1000:.1f} ms")
+    print(f"selection latency (warm): median {statistics.median(latencies_ms):.2f} ms, "
+          f"p95 {latencies_ms[int(len(latencies_ms) * 0.95) - 1]:.2f} ms")
+    print(f"prompt tokens: full {statistics.mean(full_sizes):,.0f}, pruned {statistics.mean(pruned_sizes):,.0f} "
+          f"({1 - statistics.mean(pruned_sizes) / statistics.mean(full_sizes):.1%} smaller)")
+    print(f"target table selected: {hits / len(questions):.1%}")
+
+
+if __name__ == "__main__":
+    main()
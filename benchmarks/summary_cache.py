@@ -0,0 +1,77 @@
+"""
+Benchmark LIDA data summaries with the fingerprint-keyed summary cache.
+
+For generated frames of increasing size, times LIDA's summarizer over the full
+frame (what every EDA run did before), `cached_summarize` on a cold cache (the
+frame is fingerprinted and, above the sample size, summarized from a sample),
+a warm in-memory hit and a hit read back from disk by a fresh cache. The
+fingerprint time is included in the cached timings.
+
+Usage:
+    python -m benchmarks.summary_cache --rows 100000 1000000 5000000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from lida import Manager
+import src.utils.summary_cache as summary_cache
+from src.utils.summary_cache import SummaryCache, cached_summarize, dataframe_fingerprint
+from benchmarks.fakes import SlowTextGenerator
+
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_id": np.arange(n_rows, dtype=np.int64),
+        "region": rng.choice(["north", "south", "east", "west", "central"], n_rows),
+        "product": np.char.add("product_", rng.integers(0, 5000, n_rows).astype(str)),
+        "amount": np.round(rng.random(n_rows) * 1000, 2),
+        "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10**7, n_rows), unit="s"),
+    })
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--skip-full", action="store_true", help="skip summarizing the full frame")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        lida = Manager(text_gen=SlowTextGenerator(0, os.path.join(workdir, "llmx")))
+        for n_rows in args.rows:
+            df = make_frame(n_rows)
+            summary_cache._summary_cache = SummaryCache(os.path.join(workdir, f"summaries_{n_rows}"))
+            print(f"rows: {n_rows:,}")
+            if not args.skip_full:
+                full, seconds = timed(lida.summarize, df, summary_method="default")
+                print(f"  full summarize: {seconds:.2f} s")
+            _, seconds = timed(dataframe_fingerprint, df)
+            print(f"     fingerprint: {seconds:.3f} s")
+            summary, seconds = timed(cached_summarize, lida, df)
+            print(f"     cached cold: {seconds:.2f} s")
+            _, seconds = timed(cached_summarize, lida, df)
+            print(f"   cached memory: {seconds:.3f} s")
+            summary_cache._summary_cache = SummaryCache(os.path.join(workdir, f"summaries_{n_rows}"))
+            _, seconds = timed(cached_summarize, lida, df)
+            print(f"     cached disk: {seconds:.3f} s")
+            if not args.skip_full:
+                for field, sampled in zip(full["fields"], summary["fields"]):
+                    exact, approx = field["properties"], sampled["properties"]
+                    print(f"    {field['column']:>10}: {exact['dtype']}/{approx['dtype']}, unique "
+                          f"{exact['num_unique_values']:,}/{approx['num_unique_values']:,}, "
+                          f"range {exact.get('min')}..{exact.get('max')} / {approx.get('min')}..{approx.get('max')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark the describe -> upload flow for one CSV file.
+
+Compares the unstaged flow, where /api/describe_table profiles the file and
+/api/upload_csv parses it again to load it, with the staged flow, where
+describing parses the file once into the staging area and uploading loads the
+staged parts. Describing the same file a second time is timed too. The target is
+a temporary SQLite database.
+
+Usage:
+    python -m benchmarks.upload_staging --rows 1000000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from src.utils.csv_profile import profile_csv
+from src.utils.executor import get_query_executor
+from src.utils.ingest import ingest_csv
+from src.utils.staging import StagingArea
+from benchmarks.csv_ingest import TABLE, reset_table, write_csv
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "upload.csv")
+        write_csv(path, args.rows)
+        executor = get_query_executor(f"sqlite:///{os.path.join(workdir, 'staging.db')}")
+        area = StagingArea(os.path.join(workdir, "staging"))
+        print(f"rows: {args.rows:,}, file: {os.path.getsize(path) / 2**20:,.0f} MiB")
+
+        with open(path, "rb") as file:
+            reset_table(executor)
+            _, describe = timed(profile_csv, file)
+            _, upload = timed(ingest_csv, file, TABLE, executor)
+            print(f"  unstaged: describe {describe:.2f} s, upload {upload:.2f} s, total {describe + upload:.2f} s")
+
+            reset_table(executor)
+            entry, describe = timed(area.stage, file)
+            _, again = timed(area.stage, file)
+            _, upload = timed(area.ingest, area.get(entry["id"]), TABLE, executor)
+            print(f"    staged: describe {describe:.2f} s, upload {upload:.2f} s, total {describe + upload:.2f} s; "
+                  f"describe again {again:.3f} s, {entry['bytes'] / 2**20:,.0f} MiB staged as {entry['format']}")
+
+
+if __name__ == "__main__":
+    main()
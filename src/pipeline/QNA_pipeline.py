@@ -1,17 +1,21 @@
+import contextvars
 import logging
-from src.utils.constants import QNA_PROMPT_TEMPLATE, answer_prompt, EDA_PROMPT_TEMPLATE
+import queue
+import threading
+import time
+from src.utils.constants import QNA_PROMPT_TEMPLATE, answer_prompt, DATABASE_URI
+from src.utils.context import get_pipeline_context
+from src.utils.executor import get_query_executor
+from src.utils.schema_cache import get_schema_cache
+from src.utils.schema_selector import select_schema
+from src.utils.sql_cache import cached_sql_chain
+from src.utils.stages import StageScheduler
+from src.utils.result_digest import digest_result
 from src.utils.helpers import (
-    setup_database_connection,
-    postgresql_database_connection,
-    create_sql_chain,
-    initialize_llm,
-    create_qna_chain,
-    execute_sql_query_for_ans,
-    execute_sql_query_for_data,
+    clean_sql_query,
     create_dataframe,
-    clean_sql_query
+    execute_query
 )
-from langchain_community.tools.sql_database.tool import QuerySQLDataBaseTool
 from langchain_core.output_parsers import StrOutputParser
 
 logger = logging.getLogger(__name__)
@@ -20,12 +24,87 @@ class QNAError(Exception):
     """Custom exception for QNA pipeline errors."""
     pass
 
-def run_qna_pipeline(user_query):
+class QNACancelled(QNAError):
+    """Raised in the stages of a streamed QNA pipeline whose consumer stopped reading."""
+    pass
+
+def _qna_scheduler(user_query, context, on_token=None):
+    """Stages of the QnA pipeline; the answer is streamed to `on_token` chunk by chunk if given."""
+
+    def load_db_context():
+        # Cached database context, rebuilt only when the schema changes
+        engine = get_query_executor(DATABASE_URI).engine
+        return {"engine": engine, **get_schema_cache().get_context(engine)}
+
+    def write_query(sql_chain, db_context, schema):
+        # Shared SQL query chain, answered from the SQL cache for repeated questions
+        chain = cached_sql_chain(sql_chain, QNA_PROMPT_TEMPLATE, db_context["fingerprint"],
+                                 scope=str(db_context["engine"].url))
+        query = chain.invoke({"question": user_query, "top_k": 3, "table_info": schema["table_info"]})
+        cleaned_query = clean_sql_query(query)
+        logger.info(f"Cleaned SQL query: {cleaned_query}")
+        return cleaned_query
+
+    def build_dataframe(rows):
+        data, column_names, column_types = rows
+        df = create_dataframe(data, column_names, column_types)
+        logger.info(f"DataFrame created with shape: {df.shape}")
+        return df
+
+    def write_answer(llm, query, result):
+        answer = answer_prompt | llm | StrOutputParser()
+        inputs = {"question": user_query, "query": query, "result": result}
+        if on_token is None:
+            return answer.invoke(inputs)
+        # The LLM is streamed directly: a chain's stream still reads the LLM to the end when closed early
+        chunks, stream = [], llm.stream(answer_prompt.invoke(inputs))
+        try:
+            for chunk in stream:
+                chunks.append(chunk if isinstance(chunk, str) else chunk.content)
+                on_token(chunks[-1])
+        finally:
+            # Stops generating when on_token raises
+            stream.close()
+        return "".join(chunks)
+
+    # The LLM and SQL chain are built while the schema context loads, narrowed down to the
+    # tables relevant to the question; then query, execution, DataFrame, digest and answer
+    scheduler = StageScheduler(name="qna")
+    scheduler.add("llm", context.llm)
+    scheduler.add("sql_chain", lambda: context.sql_chain(QNA_PROMPT_TEMPLATE))
+    scheduler.add("db_context", load_db_context)
+    scheduler.add("schema", lambda db_context: select_schema(user_query, db_context), requires=["db_context"])
+    scheduler.add("query", write_query, requires=["sql_chain", "db_context", "schema"])
+    scheduler.add("rows", lambda query: execute_query(query, DATABASE_URI), requires=["query"])
+    scheduler.add("df", build_dataframe, requires=["rows"])
+    scheduler.add("result", lambda df: digest_result(df), requires=["df"])
+    scheduler.add("answer", write_answer, requires=["llm", "query", "result"])
+    return scheduler
+
+
+def _finish(scheduler, results, **timings):
+    """Attach the stage timings (and any extra `timings`) to the DataFrame; return the answer and DataFrame."""
+    result_data, df = results["answer"], results["df"]
+    logger.info(f"Generated answer: {result_data}")
+    report = {**scheduler.report(), **timings}
+    df.attrs["stages"] = report
+    logger.info(f"QnA stages took {report['wall_seconds']:.2f}s: {report['stages']}")
+    return result_data, df
+
+
+def run_qna_pipeline(user_query, context=None):
     """
     Run the Question and Answer (QNA) pipeline.
 
+    The SQL is generated once, executed once and the answer is generated from a
+    `digest_result` of that single result set, so large results stay within the
+    prompt budget. Independent stages run concurrently on a StageScheduler; their
+    timing breakdown is stored in `df.attrs["stages"]`.
+
     Args:
         user_query (str): The user's question.
+        context (PipelineContext, optional): Shared clients to use. Defaults to the
+            process-wide context.
 
     Returns:
         tuple: A tuple containing the answer and the corresponding DataFrame.
@@ -34,45 +113,90 @@ def run_qna_pipeline(user_query):
         QNAError: If an error occurs during the QNA pipeline execution.
     """
     try:
-        # Setup database connection
-        db = setup_database_connection()
-
-        # Create SQL query chain
-        execute_query = QuerySQLDataBaseTool(db=db)
-        write_query = create_sql_chain(db, QNA_PROMPT_TEMPLATE)
-
-        # # Generate database context
-        db_context = db.get_context()
-        #
-        # # Save the context to a text file
-        # with open('db_context.txt', 'w') as file:
-        #     file.write(str(db_context))
-
-        # with open('db_context.txt', 'r') as file:
-        #     db_context = file.read()
-        # Generate SQL query
-        query = write_query.invoke({"question": user_query, "top_k": 3, "table_info": db_context})
-
-        # Define answer generation chain
-        answer = answer_prompt | initialize_llm() | StrOutputParser()
-        chain = create_qna_chain(write_query, execute_sql_query_for_ans, answer)
-
-        # Run the chain and get the answer
-        result_data = chain.invoke({"question": user_query})
-        logger.info(f"Generated answer: {result_data}")
-
-        # Clean and execute the SQL query
-        cleaned_query = clean_sql_query(query) if isinstance(query, str) else query.get('cleaned_query')
-        logger.info(f"Cleaned SQL query: {cleaned_query}")
+        scheduler = _qna_scheduler(user_query, context or get_pipeline_context())
+        return _finish(scheduler, scheduler.run())
 
-        data, column_names = execute_sql_query_for_data(cleaned_query)
+    except Exception as e:
+        logger.error(f"Error in QNA pipeline: {str(e)}", exc_info=True)
+        raise QNAError(f"An error occurred during the QNA pipeline execution: {str(e)}") from e
 
-        # Create DataFrame from the SQL results
-        df = create_dataframe(data, column_names)
-        logger.info(f"DataFrame created with shape: {df.shape}")
 
-        return result_data, df
+def stream_qna_pipeline(user_query, context=None):
+    """
+    Run the QNA pipeline, yielding its progress and the answer as it is generated.
+
+    The stages run as in `run_qna_pipeline` on a background thread, while this
+    generator yields event dicts, each with an `event` key:
+
+    - `sql`: the generated SQL (`query`)
+    - `rows`: the result was fetched (`rows`, `columns`)
+    - `token`: the next chunk of the answer (`text`)
+    - `answer`: last event, the full `answer` and its DataFrame (`df`)
+
+    The time from the start to the first answer chunk is stored as
+    `first_token_seconds` in `df.attrs["stages"]`. When the consumer stops
+    reading (closes the generator, e.g. a client disconnects), stages that have
+    not started are skipped and the answer stops being generated.
+
+    Args:
+        user_query (str): The user's question.
+        context (PipelineContext, optional): Shared clients to use. Defaults to the
+            process-wide context.
+
+    Yields:
+        dict: The pipeline events, in order.
+
+    Raises:
+        QNAError: If an error occurs during the QNA pipeline execution.
+    """
+    try:
+        events, outcome, cancelled = queue.Queue(), {}, threading.Event()
+
+        def check_cancelled():
+            if cancelled.is_set():
+                raise QNACancelled("The consumer stopped reading the QnA stream.")
+
+        def on_token(chunk):
+            # Raising here stops the answer's LLM stream
+            check_cancelled()
+            events.put({"event": "token", "text": chunk})
+
+        def on_result(name, result):
+            # Raising here skips the stages that have not started
+            check_cancelled()
+            if name == "query":
+                events.put({"event": "sql", "query": result})
+            elif name == "df":
+                events.put({"event": "rows", "rows": len(result), "columns": [str(column) for column in result.columns]})
+
+        def run():
+            try:
+                outcome["results"] = scheduler.run(on_result=on_result)
+            except QNACancelled:
+                logger.info(f"Stopped the QnA pipeline for '{user_query}', its stream was closed.")
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                events.put(None)
+
+        scheduler = _qna_scheduler(user_query, context or get_pipeline_context(), on_token=on_token)
+        start = time.perf_counter()
+        first_token_seconds = None
+        # The stages run in this context so their spans join the caller's trace
+        threading.Thread(target=contextvars.copy_context().run, args=(run,), name="qna-stream", daemon=True).start()
+        try:
+            for event in iter(events.get, None):
+                if event["event"] == "token" and first_token_seconds is None:
+                    first_token_seconds = round(time.perf_counter() - start, 4)
+                yield event
+        finally:
+            # Also reached through GeneratorExit when the consumer closes the generator early
+            cancelled.set()
+        if "error" in outcome:
+            raise outcome["error"]
+        answer, df = _finish(scheduler, outcome["results"], first_token_seconds=first_token_seconds)
+        yield {"event": "answer", "answer": answer, "df": df}
 
     except Exception as e:
         logger.error(f"Error in QNA pipeline: {str(e)}", exc_info=True)
-        raise QNAError(f"An error occurred during the QNA pipeline execution: {str(e)}") from e
\ No newline at end of file
+        raise QNAError(f"An error occurred during the QNA pipeline execution: {str(e)}") from e
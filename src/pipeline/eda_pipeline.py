@@ -1,14 +1,21 @@
+import dataclasses
 import logging
-from src.utils.constants import TEXT_GEN_CONFIG, EDA_PROMPT_TEMPLATE
+from src.utils.constants import TEXT_GEN_CONFIG, EDA_PROMPT_TEMPLATE, POSTGRESQL_DATABASE_URI
+from src.utils.context import get_pipeline_context
+from src.utils.downsample import reduce_for_chart, annotate_summary
+from src.utils.edit_cache import edit_key, get_edit_cache
+from src.utils.executor import get_query_executor
+from src.utils.schema_cache import get_schema_cache
+from src.utils.schema_selector import select_schema
+from src.utils.sql_cache import cached_sql_chain
+from src.utils.stages import StageScheduler
+from src.utils.summary_cache import cached_summarize
 from src.utils.helpers import (
-    initialize_lida_manager,
-    postgresql_database_connection,
-    create_sql_chain,
-    execute_sql_query,
-    create_dataframe,
+    fetch_dataframe,
     generate_visualization,
-    display_visualization,
-    clean_sql_query
+    render_charts,
+    clean_sql_query,
+    widen_dtypes
 )
 
 logger = logging.getLogger(__name__)
@@ -17,66 +24,106 @@ class EDAError(Exception):
     """Custom exception for EDA pipeline errors."""
     pass
 
-def run_eda_pipeline(user_query):
+def run_eda_pipeline(user_query, context=None, progress_callback=None):
     """
     Run the Exploratory Data Analysis (EDA) pipeline.
 
+    Independent stages run concurrently on a StageScheduler; their timing
+    breakdown is stored in `df.attrs["stages"]`. Large results are reduced for
+    the kind of chart asked for before LIDA summarizes and plots them; the
+    returned DataFrame is the full result.
+
     Args:
         user_query (str): The user's query for EDA.
+        context (PipelineContext, optional): Shared clients to use. Defaults to the
+            process-wide context.
+        progress_callback (callable, optional): Called as `callback(rows, bytes)`
+            from the fetch stage's thread while the query result is streamed.
 
     Returns:
-        tuple: A tuple containing DataFrame, figure, chart, summary, and LIDA instance.
+        tuple: A tuple containing DataFrame, chart image (PNG bytes), chart, summary, and LIDA instance.
 
     Raises:
         EDAError: If an error occurs during the EDA pipeline execution.
     """
     try:
-        # Initialize LIDA manager
-        lida, _ = initialize_lida_manager()
-
-        # Setup database connection
-        db = postgresql_database_connection()
-
-        # Create SQL query chain
-        chain = create_sql_chain(db, EDA_PROMPT_TEMPLATE)
-
-        # Generate database context
-        db_context = db.get_context()
-
-        # Generate and execute SQL query
-        query = chain.invoke({"question": user_query, "top_k": 3, "table_info": db_context})
-        cleaned_query = clean_sql_query(query)
-        logger.info(f"Cleaned SQL query: {cleaned_query}")
-
-        data, column_names = execute_sql_query(cleaned_query)
-
-        # Create DataFrame
-        df = create_dataframe(data, column_names)
-        logger.info(f"DataFrame created with shape: {df.shape}")
-
-        # Generate visualization
-        summary = lida.summarize(df, summary_method="default", textgen_config=TEXT_GEN_CONFIG)
-        charts = generate_visualization(lida, summary, user_query)
-
-        # Get the figure from display_visualization
-        fig = display_visualization(charts[0])
-
-        return df, fig, charts[0], summary, lida
+        context = context or get_pipeline_context()
+
+        def load_db_context():
+            # Cached database context, rebuilt only when the schema changes
+            engine = get_query_executor(POSTGRESQL_DATABASE_URI).engine
+            return {"engine": engine, **get_schema_cache().get_context(engine)}
+
+        def write_query(sql_chain, db_context, schema):
+            # Shared SQL query chain, answered from the SQL cache for repeated questions
+            chain = cached_sql_chain(sql_chain, EDA_PROMPT_TEMPLATE, db_context["fingerprint"],
+                                     scope=str(db_context["engine"].url))
+            query = chain.invoke({"question": user_query, "top_k": 3, "table_info": schema["table_info"]})
+            cleaned_query = clean_sql_query(query)
+            logger.info(f"Cleaned SQL query: {cleaned_query}")
+            return cleaned_query
+
+        def fetch(query):
+            # Stream the (potentially very large) raw result into a capped DataFrame
+            df = fetch_dataframe(query, POSTGRESQL_DATABASE_URI, progress_callback=progress_callback)
+            logger.info(f"DataFrame created with shape: {df.shape}")
+            return df
+
+        def summarize(lida, plot_data):
+            # LIDA profiles and plots a copy with 64-bit numeric columns; the summary is reused for
+            # identical data and computed from a sample of large frames
+            summary = cached_summarize(lida, widen_dtypes(plot_data), summary_method="default",
+                                       textgen_config=TEXT_GEN_CONFIG)
+            return annotate_summary(summary, plot_data.attrs["reduction"])
+
+        # The LIDA manager and the SQL chain's LLM are built while the schema context loads;
+        # the rest follows the data: query, fetch, reduction for plotting, summary, charts, image
+        scheduler = StageScheduler(name="eda")
+        scheduler.add("lida", context.lida)
+        scheduler.add("sql_chain", lambda: context.sql_chain(EDA_PROMPT_TEMPLATE))
+        scheduler.add("db_context", load_db_context)
+        scheduler.add("schema", lambda db_context: select_schema(user_query, db_context), requires=["db_context"])
+        scheduler.add("query", write_query, requires=["sql_chain", "db_context", "schema"])
+        scheduler.add("df", fetch, requires=["query"])
+        scheduler.add("plot_data", lambda df: reduce_for_chart(df, user_query), requires=["df"])
+        scheduler.add("summary", summarize, requires=["lida", "plot_data"])
+        scheduler.add("charts", lambda lida, summary: generate_visualization(lida, summary, user_query),
+                      requires=["lida", "summary"])
+        # First candidate that rendered, if any did
+        scheduler.add("chart", lambda charts: next((candidate for candidate in charts if candidate.status), charts[0]),
+                      requires=["charts"])
+        scheduler.add("image", lambda chart: render_charts(chart), requires=["chart"])
+        results = scheduler.run()
+        df, image, chart, summary, lida = (results["df"], results["image"], results["chart"], results["summary"],
+                                           results["lida"])
+
+        timings = scheduler.report()
+        df.attrs["stages"] = timings
+        logger.info(f"EDA stages took {timings['wall_seconds']:.2f}s "
+                    f"({timings['stage_seconds']:.2f}s of stage time): {timings['stages']}")
+
+        return df, image, chart, summary, lida
 
     except Exception as e:
         logger.error(f"Error in EDA pipeline: {str(e)}", exc_info=True)
         raise EDAError(f"An error occurred during the EDA pipeline execution: {str(e)}") from e
 
-def edit_chart(lida, code, summary, instructions, library="seaborn"):
+def edit_chart(lida, code, summary, instructions, library="seaborn", use_cache=True):
     """
     Edit a chart based on given instructions.
 
+    Edits are cached by (code, instructions, library). When a prefix of the
+    instructions was already applied to `code`, only the rest are sent to the
+    LLM, on top of that edit's code. The edited code is always executed against
+    the current data.
+
     Args:
         lida: LIDA instance
         code (str): Original chart code
         summary (dict): Summary of the data
         instructions (list): List of editing instructions
         library (str): Visualization library to use
+        use_cache (bool): Whether to reuse and store edits
 
     Returns:
         object: Edited chart
@@ -85,9 +132,35 @@ def edit_chart(lida, code, summary, instructions, library="seaborn"):
         EDAError: If an error occurs during chart editing.
     """
     try:
-        textgen_config = TEXT_GEN_CONFIG._replace(n=1, temperature=0, use_cache=True)
-        edited_charts = lida.edit(code=code, summary=summary, instructions=instructions, library=library, textgen_config=textgen_config)
-        return edited_charts[0]
+        instructions = [instructions] if isinstance(instructions, str) else list(instructions)
+        cache = get_edit_cache()
+        edited, applied = code, 0
+        if use_cache:
+            cached = cache.get(edit_key(code, instructions, library))
+            if cached is not None:
+                edited, applied = cached, len(instructions)
+            else:
+                # Longest prefix of the instructions already applied to this code
+                for count in range(len(instructions) - 1, 0, -1):
+                    cached = cache.peek(edit_key(code, instructions[:count], library))
+                    if cached is not None:
+                        edited, applied = cached, count
+                        break
+        remaining = instructions[applied:]
+        if remaining:
+            logger.info(f"Editing chart with {len(remaining)} new of {len(instructions)} instructions.")
+            textgen_config = dataclasses.replace(TEXT_GEN_CONFIG, n=1, temperature=0, use_cache=True)
+            lida.check_textgen(config=textgen_config)
+            edited = lida.vizeditor.generate(code=edited, summary=summary, instructions=remaining,
+                                             textgen_config=textgen_config, text_gen=lida.text_gen, library=library)[0]
+        chart = lida.execute(code_specs=[edited], data=lida.data, summary=summary, library=library,
+                             return_error=True)[0]
+        if not chart.status:
+            raise EDAError(f"The edited chart failed to render: {(chart.error or {}).get('message')}")
+        if use_cache and remaining:
+            # Only edits that render are kept
+            cache.put(edit_key(code, instructions, library), edited)
+        return chart
     except Exception as e:
         logger.error(f"Error editing chart: {str(e)}", exc_info=True)
-        raise EDAError(f"An error occurred while editing the chart: {str(e)}") from e
\ No newline at end of file
+        raise EDAError(f"An error occurred while editing the chart: {str(e)}") from e
@@ -1,16 +1,152 @@
 from dotenv import load_dotenv
 import os
-from langchain_core.prompts import FewShotPromptTemplate, PromptTemplate
-from lida import TextGenerationConfig
+import threading
 load_dotenv()
 
 # Environment variables
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+DATABASE_URI = os.getenv("DATABASE_URI")
+POSTGRESQL_DATABASE_URI = os.getenv("POSTGRESQL_DATABASE_URI")
+
+# Connection pool configuration shared by the pipelines and the Flask API
+DB_POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "statement_timeout": float(os.getenv("DB_STATEMENT_TIMEOUT", "60")),
+}
+
+# Schema context cache configuration
+SCHEMA_CACHE_CONFIG = {
+    "ttl": float(os.getenv("SCHEMA_CACHE_TTL", "300")),
+    "cache_dir": os.getenv("SCHEMA_CACHE_DIR"),
+    "sample_rows_in_table_info": 3,
+}
+
+# Schema selection: tables kept per question and the table_info token budget
+SCHEMA_SELECTION_CONFIG = {
+    "top_k": int(os.getenv("SCHEMA_SELECTION_TOP_K", "8")),
+    "token_budget": int(os.getenv("SCHEMA_SELECTION_TOKEN_BUDGET", "4000")),
+}
+
+# Generated SQL cache: in-memory LRU plus an optional persistent SQLite tier
+SQL_CACHE_CONFIG = {
+    "max_memory_entries": int(os.getenv("SQL_CACHE_MEMORY_ENTRIES", "512")),
+    "path": os.getenv("SQL_CACHE_PATH"),
+    "max_disk_entries": int(os.getenv("SQL_CACHE_DISK_ENTRIES", "10000")),
+}
+
+# Streaming fetch for large EDA results: batch size, hard caps, sampling fallback and PostgreSQL COPY
+STREAM_CONFIG = {
+    "batch_size": int(os.getenv("STREAM_BATCH_SIZE", "10000")),
+    "max_rows": int(os.getenv("STREAM_MAX_ROWS", "1000000")),
+    "max_bytes": int(os.getenv("STREAM_MAX_BYTES", str(512 * 1024 * 1024))),
+    "sample": os.getenv("STREAM_SAMPLE", "false").lower() == "true",
+    "copy": os.getenv("STREAM_COPY", "true").lower() == "true",
+    "copy_spool_bytes": int(os.getenv("STREAM_COPY_SPOOL_BYTES", str(64 * 1024 * 1024))),
+}
+
+# Executed query result cache, bounded by total compressed bytes
+RESULT_CACHE_CONFIG = {
+    "max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    "ttl": float(os.getenv("RESULT_CACHE_TTL", "300")),
+    "max_entry_bytes": int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(64 * 1024 * 1024))),
+}
+
+# Query result digest passed to the answer prompt instead of the raw rows when they do not fit
+RESULT_DIGEST_CONFIG = {
+    "token_budget": int(os.getenv("RESULT_DIGEST_TOKEN_BUDGET", "2000")),
+    "top_k": int(os.getenv("RESULT_DIGEST_TOP_K", "20")),
+    "max_groups": int(os.getenv("RESULT_DIGEST_MAX_GROUPS", "10")),
+}
+
+# Chunked CSV ingestion into existing tables; method is "auto", "copy" (PostgreSQL) or "insert"
+INGEST_CONFIG = {
+    "chunk_size": int(os.getenv("INGEST_CHUNK_SIZE", "50000")),
+    "method": os.getenv("INGEST_METHOD", "auto"),
+}
+
+# CSV profiling for /api/describe_table; fast mode samples files larger than sample_bytes
+CSV_PROFILE_CONFIG = {
+    "chunk_bytes": int(os.getenv("CSV_PROFILE_CHUNK_BYTES", str(16 * 1024 * 1024))),
+    "sample_bytes": int(os.getenv("CSV_PROFILE_SAMPLE_BYTES", str(16 * 1024 * 1024))),
+    "sample_blocks": int(os.getenv("CSV_PROFILE_SAMPLE_BLOCKS", "64")),
+}
+
+# Content-addressed staging of uploaded CSV files between describe, create and upload
+STAGING_CONFIG = {
+    "dir": os.getenv("STAGING_DIR", ""),
+    "max_bytes": int(os.getenv("STAGING_MAX_BYTES", str(2 * 1024 ** 3))),
+    "ttl": int(os.getenv("STAGING_TTL", str(24 * 3600))),
+}
+
+# Background worker pool for QnA and EDA jobs submitted through /api/jobs
+JOB_CONFIG = {
+    "max_workers": int(os.getenv("JOB_MAX_WORKERS", "4")),
+    "max_jobs_per_user": int(os.getenv("JOB_MAX_PER_USER", "2")),
+    "max_queue": int(os.getenv("JOB_MAX_QUEUE", "64")),
+    "result_ttl": int(os.getenv("JOB_RESULT_TTL", "3600")),
+}
+
+# Threads running independent pipeline stages concurrently
+STAGE_CONFIG = {
+    "max_workers": int(os.getenv("STAGE_MAX_WORKERS", "4")),
+}
+
+# Rendered chart images (PNG bytes) kept for Streamlit reruns
+RENDER_CACHE_CONFIG = {
+    "max_entries": int(os.getenv("RENDER_CACHE_MAX_ENTRIES", "32")),
+    "max_bytes": int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+}
+
+# LIDA data summaries cached by DataFrame fingerprint; larger frames are summarized from a sample
+SUMMARY_CACHE_CONFIG = {
+    "dir": os.getenv("SUMMARY_CACHE_DIR", ""),
+    "max_entries": int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "64")),
+    "max_disk_entries": int(os.getenv("SUMMARY_CACHE_MAX_DISK_ENTRIES", "1024")),
+    "sample_rows": int(os.getenv("SUMMARY_SAMPLE_ROWS", "100000")),
+    "fingerprint_rows": int(os.getenv("SUMMARY_FINGERPRINT_ROWS", "100000")),
+}
+
+# Chart-aware reduction of large results before LIDA plots them; max_points 0 disables it
+DOWNSAMPLE_CONFIG = {
+    "max_points": int(os.getenv("DOWNSAMPLE_MAX_POINTS", "50000")),
+    "bins": int(os.getenv("DOWNSAMPLE_BINS", "200")),
+    "max_groups": int(os.getenv("DOWNSAMPLE_MAX_GROUPS", "20")),
+}
+
+# Cache of LLM chart edits
+EDIT_CACHE_CONFIG = {
+    "max_entries": int(os.getenv("EDIT_CACHE_MAX_ENTRIES", "256")),
+}
+
+# Metrics (exported on /metrics) and per-request traces, written as JSON to trace_dir when it is set
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    "trace_dir": os.getenv("METRICS_TRACE_DIR"),
+    "trace_max_files": int(os.getenv("METRICS_TRACE_MAX_FILES", "1000")),
+}
+
+# Few-shot SQL examples: an optional JSON (lines) file of vetted question/SQL pairs, and examples per prompt
+EXAMPLE_STORE_CONFIG = {
+    "path": os.getenv("EXAMPLE_STORE_PATH"),
+    "k": int(os.getenv("EXAMPLE_SELECTION_K", "5")),
+}
+
+# DataFrame construction: integer downcasting and when text columns become categoricals
+DATAFRAME_CONFIG = {
+    "downcast_integers": os.getenv("DATAFRAME_DOWNCAST_INTEGERS", "true").lower() == "true",
+    "category_max_ratio": float(os.getenv("DATAFRAME_CATEGORY_MAX_RATIO", "0.5")),
+    "category_min_rows": int(os.getenv("DATAFRAME_CATEGORY_MIN_ROWS", "100")),
+}
 
 
 # Text generation configuration
-TEXT_GEN_CONFIG = TextGenerationConfig(n=1,model="text-bison@001")
+def _text_gen_config():
+    from lida import TextGenerationConfig
+    return TextGenerationConfig(n=1,model="text-bison@001")
 
 # Visualization configuration
 VIZ_CONFIG = {
@@ -42,28 +178,64 @@ POSTGRESQL_EXAMPLES = [
 ]
 
 # Prompt template
-EXAMPLE_PROMPT = PromptTemplate.from_template("User input: {input}\nSQL query: {query}")
-
-EDA_PROMPT_TEMPLATE = FewShotPromptTemplate(
-    examples=POSTGRESQL_EXAMPLES,
-    example_prompt=EXAMPLE_PROMPT,
-    prefix="You are a PostgreSQL expert. Given an user input query, create a syntactically correct PostgreSQL query to run and retrieve all relevant raw data from the database which is required for the user query without performing aggregation like ""Count"" and ""GROUP BY"", return all the rows and columns(including date, month or year if it is required for the user query) required for the user query. Rather than only {top_k} rows return all the rows of the relevant data for the user query. \n\nHere is the relevant database info: {table_info}\n\nBelow are a number of examples of questions and their corresponding SQL queries.",
-    suffix="User input: {input}\nSQL query: ",
-    input_variables=["input", "top_k", "table_info"],
-)
-
-QNA_PROMPT_TEMPLATE = FewShotPromptTemplate(
-    examples=POSTGRESQL_EXAMPLES,
-    example_prompt=EXAMPLE_PROMPT,
-    prefix="You are a PostgreSQL expert. Given an user input query, create a syntactically correct PostgreSQL query to run and retrieve all relevant raw data from the database which is required for the user query. Rather than only {top_k} rows return all the rows of the relevant data for the user query. \n\nHere is the relevant table info: {table_info}\n\nBelow are a number of examples of questions and their corresponding PostgreSQL queries.",
-    suffix="User input: {input}\nSQL query: ",
-    input_variables=["input", "top_k", "table_info"],
-)
-answer_prompt = PromptTemplate.from_template(
-    """Given the following user question, corresponding SQL query, and SQL result, answer the user question.
+def _example_prompt():
+    from langchain_core.prompts import PromptTemplate
+    return PromptTemplate.from_template("User input: {input}\nSQL query: {query}")
+
+
+# The few-shot examples of each prompt are the ones in the example store most similar to the question
+def _eda_prompt_template():
+    from langchain_core.prompts import FewShotPromptTemplate
+    from src.utils.example_store import StoreExampleSelector, get_example_store
+    return FewShotPromptTemplate(
+        example_selector=StoreExampleSelector(get_example_store()),
+        example_prompt=__getattr__("EXAMPLE_PROMPT"),
+        prefix="You are a PostgreSQL expert. Given an user input query, create a syntactically correct PostgreSQL query to run and retrieve all relevant raw data from the database which is required for the user query without performing aggregation like ""Count"" and ""GROUP BY"", return all the rows and columns(including date, month or year if it is required for the user query) required for the user query. Rather than only {top_k} rows return all the rows of the relevant data for the user query. \n\nHere is the relevant database info: {table_info}\n\nBelow are a number of examples of questions and their corresponding SQL queries.",
+        suffix="User input: {input}\nSQL query: ",
+        input_variables=["input", "top_k", "table_info"],
+    )
+
+
+def _qna_prompt_template():
+    from langchain_core.prompts import FewShotPromptTemplate
+    from src.utils.example_store import StoreExampleSelector, get_example_store
+    return FewShotPromptTemplate(
+        example_selector=StoreExampleSelector(get_example_store()),
+        example_prompt=__getattr__("EXAMPLE_PROMPT"),
+        prefix="You are a PostgreSQL expert. Given an user input query, create a syntactically correct PostgreSQL query to run and retrieve all relevant raw data from the database which is required for the user query. Rather than only {top_k} rows return all the rows of the relevant data for the user query. \n\nHere is the relevant table info: {table_info}\n\nBelow are a number of examples of questions and their corresponding PostgreSQL queries.",
+        suffix="User input: {input}\nSQL query: ",
+        input_variables=["input", "top_k", "table_info"],
+    )
+
+
+def _answer_prompt():
+    from langchain_core.prompts import PromptTemplate
+    return PromptTemplate.from_template(
+        """Given the following user question, corresponding SQL query, and SQL result, answer the user question.
 
 Question: {question}
 SQL Query: {query}
 SQL Result: {result}
 Answer: """
-)
\ No newline at end of file
+    )
+
+
+# LIDA and LangChain objects are built on first access, so importing this module loads neither
+_LAZY = {
+    "TEXT_GEN_CONFIG": _text_gen_config,
+    "EXAMPLE_PROMPT": _example_prompt,
+    "EDA_PROMPT_TEMPLATE": _eda_prompt_template,
+    "QNA_PROMPT_TEMPLATE": _qna_prompt_template,
+    "answer_prompt": _answer_prompt,
+}
+_lazy_lock = threading.RLock()
+
+
+def __getattr__(name):
+    """Build a lazy constant once and keep it as a module global (one object per process)."""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = _LAZY[name]()
+    return globals()[name]
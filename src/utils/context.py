@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from src.utils.helpers import (
+    initialize_llm,
+    initialize_text_generator,
+    initialize_lida_manager,
+    create_sql_chain
+)
+from src.utils.metrics import instrument_llm, instrument_text_generator
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineContext:
+    """
+    Process-wide holder for the clients the pipelines share between requests.
+
+    The LLM, the SQL generation chains and the LIDA text generator are built on
+    first use and reused afterwards, so only the first request pays for client
+    construction. Database connections are pooled by `get_query_executor` and
+    schema context is served by `get_schema_cache`. Each resource has its own
+    lock, which lets a slow build (e.g. the LLM) proceed without blocking access
+    to the others.
+
+    The LLM and the text generator are instrumented for metrics (calls, latency
+    and tokens) when built.
+
+    Args:
+        builders (dict, optional): Overrides for the default resource builders,
+            keyed by resource name ("llm", "text_gen").
+    """
+
+    def __init__(self, builders=None):
+        self._builders = {
+            "llm": initialize_llm,
+            "text_gen": initialize_text_generator,
+        }
+        self._builders.update(builders or {})
+        self._instrument = {"llm": instrument_llm, "text_gen": instrument_text_generator}
+        self._resources = {}
+        self._locks = {}
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def _resource_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _record(self, name, elapsed, cold):
+        with self._lock:
+            timing = self._timings.setdefault(name, {
+                "cold_seconds": None, "warm_seconds": None, "builds": 0, "hits": 0
+            })
+            if cold:
+                timing["cold_seconds"] = elapsed
+                timing["builds"] += 1
+            else:
+                timing["warm_seconds"] = elapsed
+                timing["hits"] += 1
+
+    def get(self, name, builder=None):
+        """
+        Return the named resource, building it on first use.
+
+        Args:
+            name (str): Resource name.
+            builder (callable, optional): Builder used when the resource has no
+                registered default.
+
+        Returns:
+            object: The shared resource.
+        """
+        start = time.perf_counter()
+        # One lookup, so a concurrent reset between a membership test and the read cannot raise KeyError
+        resource = self._resources.get(name)
+        if resource is not None:
+            self._record(name, time.perf_counter() - start, cold=False)
+            return resource
+
+        with self._resource_lock(name):
+            resource = self._resources.get(name)
+            if resource is not None:
+                self._record(name, time.perf_counter() - start, cold=False)
+                return resource
+
+            builder = builder or self._builders[name]
+            logger.info(f"Building shared resource '{name}'...")
+            resource = builder()
+            if name in self._instrument:
+                resource = self._instrument[name](resource)
+            self._resources[name] = resource
+            elapsed = time.perf_counter() - start
+            self._record(name, elapsed, cold=True)
+            logger.info(f"Shared resource '{name}' built in {elapsed:.3f}s.")
+            return resource
+
+    def llm(self):
+        return self.get("llm")
+
+    def lida(self):
+        """
+        Return a LIDA Manager backed by the shared text generator.
+
+        The Manager itself is cheap but keeps the last summarized DataFrame in
+        `lida.data`, so each run gets its own instance to stay thread-safe.
+        """
+        lida, _ = initialize_lida_manager(self.get("text_gen"))
+        return lida
+
+    def sql_chain(self, prompt_template):
+        """Return the SQL generation chain for a prompt template."""
+        name = f"sql_chain:{id(prompt_template)}"
+        return self.get(name, lambda: create_sql_chain(prompt_template, llm=self.llm()))
+
+    def refresh(self, name=None):
+        """
+        Drop one resource (or all of them) so the next access rebuilds it.
+
+        Chains built on top of a dropped LLM are dropped as well.
+
+        Args:
+            name (str, optional): Resource to refresh. Refreshes everything if None.
+        """
+        with self._lock:
+            if name is None:
+                dropped = list(self._resources)
+            else:
+                dropped = [key for key in self._resources
+                           if key == name or (name == "llm" and key.startswith("sql_chain:"))]
+            for key in dropped:
+                self._resources.pop(key)
+        logger.info(f"Refreshed shared resources: {dropped}")
+
+    def stats(self):
+        """
+        Report cold (build) and warm (reuse) acquisition times per resource.
+
+        Returns:
+            dict: Per-resource timing information.
+        """
+        with self._lock:
+            return {name: dict(timing) for name, timing in self._timings.items()}
+
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def get_pipeline_context():
+    """Return the process-wide pipeline context, creating it on first use."""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = PipelineContext()
+    return _context
+
+
+def set_pipeline_context(context):
+    """Replace the process-wide pipeline context (e.g. with one using fake clients)."""
+    global _context
+    with _context_lock:
+        _context = context
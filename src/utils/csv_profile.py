@@ -0,0 +1,209 @@
+import io
+import logging
+import math
+import random
+import time
+import numpy as np
+import pandas as pd
+from src.utils.constants import CSV_PROFILE_CONFIG
+from src.utils.ingest import sanitize_column_name
+
+logger = logging.getLogger(__name__)
+
+# pandas dtype names reported per profile type, as /api/describe_table did before
+PANDAS_DTYPES = {"bool": "bool", "int": "int64", "float": "float64", "datetime": "datetime64[ns]", "object": "object"}
+
+
+class ColumnProfile:
+    """Running statistics of one CSV column, merged chunk by chunk."""
+
+    def __init__(self, name):
+        self.name = name
+        self.type = None
+        self.rows = 0
+        self.nulls = 0
+        self.max_length = 0
+        self.min = None
+        self.max = None
+        self.sample_value = None
+        self.maybe_datetime = True
+
+    def _widen(self, chunk_type):
+        if self.type is None or self.type == chunk_type:
+            self.type = chunk_type
+        elif {self.type, chunk_type} == {"int", "float"}:
+            self.type = "float"
+        else:
+            # Any other disagreement between chunks (e.g. numbers and text, bools and numbers) means text
+            self.type = "object"
+
+    def update(self, series):
+        """Fold one chunk of the column (as parsed by pandas' C reader) into the profile."""
+        self.rows += len(series)
+        non_null = series.dropna()
+        self.nulls += len(series) - len(non_null)
+        if non_null.empty:
+            return
+        if self.sample_value is None:
+            self.sample_value = str(non_null.iloc[0])
+
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            self._widen("bool")
+            self.max_length = max(self.max_length, 5)
+            return
+        if pd.api.types.is_numeric_dtype(dtype):
+            low, high = non_null.min(), non_null.max()
+            self._widen("int" if pd.api.types.is_integer_dtype(dtype) else "float")
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+            # The longest text is not always the min or max (e.g. 0.125 vs 1.5)
+            self.max_length = max(self.max_length, int(non_null.astype(str).str.len().max()))
+            return
+
+        text = non_null.astype(str)
+        self.max_length = max(self.max_length, int(text.str.len().max()))
+        chunk_type = "object"
+        if self.maybe_datetime and self.type in (None, "datetime"):
+            # Only ISO 8601 timestamps count, which is what DATETIME columns accept
+            parsed = pd.to_datetime(text, format="ISO8601", errors="coerce")
+            if parsed.notna().all():
+                chunk_type = "datetime"
+            else:
+                self.maybe_datetime = False
+        self._widen(chunk_type)
+
+    def to_dict(self):
+        info = {
+            "name": sanitize_column_name(self.name),
+            "original_dtype": PANDAS_DTYPES[self.type or "float"],
+            "sample_value": str(self.sample_value),
+            "has_nulls": self.nulls > 0,
+            "null_count": self.nulls,
+            "max_length": self.max_length,
+        }
+        if self.type in ("int", "float"):
+            info["min"], info["max"] = self.min.item(), self.max.item()
+        return info
+
+
+def _profile_frames(chunks):
+    profiles = None
+    for chunk in chunks:
+        if profiles is None:
+            profiles = [ColumnProfile(name) for name in chunk.columns]
+        for position, profile in enumerate(profiles):
+            profile.update(chunk.iloc[:, position])
+    return profiles or []
+
+
+def rows_per_chunk(file, chunk_bytes):
+    """Size chunks in rows from the line length of the file's first megabyte, so wide files get short chunks."""
+    head = file.read(1024 * 1024)
+    file.seek(0)
+    lines = max(1, head.count(b"\n"))
+    return max(100, int(chunk_bytes / (len(head) / lines)))
+
+
+def _sample_blocks(file, size, sample_bytes, blocks):
+    """Read `blocks` runs of whole lines at random offsets, after the header."""
+    file.seek(0)
+    header = file.readline()
+    block_size = max(1, sample_bytes // blocks)
+    rng = random.Random(0)
+    offsets = sorted(rng.randrange(len(header), max(len(header) + 1, size - block_size)) for _ in range(blocks))
+    parts, line_densities = [header], []
+    for offset in offsets:
+        file.seek(offset)
+        file.readline()  # Skip the partial line the offset landed in
+        data = file.read(block_size)
+        data = data[:data.rfind(b"\n") + 1]
+        if data.count(b"\n"):
+            parts.append(data)
+            line_densities.append(data.count(b"\n") / len(data))
+    return b"".join(parts), len(header), line_densities
+
+
+def _proportion_bounds(count, n, z=1.96):
+    """Normal-approximation interval of a proportion; the rule of three when nothing was seen."""
+    if n == 0:
+        return [0.0, 1.0]
+    p = count / n
+    if count == 0:
+        return [0.0, min(1.0, 3 / n)]
+    margin = z * math.sqrt(p * (1 - p) / n)
+    return [max(0.0, p - margin), min(1.0, p + margin)]
+
+
+def profile_csv(file, chunk_size=None, fast=False, sample_bytes=None):
+    """
+    Profile a CSV file in one bounded-memory pass.
+
+    The file is parsed in chunks of about CSV_PROFILE_CONFIG["chunk_bytes"] by
+    pandas' C reader and each column's type, null count, maximum text length,
+    numeric range and ISO 8601 datetime detection are merged chunk by chunk, so
+    memory is bounded by one chunk regardless of file size.
+
+    With `fast`, files larger than `sample_bytes` are profiled from random
+    blocks of lines instead. The result is then marked `exact: False`, the row
+    count is an estimate with a 95% interval, and each column carries a 95%
+    interval of its null fraction (numeric ranges and lengths are those observed
+    in the sample).
+
+    Args:
+        file: Readable, seekable binary CSV file object.
+        chunk_size (int, optional): Rows parsed per chunk. Defaults to the rows
+            in about CSV_PROFILE_CONFIG["chunk_bytes"] of the file.
+        fast (bool): Profile a sample of large files.
+        sample_bytes (int, optional): Bytes read in fast mode. Defaults to CSV_PROFILE_CONFIG.
+
+    Returns:
+        dict: `column_info`, `total_rows`, `total_columns`, `exact` and, in fast
+        mode, `total_rows_bounds`.
+    """
+    try:
+        start = time.perf_counter()
+        sample_bytes = sample_bytes or CSV_PROFILE_CONFIG["sample_bytes"]
+        size = file.seek(0, io.SEEK_END)
+        file.seek(0)
+
+        if not fast or size <= sample_bytes:
+            if chunk_size is None:
+                chunk_size = rows_per_chunk(file, CSV_PROFILE_CONFIG["chunk_bytes"])
+            profiles = _profile_frames(pd.read_csv(file, chunksize=chunk_size))
+            column_info = [profile.to_dict() for profile in profiles]
+            analysis = {
+                "column_info": column_info,
+                "total_rows": profiles[0].rows if profiles else 0,
+                "total_columns": len(profiles),
+                "exact": True,
+            }
+        else:
+            sample, header_bytes, densities = _sample_blocks(file, size, sample_bytes,
+                                                             CSV_PROFILE_CONFIG["sample_blocks"])
+            profiles = _profile_frames(pd.read_csv(io.BytesIO(sample), chunksize=chunk_size or len(sample)))
+            sampled_rows = profiles[0].rows if profiles else 0
+            # Rows per byte varies between blocks; its spread bounds the row count estimate
+            density = float(np.mean(densities)) if densities else 0.0
+            spread = float(np.std(densities, ddof=1) / math.sqrt(len(densities))) if len(densities) > 1 else 0.0
+            body = size - header_bytes
+            column_info = []
+            for profile in profiles:
+                info = profile.to_dict()
+                info["null_fraction_bounds"] = _proportion_bounds(profile.nulls, profile.rows)
+                column_info.append(info)
+            analysis = {
+                "column_info": column_info,
+                "total_rows": int(round(body * density)),
+                "total_rows_bounds": [int(body * max(0.0, density - 1.96 * spread)),
+                                      int(math.ceil(body * (density + 1.96 * spread)))],
+                "total_columns": len(profiles),
+                "exact": False,
+                "sampled_rows": sampled_rows,
+            }
+        logger.info(f"Profiled {analysis['total_columns']} columns, {analysis['total_rows']} rows "
+                    f"in {time.perf_counter() - start:.2f}s ({'exact' if analysis['exact'] else 'sampled'}).")
+        return analysis
+    except Exception as e:
+        logger.error(f"Error profiling CSV file: {e}")
+        raise
@@ -0,0 +1,222 @@
+import logging
+import re
+import time
+import numpy as np
+import pandas as pd
+from src.utils.constants import DOWNSAMPLE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Words in the question that tell what kind of chart is wanted
+HISTOGRAM_WORDS = re.compile(r"\b(histograms?|distributions?|distributed|spread|frequenc(?:y|ies))\b", re.IGNORECASE)
+TIME_WORDS = re.compile(r"\b(trends?|over time|time ?series|timeline|daily|weekly|monthly|yearly|per (?:day|week|month|year))\b",
+                        re.IGNORECASE)
+SCATTER_WORDS = re.compile(r"\b(scatter|relationship|correlat\w*|versus|vs\.?)\b", re.IGNORECASE)
+AGGREGATE_WORDS = re.compile(r"\b(total|sum|count|how many|number of)\b", re.IGNORECASE)
+
+
+def _numeric_columns(df):
+    return [position for position in range(df.shape[1])
+            if pd.api.types.is_numeric_dtype(df.dtypes.iloc[position])
+            and not pd.api.types.is_bool_dtype(df.dtypes.iloc[position])]
+
+
+def _datetime_columns(df):
+    return [position for position in range(df.shape[1]) if pd.api.types.is_datetime64_any_dtype(df.dtypes.iloc[position])]
+
+
+def _group_column(df, max_groups):
+    """Position of the first text or categorical column with 2..max_groups distinct values, or None."""
+    for position in range(df.shape[1]):
+        series = df.iloc[:, position]
+        if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+            if 1 < series.nunique() <= max_groups:
+                return position
+    return None
+
+
+def _group_positions(codes):
+    """Row positions of each group of factorized codes (code -1, i.e. nulls, is its own group)."""
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    return np.split(order, boundaries)
+
+
+def choose_mode(df, goal="", max_groups=None):
+    """
+    Pick a reduction for the chart a question asks for, from its wording and the data's shape.
+
+    Returns:
+        str: "histogram", "lttb", "stratified", "uniform" or "none". Totals and
+        counts are left unreduced ("none"), since a sample would scale them down.
+    """
+    max_groups = max_groups or DOWNSAMPLE_CONFIG["max_groups"]
+    numeric, datetimes = _numeric_columns(df), _datetime_columns(df)
+    goal = goal or ""
+    if AGGREGATE_WORDS.search(goal):
+        return "none"
+    if HISTOGRAM_WORDS.search(goal) and numeric:
+        return "histogram"
+    if datetimes and numeric and (TIME_WORDS.search(goal) or not SCATTER_WORDS.search(goal)):
+        return "lttb"
+    if len(numeric) >= 2 or (numeric and SCATTER_WORDS.search(goal)):
+        return "stratified" if _group_column(df, max_groups) is not None else "uniform"
+    if len(numeric) == 1 and df.shape[1] == 1:
+        return "histogram"
+    return "none"
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: positions of `threshold` points of the series
+    (x sorted ascending) that keep its visual shape, including the first and last.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def _lttb(df, max_points, max_groups):
+    x_position = _datetime_columns(df)[0]
+    y_positions = _numeric_columns(df)
+    x = df.iloc[:, x_position]
+    valid = np.flatnonzero(x.notna().to_numpy())
+    group = _group_column(df, max_groups)
+    codes = pd.factorize(df.iloc[valid, group])[0] if group is not None else np.zeros(len(valid), dtype=np.int64)
+    groups = _group_positions(codes)
+    threshold = max(3, max_points // (len(groups) * max(1, len(y_positions))))
+    x_values = x.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    keep = []
+    for members in groups:
+        rows = valid[members]
+        rows = rows[np.argsort(x_values[rows], kind="stable")]
+        for y_position in y_positions:
+            y = df.iloc[rows, y_position].to_numpy(dtype=np.float64, na_value=np.nan)
+            keep.append(rows[lttb_indices(x_values[rows], y, threshold)])
+    positions = np.unique(np.concatenate(keep)) if keep else np.arange(0)
+    # Rows in time order, as a line plot expects
+    positions = positions[np.argsort(x_values[positions], kind="stable")]
+    return df.iloc[positions]
+
+
+def _stratified(df, max_points, max_groups, rng):
+    codes = pd.factorize(df.iloc[:, _group_column(df, max_groups)])[0]
+    groups = _group_positions(codes)
+    floor = max(1, max_points // (10 * len(groups)))
+    keep = []
+    for members in groups:
+        # Proportional allocation, with a floor so rare groups still appear
+        size = min(len(members), max(floor, int(max_points * len(members) / len(df))))
+        keep.append(rng.choice(members, size=size, replace=False))
+    return df.iloc[np.sort(np.concatenate(keep))]
+
+
+def _histogram(df, goal, bins, max_groups):
+    numeric = _numeric_columns(df)
+    named = [position for position in numeric if re.search(rf"\b{re.escape(str(df.columns[position]))}\b", goal or "",
+                                                            re.IGNORECASE)]
+    position = (named or numeric)[0]
+    name = df.columns[position]
+    values = df.iloc[:, position].to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = np.isfinite(values)
+    edges = np.histogram_bin_edges(values[finite], bins=bins) if finite.any() else np.array([0.0, 1.0])
+    centers = (edges[:-1] + edges[1:]) / 2
+    group = _group_column(df, max_groups)
+    frames = []
+    if group is None:
+        counts, _ = np.histogram(values[finite], bins=edges)
+        frames.append(pd.DataFrame({name: centers, "count": counts}))
+    else:
+        labels = df.iloc[:, group]
+        for label in labels.dropna().unique():
+            member = finite & (labels == label).to_numpy()
+            counts, _ = np.histogram(values[member], bins=edges)
+            frames.append(pd.DataFrame({df.columns[group]: label, name: centers, "count": counts}))
+    binned = pd.concat(frames, ignore_index=True)
+    return binned[binned["count"] > 0].reset_index(drop=True)
+
+
+def reduce_for_chart(df, goal="", max_points=None, mode=None):
+    """
+    Reduce a query result to what a chart can usefully draw, in bounded time.
+
+    - "lttb": time series are downsampled with Largest-Triangle-Three-Buckets on
+      every numeric column (per group of a low-cardinality column), which keeps
+      peaks and troughs.
+    - "stratified" / "uniform": scatter data is sampled per group of a
+      low-cardinality column in proportion to its size, or uniformly.
+    - "histogram": a numeric column is pre-binned into DOWNSAMPLE_CONFIG["bins"]
+      bins, giving one row per (group,) bin center with its row `count`.
+    - "none": the frame is returned as is.
+
+    Frames with at most `max_points` rows are never reduced. The reduction is
+    recorded in `attrs["reduction"]` of the returned frame.
+
+    Args:
+        df (DataFrame): The query result.
+        goal (str): The user's question, used to pick the mode.
+        max_points (int, optional): Rows kept at most (about, for stratified sampling). Defaults to DOWNSAMPLE_CONFIG;
+            0 disables the reduction.
+        mode (str, optional): Force a mode instead of choosing one.
+
+    Returns:
+        DataFrame: The rows to plot.
+    """
+    try:
+        start = time.perf_counter()
+        max_points = DOWNSAMPLE_CONFIG["max_points"] if max_points is None else max_points
+        max_groups = DOWNSAMPLE_CONFIG["max_groups"]
+        if not max_points or len(df) <= max_points or df.columns.has_duplicates:
+            mode = "none"
+        mode = mode or choose_mode(df, goal, max_groups)
+        rng = np.random.default_rng(0)
+        if mode == "lttb":
+            reduced = _lttb(df, max_points, max_groups)
+        elif mode == "stratified":
+            reduced = _stratified(df, max_points, max_groups, rng)
+        elif mode == "uniform":
+            reduced = df.iloc[np.sort(rng.choice(len(df), size=max_points, replace=False))]
+        elif mode == "histogram":
+            reduced = _histogram(df, goal, DOWNSAMPLE_CONFIG["bins"], max_groups)
+        else:
+            mode, reduced = "none", df
+        reduced = reduced.copy() if reduced is not df else df.copy(deep=False)
+        reduced.attrs = {**df.attrs, "reduction": {"mode": mode, "original_rows": len(df), "rows": len(reduced)}}
+        if mode != "none":
+            logger.info(f"Reduced {len(df):,} rows to {len(reduced):,} for plotting ({mode}) "
+                        f"in {time.perf_counter() - start:.2f}s.")
+        return reduced
+    except Exception as e:
+        logger.error(f"Error reducing data for plotting: {e}")
+        raise
+
+
+def annotate_summary(summary, reduction):
+    """Record the original row count and the reduction in a LIDA summary, so the chart code is written for it."""
+    summary["original_rows"] = reduction["original_rows"]
+    summary["reduction"] = reduction["mode"]
+    if reduction["mode"] == "none":
+        return summary
+    if reduction["mode"] == "histogram":
+        note = (f"The {reduction['original_rows']:,} rows are pre-binned: each row is a bin center with its number "
+                f"of rows in the `count` column, so histograms must weight by `count`.")
+    else:
+        note = (f"These {reduction['rows']:,} rows were {'downsampled with LTTB' if reduction['mode'] == 'lttb' else 'sampled'} "
+                f"from {reduction['original_rows']:,} for plotting.")
+    summary["dataset_description"] = " ".join(part for part in (summary.get("dataset_description"), note) if part)
+    return summary
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from src.utils.constants import EDIT_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def edit_key(code, instructions, library):
+    """Cache key of an edit: the hash of the code edited, the instructions in order and the library."""
+    code_hash = hashlib.sha256((code or "").encode()).hexdigest()
+    return hashlib.sha256(json.dumps([code_hash, list(instructions), library]).encode()).hexdigest()
+
+
+class EditCache:
+    """
+    LRU cache of LLM chart edits: the edited code for (code, instructions, library).
+
+    Only code is cached; it is executed against the current data on every use,
+    so a hit never shows a chart of other data.
+
+    Args:
+        max_entries (int): Edits kept.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            code = self._entries.get(key)
+            if code is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return code
+
+    def peek(self, key):
+        """Look up an edit without counting it or refreshing its recency."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, code):
+        with self._lock:
+            self._entries[key] = code
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+_edit_cache = None
+_edit_cache_lock = threading.Lock()
+
+
+def get_edit_cache():
+    """Return the process-wide edit cache, creating it on first use."""
+    global _edit_cache
+    if _edit_cache is None:
+        with _edit_cache_lock:
+            if _edit_cache is None:
+                _edit_cache = EditCache(**EDIT_CACHE_CONFIG)
+    return _edit_cache
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import threading
+from langchain_core.example_selectors import BaseExampleSelector
+from src.utils.constants import EXAMPLE_STORE_CONFIG, POSTGRESQL_EXAMPLES
+from src.utils.text_index import BM25Index, tokenize
+
+logger = logging.getLogger(__name__)
+
+# SQL words that say nothing about which tables or columns an example is about
+SQL_KEYWORDS = {
+    "select", "distinct", "join", "inner", "left", "right", "outer", "full", "using", "group", "order",
+    "limit", "offset", "having", "union", "asc", "desc", "null", "not", "like", "ilike", "between",
+    "case", "then", "else", "end", "interval", "current",
+}
+
+
+def example_id(example):
+    """Content id of a question/SQL pair, so the same pair added twice is stored once."""
+    return hashlib.sha256(f"{example['input']}\x1f{example['query']}".encode()).hexdigest()[:16]
+
+
+def _example_terms(example):
+    """Terms indexed for an example: its question (weighted) and the identifiers in its SQL."""
+    question = tokenize(example["input"])
+    return question * 2 + [term for term in tokenize(example["query"]) if term not in SQL_KEYWORDS]
+
+
+def load_examples(path):
+    """Read examples from a JSON list or a JSON lines file of {"input": ..., "query": ...} objects."""
+    with open(path) as handle:
+        text = handle.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class ExampleStore:
+    """
+    Question/SQL examples with a local BM25 index, for few-shot example selection.
+
+    Examples are indexed on their question and the table and column names of
+    their SQL, and the ones most similar to a user's question are selected; when
+    fewer match, the earliest added examples fill the remaining places. Examples
+    can be added and removed at any time. `fingerprint` changes whenever the set
+    of examples does, so SQL generated with other examples is not served from
+    the SQL cache.
+
+    Args:
+        examples (iterable, optional): Initial examples, dicts with `input` and `query`.
+        k (int): Examples selected per question.
+    """
+
+    def __init__(self, examples=(), k=5):
+        self.k = k
+        self._examples = {}
+        self._index = BM25Index()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        for example in examples:
+            self.add(example)
+
+    def __len__(self):
+        return len(self._examples)
+
+    def __contains__(self, key):
+        return key in self._examples
+
+    def add(self, example):
+        """
+        Add an example, replacing an identical one.
+
+        Args:
+            example (dict): The `input` question and its SQL `query`.
+
+        Returns:
+            str: The example's id.
+
+        Raises:
+            ValueError: If the question or the SQL is missing.
+        """
+        if not example.get("input") or not example.get("query"):
+            raise ValueError("An example needs an 'input' question and a 'query'.")
+        example = {"input": example["input"], "query": example["query"]}
+        key = example_id(example)
+        with self._lock:
+            self._examples[key] = example
+            self._index.add(key, _example_terms(example))
+            self._fingerprint = None
+        return key
+
+    def remove(self, key):
+        """Remove an example by id. Returns False if it was not stored."""
+        with self._lock:
+            if self._examples.pop(key, None) is None:
+                return False
+            self._index.remove(key)
+            self._fingerprint = None
+            return True
+
+    def select(self, question, k=None):
+        """
+        Select the examples most relevant to a question.
+
+        Args:
+            question (str): The user's question.
+            k (int, optional): Examples to select. Defaults to the store's `k`.
+
+        Returns:
+            list: Up to `k` example dicts, most similar first.
+        """
+        k = k or self.k
+        matches = self._index.search(question or "", top_k=k)
+        with self._lock:
+            selected = [self._examples[key] for key, _ in matches if key in self._examples]
+            chosen = {key for key, _ in matches}
+            # Too few matches: fill up with the earliest examples, the general ones
+            for key, example in self._examples.items():
+                if len(selected) >= k:
+                    break
+                if key not in chosen:
+                    selected.append(example)
+        return [dict(example) for example in selected]
+
+    def fingerprint(self):
+        """Hash of `k` and the set of stored examples."""
+        with self._lock:
+            if self._fingerprint is None:
+                content = f"{self.k}\x1f" + "".join(sorted(self._examples))
+                self._fingerprint = hashlib.sha256(content.encode()).hexdigest()
+            return self._fingerprint
+
+
+class StoreExampleSelector(BaseExampleSelector):
+    """
+    LangChain example selector over an ExampleStore, choosing by the prompt's `input`.
+
+    Args:
+        store (ExampleStore): The examples to select from.
+        k (int, optional): Examples per prompt. Defaults to the store's `k`.
+    """
+
+    def __init__(self, store, k=None):
+        self.store = store
+        self.k = k
+
+    def add_example(self, example):
+        return self.store.add(example)
+
+    def select_examples(self, input_variables):
+        return self.store.select(input_variables.get("input", ""), self.k)
+
+
+_example_store = None
+_example_store_lock = threading.Lock()
+
+
+def get_example_store():
+    """Return the process-wide example store: POSTGRESQL_EXAMPLES, then the configured examples file."""
+    global _example_store
+    if _example_store is None:
+        with _example_store_lock:
+            if _example_store is None:
+                examples = list(POSTGRESQL_EXAMPLES)
+                if EXAMPLE_STORE_CONFIG["path"]:
+                    examples += load_examples(EXAMPLE_STORE_CONFIG["path"])
+                _example_store = ExampleStore(examples, k=EXAMPLE_STORE_CONFIG["k"])
+                logger.info(f"Loaded {len(_example_store)} SQL examples.")
+    return _example_store
@@ -0,0 +1,369 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from src.utils.constants import DB_POOL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# cursor.description type codes mapped to the column kinds used by create_dataframe.
+# psycopg2 reports type OIDs, MySQL Connector its FieldType codes; SQLite reports none.
+TYPE_CODE_KINDS = {
+    "postgresql": {
+        16: "bool", 20: "int", 21: "int", 23: "int", 26: "int", 700: "float", 701: "float",
+        1700: "decimal", 1082: "date", 1114: "datetime", 1184: "datetime",
+        18: "text", 19: "text", 25: "text", 1042: "text", 1043: "text",
+    },
+    "mysql": {
+        0: "decimal", 246: "decimal", 1: "int", 2: "int", 3: "int", 8: "int", 9: "int", 13: "int",
+        4: "float", 5: "float", 7: "datetime", 12: "datetime", 10: "date", 14: "date",
+        15: "text", 247: "text", 248: "text", 253: "text", 254: "text",
+    },
+}
+
+
+class QueryExecutor:
+    """
+    Run SQL against one database through a shared SQLAlchemy connection pool.
+
+    One executor exists per database URI and covers PostgreSQL, MySQL and SQLite.
+    Connections are health-checked on checkout (`pool_pre_ping`), recycled after
+    `pool_recycle` seconds and every statement runs under a timeout, in a
+    read-only transaction that is rolled back afterwards: the executor runs
+    generated SQL, which must never change the database.
+
+    Args:
+        uri (str): SQLAlchemy database URI.
+        pool_size (int): Connections kept open in the pool.
+        max_overflow (int): Extra connections allowed when the pool is exhausted.
+        pool_timeout (float): Seconds to wait for a free connection.
+        pool_recycle (int): Seconds after which a connection is replaced.
+        statement_timeout (float): Default per-statement timeout in seconds.
+    """
+
+    def __init__(self, uri, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800,
+                 statement_timeout=60):
+        self.uri = uri
+        self.statement_timeout = statement_timeout
+        url = make_url(uri)
+        options = {"pool_pre_ping": True, "pool_recycle": pool_recycle}
+        if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+            options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+        self.engine = create_engine(uri, **options)
+        self.dialect = self.engine.dialect.name
+        self.max_connections = pool_size + max_overflow
+
+        self._lock = threading.Lock()
+        self._metrics = {
+            "checkouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "pool_timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "statements": 0,
+            "statement_errors": 0,
+        }
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._metrics["checkouts"] += 1
+            self._metrics["in_use"] += 1
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._metrics["in_use"])
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._metrics["in_use"] = max(0, self._metrics["in_use"] - 1)
+
+    def _begin_read_only(self, conn):
+        """Make the connection's next transaction read-only, so writes fail instead of running."""
+        if self.dialect in ("postgresql", "mysql"):
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+        elif self.dialect == "sqlite":
+            conn.exec_driver_sql("PRAGMA query_only = ON")
+
+    def _apply_statement_timeout(self, conn, timeout):
+        """Bound statement run time using the backend's own mechanism."""
+        if not timeout:
+            return
+        millis = int(timeout * 1000)
+        if self.dialect == "postgresql":
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {millis}")
+        elif self.dialect == "mysql":
+            conn.exec_driver_sql(f"SET SESSION max_execution_time = {millis}")
+        elif self.dialect == "sqlite":
+            deadline = time.monotonic() + timeout
+            conn.connection.driver_connection.set_progress_handler(
+                lambda: 1 if time.monotonic() > deadline else 0, 10000
+            )
+
+    def _reset_connection(self, conn):
+        """Roll back and undo the session settings, so the pooled connection goes back as it came."""
+        if conn.invalidated:
+            return
+        conn.rollback()
+        if self.dialect == "mysql":
+            conn.exec_driver_sql("SET SESSION max_execution_time = DEFAULT")
+        elif self.dialect == "sqlite":
+            conn.exec_driver_sql("PRAGMA query_only = OFF")
+            conn.connection.driver_connection.set_progress_handler(None, 0)
+        conn.rollback()
+
+    def column_types(self, description):
+        """
+        Map a DB-API cursor description to column kinds ("int", "float", "decimal",
+        "date", "datetime", "bool", "text", or None when the driver gives no type).
+        """
+        kinds = TYPE_CODE_KINDS.get(self.dialect, {})
+        return [kinds.get(desc[1]) if isinstance(desc[1], int) else None for desc in description or []]
+
+    @contextmanager
+    def connect(self, timeout=None):
+        """
+        Check a connection out of the pool in a read-only transaction with the
+        statement timeout applied. The transaction is rolled back on exit.
+
+        Args:
+            timeout (float, optional): Statement timeout in seconds. Defaults to
+                the executor's `statement_timeout`; 0 disables it.
+
+        Yields:
+            Connection: A pooled SQLAlchemy connection.
+        """
+        start = time.perf_counter()
+        try:
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            with self._lock:
+                self._metrics["pool_timeouts"] += 1
+            logger.error(f"Timed out waiting for a pooled connection to {self.dialect}.")
+            raise
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._metrics["total_wait_seconds"] += wait
+            self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], wait)
+
+        with conn:
+            try:
+                self._begin_read_only(conn)
+                self._apply_statement_timeout(conn, self.statement_timeout if timeout is None else timeout)
+                yield conn
+            finally:
+                self._reset_connection(conn)
+
+    def execute(self, query, timeout=None):
+        """
+        Execute a SQL query on a pooled connection.
+
+        Args:
+            query (str): SQL to execute.
+            timeout (float, optional): Statement timeout in seconds.
+
+        Returns:
+            tuple: The fetched rows (list of tuples), the column names and the
+            column kinds from `column_types`.
+
+        Raises:
+            ValueError: If the statement returns no rows; it is rolled back.
+        """
+        with self._lock:
+            self._metrics["statements"] += 1
+        try:
+            with self.connect(timeout) as conn:
+                result = conn.execution_options(no_parameters=True).exec_driver_sql(query)
+                if not result.returns_rows:
+                    raise ValueError("Only queries that return rows can be executed; the statement was rolled back.")
+                column_names = list(result.keys())
+                column_types = self.column_types(result.cursor.description)
+                data = [tuple(row) for row in result.fetchall()]
+                return data, column_names, column_types
+        except Exception:
+            with self._lock:
+                self._metrics["statement_errors"] += 1
+            raise
+
+    def stream(self, query, batch_size=10000, timeout=None):
+        """
+        Execute a query and yield its rows in batches without buffering the whole
+        result client-side.
+
+        PostgreSQL uses a named (server-side) cursor, MySQL Connector an unbuffered
+        cursor and SQLite fetches incrementally by nature. At least one batch is
+        yielded, so the column names are available even for empty results.
+
+        Args:
+            query (str): SQL to execute.
+            batch_size (int): Rows per batch.
+            timeout (float, optional): Statement timeout in seconds.
+
+        Yields:
+            tuple: The column names, a list of row tuples and the column kinds.
+        """
+        with self._lock:
+            self._metrics["statements"] += 1
+        try:
+            with self.connect(timeout) as conn:
+                if self.dialect == "mysql" and self.engine.driver == "mysqlconnector":
+                    # SQLAlchemy forces buffered cursors for MySQL Connector, so go to the driver
+                    cursor = conn.connection.driver_connection.cursor(buffered=False)
+                    cursor.execute(query)
+                    column_names = [desc[0] for desc in cursor.description]
+                    column_types = self.column_types(cursor.description)
+                    exhausted = False
+                    try:
+                        rows = cursor.fetchmany(batch_size)
+                        yield column_names, rows, column_types
+                        while rows:
+                            rows = cursor.fetchmany(batch_size)
+                            if rows:
+                                yield column_names, rows, column_types
+                        exhausted = True
+                    finally:
+                        if exhausted:
+                            cursor.close()
+                        else:
+                            # Unread rows would block the connection; discard it instead of draining
+                            conn.invalidate()
+                    return
+
+                result = conn.execution_options(
+                    stream_results=True, max_row_buffer=batch_size, no_parameters=True
+                ).exec_driver_sql(query)
+                column_names = list(result.keys())
+                column_types = self.column_types(result.cursor.description)
+                yielded = False
+                for rows in result.partitions(batch_size):
+                    yielded = True
+                    yield column_names, [tuple(row) for row in rows], column_types
+                if not yielded:
+                    yield column_names, [], column_types
+        except GeneratorExit:
+            raise
+        except Exception:
+            with self._lock:
+                self._metrics["statement_errors"] += 1
+            raise
+
+    def copy_csv(self, query, file, timeout=None, kinds=None):
+        """
+        Write a query's result to a file object with PostgreSQL's COPY ... TO STDOUT.
+
+        COPY sends the rows as one CSV stream, skipping the per-row tuple
+        construction of a cursor fetch. NULL is written as \\N so it stays distinct
+        from the empty string; no header is written.
+
+        Args:
+            query (str): A single SELECT (or WITH ... SELECT) statement.
+            file: Writable binary file object receiving the CSV.
+            timeout (float, optional): Statement timeout in seconds.
+            kinds (set, optional): Column kinds the result may have; None accepts any.
+
+        Returns:
+            tuple: The column names and the column kinds from `column_types`.
+
+        Raises:
+            NotImplementedError: If the database is not PostgreSQL through psycopg2,
+                or a column's kind is not in `kinds` (nothing is copied then).
+        """
+        if self.dialect != "postgresql" or self.engine.driver != "psycopg2":
+            raise NotImplementedError(f"COPY is not supported for {self.dialect}+{self.engine.driver}.")
+        query = query.strip().rstrip(";")
+        with self._lock:
+            self._metrics["statements"] += 1
+        try:
+            with self.connect(timeout) as conn:
+                cursor = conn.connection.driver_connection.cursor()
+                try:
+                    # A LIMIT 0 probe describes the result without reading any rows
+                    cursor.execute(f"SELECT * FROM ({query}) AS copy_source LIMIT 0")
+                    description = cursor.description
+                    if kinds is not None:
+                        other = [desc[0] for desc, kind in zip(description, self.column_types(description))
+                                 if kind not in kinds]
+                        if other:
+                            raise NotImplementedError(f"COPY does not keep the types of columns {other}.")
+                    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, NULL '\\N')", file)
+                finally:
+                    cursor.close()
+            return [desc[0] for desc in description], self.column_types(description)
+        except Exception:
+            with self._lock:
+                self._metrics["statement_errors"] += 1
+            raise
+
+    def health_check(self):
+        """
+        Run a trivial query to verify the database is reachable.
+
+        Returns:
+            dict: Whether the check passed and how long it took.
+        """
+        start = time.perf_counter()
+        try:
+            with self.connect(timeout=5) as conn:
+                conn.exec_driver_sql("SELECT 1").fetchall()
+            return {"healthy": True, "latency_seconds": time.perf_counter() - start}
+        except Exception as e:
+            logger.error(f"Health check failed for {self.dialect}: {e}")
+            return {"healthy": False, "latency_seconds": time.perf_counter() - start, "error": str(e)}
+
+    def stats(self):
+        """
+        Report pool usage and saturation.
+
+        Returns:
+            dict: Checkout counts, wait times, timeouts and current saturation.
+        """
+        with self._lock:
+            stats = dict(self._metrics)
+        stats["dialect"] = self.dialect
+        stats["max_connections"] = self.max_connections
+        stats["saturation"] = stats["in_use"] / self.max_connections if self.max_connections else 0.0
+        stats["pool_status"] = self.engine.pool.status()
+        return stats
+
+    def dispose(self):
+        """Close every pooled connection; the pool reopens connections on demand."""
+        self.engine.dispose()
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_query_executor(uri=None):
+    """
+    Return the shared executor for a database URI, creating it on first use.
+
+    Args:
+        uri (str, optional): SQLAlchemy database URI. Defaults to DATABASE_URI.
+
+    Returns:
+        QueryExecutor: The executor bound to that database.
+    """
+    uri = uri or os.getenv("DATABASE_URI")
+    if not uri:
+        raise ValueError("No database URI configured; set DATABASE_URI.")
+    executor = _executors.get(uri)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(uri)
+            if executor is None:
+                executor = QueryExecutor(uri, **DB_POOL_CONFIG)
+                _executors[uri] = executor
+                logger.info(f"Created pooled query executor for {executor.dialect}.")
+    return executor
+
+
+def get_executor_stats():
+    """Return pool statistics for every executor created in this process."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.engine.url.render_as_string(hide_password=True): executor.stats()
+            for executor in executors}
@@ -1,22 +1,14 @@
 import logging
-from lida import Manager, TextGenerationConfig, llm
-from langchain_community.utilities import SQLDatabase
-from langchain.chains import create_sql_query_chain
-from langchain_google_vertexai import ChatVertexAI
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import base64
-from datetime import datetime
-from PIL import Image
+from datetime import datetime, date
 import re
-import os
 import io
+import tempfile
 from decimal import Decimal
-import psycopg2
-from langchain_core.runnables import RunnablePassthrough
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import mysql.connector
-from mysql.connector import Error
 load_dotenv()
 
 
@@ -25,14 +17,43 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Constants
-from src.utils.constants import VIZ_CONFIG
+from src.utils.constants import VIZ_CONFIG, DATABASE_URI, POSTGRESQL_DATABASE_URI, STREAM_CONFIG, DATAFRAME_CONFIG
+from src.utils.executor import get_query_executor
+from src.utils.result_cache import get_result_cache
+from src.utils.render_cache import chart_key, get_render_cache
+from src.utils.metrics import timed, get_metrics, record_fetch, ROWS_BUCKETS
+
+# Heavy backends (LIDA, Vertex AI, LangChain, matplotlib, PIL) are imported by the functions
+# that use them, so a process only loads those of the capabilities it runs (QnA, EDA, uploads)
+
+# pandas dtypes for parsing COPY CSV output by column kind; text, dates and timestamps are read as text
+COPY_CSV_DTYPES = {"int": "Int64", "float": "float64", "decimal": "float64", "bool": "boolean"}
+# Kinds COPY's CSV output reproduces exactly; results with other columns (JSON, UUID, intervals, times,
+# arrays, ...) use the cursor, whose driver returns them as Python objects
+COPY_CSV_KINDS = set(COPY_CSV_DTYPES) | {"text", "date", "datetime"}
+
+
+# Initialize LIDA text generator
+@timed()
+def initialize_text_generator():
+    try:
+        logger.info("Initializing LIDA text generator...")
+        from lida import llm
+        text_gen = llm("palm")
+        logger.info("LIDA text generator initialized successfully.")
+        return text_gen
+    except Exception as e:
+        logger.error(f"Error initializing LIDA text generator: {e}")
+        raise
 
 
 # Initialize LIDA Manager
-def initialize_lida_manager():
+@timed()
+def initialize_lida_manager(text_gen=None):
     try:
         logger.info("Initializing LIDA Manager...")
-        text_gen = llm("palm")
+        text_gen = text_gen or initialize_text_generator()
+        from lida import Manager
         lida = Manager(text_gen=text_gen)
         logger.info("LIDA Manager initialized successfully.")
         return lida, text_gen
@@ -42,9 +63,11 @@ def initialize_lida_manager():
 
 
 # Set up database connection
+@timed()
 def setup_database_connection():
     try:
-        db = SQLDatabase.from_uri(os.getenv("DATABASE_URI"), sample_rows_in_table_info=3)
+        from langchain_community.utilities import SQLDatabase
+        db = SQLDatabase(get_query_executor(DATABASE_URI).engine, sample_rows_in_table_info=3)
         logger.info("Database connection setup successfully.")
         return db
     except Exception as e:
@@ -53,9 +76,11 @@ def setup_database_connection():
 
 
 # Set up PostgreSQL database connection
+@timed()
 def postgresql_database_connection():
     try:
-        db = SQLDatabase.from_uri(os.getenv("POSTGRESQL_DATABASE_URI"), sample_rows_in_table_info=3)
+        from langchain_community.utilities import SQLDatabase
+        db = SQLDatabase(get_query_executor(POSTGRESQL_DATABASE_URI).engine, sample_rows_in_table_info=3)
         logger.info("Connected to PostgreSQL database successfully.")
         return db
     except Exception as e:
@@ -64,11 +89,25 @@ def postgresql_database_connection():
 
 
 # Create SQL Chain
-def create_sql_chain(db, prompt_template):
+@timed()
+def create_sql_chain(prompt_template, llm=None):
+    """
+    Build the SQL generation chain. Unlike `create_sql_query_chain`, the chain uses
+    the `table_info` passed in by the caller instead of re-reading it from the
+    database on every call.
+    """
     try:
         logger.info("Creating SQL chain...")
-        llm = initialize_llm()
-        chain = create_sql_query_chain(llm, db, prompt_template)
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnablePassthrough
+        llm = llm or initialize_llm()
+        chain = (
+            RunnablePassthrough.assign(input=lambda x: x["question"] + "\nSQLQuery: ")
+            | prompt_template
+            | llm.bind(stop=["\nSQLResult:"])
+            | StrOutputParser()
+            | (lambda text: text.strip())
+        )
         logger.info("SQL chain created successfully.")
         return chain
     except Exception as e:
@@ -77,102 +116,398 @@ def create_sql_chain(db, prompt_template):
 
 
 # Execute SQL Query
-def execute_psql_query_for_ans(query):
+@timed()
+def execute_query(query, uri=None, use_cache=True):
     try:
+        executor = get_query_executor(uri)
+        scope = str(executor.engine.url)
+        if use_cache:
+            cached = get_result_cache().get(query, scope)
+            if cached is not None:
+                logger.info(f"Using cached result for SQL query: {query}")
+                return cached
         logger.info(f"Executing SQL query: {query}")
-        mydb = psycopg2.connect(database=os.getenv("DB_DATABASE"),
-                                user=os.getenv("DB_USER"),
-                                host=os.getenv("DB_HOST"),
-                                password=os.getenv("DB_PASSWORD"),
-                                port=os.getenv("DB_PORT"))
-        cursor = mydb.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-        cursor.close()
-        mydb.close()
+        result = executor.execute(query)
+        get_metrics().observe("query_rows", len(result[0]), ROWS_BUCKETS)
+        if use_cache:
+            get_result_cache().put(query, scope, result)
         logger.info("SQL query executed successfully.")
-        return data
+        return result
     except Exception as e:
         logger.error(f"Error executing SQL query: {e}")
         raise
 
-def execute_psql_query_for_data(query):
+# Stream SQL Query results into a DataFrame
+@timed()
+def fetch_dataframe(query, uri=None, max_rows=None, max_bytes=None, sample=None, batch_size=None,
+                    progress_callback=None, use_cache=True, use_copy=None):
+    """
+    Execute a query through a streaming cursor and build the DataFrame batch by
+    batch, so large results never exist as one big list of row tuples.
+
+    Once `max_rows` rows or `max_bytes` of DataFrame memory are reached the fetch
+    stops, unless `sample` is set, in which case the rest of the result is read
+    and a uniform reservoir sample of that size is kept instead. Fetch details
+    (rows scanned, bytes, whether the result was truncated or sampled, the fetch
+    method) are stored in `df.attrs["fetch"]`.
+
+    On PostgreSQL, unsampled SELECT queries go through `fetch_dataframe_copy`
+    first and fall back to the cursor if the statement cannot be wrapped in COPY
+    or returns columns of other kinds than COPY_CSV_KINDS.
+
+    Args:
+        query (str): SQL to execute.
+        uri (str, optional): Database URI. Defaults to DATABASE_URI.
+        max_rows (int, optional): Row cap. Defaults to STREAM_CONFIG.
+        max_bytes (int, optional): DataFrame memory cap. Defaults to STREAM_CONFIG.
+        sample (bool, optional): Sample instead of truncating. Defaults to STREAM_CONFIG.
+        batch_size (int, optional): Rows fetched per round-trip. Defaults to STREAM_CONFIG.
+        progress_callback (callable, optional): Called as `callback(rows, bytes)` after each batch.
+        use_cache (bool): Serve and store the DataFrame through the result cache.
+        use_copy (bool, optional): Try the COPY fast path. Defaults to STREAM_CONFIG.
+
+    Returns:
+        DataFrame: The fetched (possibly truncated or sampled) rows.
+    """
     try:
-        logger.info(f"Executing SQL query: {query}")
-        mydb = psycopg2.connect(database=os.getenv("DB_DATABASE"),
-                                user=os.getenv("DB_USER"),
-                                host=os.getenv("DB_HOST"),
-                                password=os.getenv("DB_PASSWORD"),
-                                port=os.getenv("DB_PORT"))
-        cursor = mydb.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-        column_names = [desc[0] for desc in cursor.description]
-        cursor.close()
-        mydb.close()
-        logger.info("SQL query executed successfully.")
-        return data, column_names
+        max_rows = max_rows or STREAM_CONFIG["max_rows"]
+        max_bytes = max_bytes or STREAM_CONFIG["max_bytes"]
+        sample = STREAM_CONFIG["sample"] if sample is None else sample
+        batch_size = batch_size or STREAM_CONFIG["batch_size"]
+        executor = get_query_executor(uri)
+        # The caps are part of the key, not the scope, so appending to a table still invalidates these results
+        scope, variant = str(executor.engine.url), f"stream:{max_rows}:{max_bytes}:{sample}"
+        if use_cache:
+            cached = get_result_cache().get(query, scope, variant)
+            if cached is not None:
+                logger.info(f"Using cached result for SQL query: {query}")
+                return cached
+
+        use_copy = STREAM_CONFIG["copy"] if use_copy is None else use_copy
+        if use_copy and not sample and executor.dialect == "postgresql" and can_copy(query):
+            try:
+                df = fetch_dataframe_copy(query, uri, max_rows=max_rows, max_bytes=max_bytes,
+                                          batch_size=batch_size, progress_callback=progress_callback)
+                if use_cache:
+                    get_result_cache().put(query, scope, df, variant=variant)
+                return df
+            except Exception as e:
+                logger.warning(f"COPY fetch failed, falling back to the cursor: {e}")
+
+        logger.info(f"Streaming SQL query: {query}")
+        frames, reservoir = [], []
+        column_names, column_types = [], []
+        row_cap = max_rows
+        rows_scanned = rows_kept = bytes_kept = 0
+        truncated = False
+        rng = np.random.default_rng(0)
+        for column_names, rows, column_types in executor.stream(query, batch_size=batch_size):
+            if not rows:
+                continue
+            frame = None
+            if rows_scanned == 0:
+                # Translate the byte cap into a row cap using the first batch
+                frame = create_dataframe(rows, column_names, column_types, compact=False, numeric_text=False)
+                bytes_per_row = max(1.0, frame.memory_usage(deep=True).sum() / len(rows))
+                row_cap = max(1, min(max_rows, int(max_bytes / bytes_per_row)))
+
+            if sample:
+                # Algorithm R: row i replaces a random reservoir slot with probability cap / i
+                fill = max(0, min(len(rows), row_cap - len(reservoir)))
+                reservoir.extend(rows[:fill])
+                if fill < len(rows):
+                    positions = np.arange(rows_scanned + fill + 1, rows_scanned + len(rows) + 1)
+                    slots = (rng.random(len(positions)) * positions).astype(np.int64)
+                    for offset in np.nonzero(slots < row_cap)[0]:
+                        reservoir[slots[offset]] = rows[fill + offset]
+                rows_scanned += len(rows)
+                rows_kept = len(reservoir)
+                bytes_kept = int(rows_kept * bytes_per_row)
+            else:
+                rows_scanned += len(rows)
+                rows = rows[:row_cap - rows_kept]
+                if rows:
+                    if frame is None:
+                        frame = create_dataframe(rows, column_names, column_types, compact=False,
+                                                 numeric_text=False)
+                    else:
+                        frame = frame.iloc[:len(rows)]
+                    frames.append(frame)
+                    rows_kept += len(rows)
+                    bytes_kept += int(frame.memory_usage(deep=True).sum())
+
+            if progress_callback:
+                progress_callback(rows_scanned, bytes_kept)
+            # Only a row past the cap, in this batch or the next, means the result was truncated
+            if not sample and rows_scanned > rows_kept:
+                truncated = True
+                break
+
+        if sample:
+            df = create_dataframe(reservoir, column_names, column_types)
+        elif frames:
+            # Batches are converted and compacted together so numeric text, categories and integer widths agree
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            for position in range(df.shape[1]):
+                series = df.iloc[:, position]
+                converted = convert_numeric_text(series)
+                if converted is not series:
+                    df.isetitem(position, converted)
+            df = compact_dataframe(df)
+        else:
+            df = create_dataframe([], column_names, column_types)
+        df.attrs["fetch"] = {
+            "rows_scanned": rows_scanned,
+            "rows": len(df),
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            "truncated": truncated,
+            "sampled": sample and rows_scanned > len(df),
+            "method": "cursor",
+        }
+        record_fetch(df.attrs["fetch"])
+        if truncated or df.attrs["fetch"]["sampled"]:
+            logger.warning(f"Result capped at {len(df)} rows ({'sampled' if sample else 'truncated'}).")
+        if use_cache:
+            get_result_cache().put(query, scope, df, variant=variant)
+        logger.info(f"Streamed {rows_scanned} rows into a DataFrame of shape {df.shape}.")
+        return df
     except Exception as e:
-        logger.error(f"Error executing SQL query: {e}")
+        logger.error(f"Error streaming SQL query: {e}")
         raise
 
-# Execute SQL Query
-def execute_sql_query_for_ans(query):
+
+# Check whether a query can be wrapped in COPY (...) TO STDOUT
+@timed()
+def can_copy(query):
+    statement = query.strip().rstrip(";")
+    return re.match(r"(select|with)\b", statement, re.IGNORECASE) is not None and ";" not in statement
+
+
+# Fetch a PostgreSQL result into a DataFrame through COPY ... TO STDOUT
+@timed()
+def fetch_dataframe_copy(query, uri=None, max_rows=None, max_bytes=None, batch_size=None, progress_callback=None):
+    """
+    Fetch a query result with PostgreSQL's COPY and parse it with pandas' C CSV parser.
+
+    The rows never become Python tuples: the server streams CSV into a spooled
+    temporary file (in memory up to STREAM_CONFIG["copy_spool_bytes"], then on
+    disk), which is parsed in `batch_size` chunks with dtypes taken from the
+    result's column types, giving the same DataFrame as the cursor. The row cap
+    is pushed into the query as a LIMIT and parsing stops once the DataFrame
+    reaches `max_bytes`.
+
+    Args:
+        query (str): A single SELECT statement (see `can_copy`).
+        uri (str, optional): Database URI. Defaults to DATABASE_URI.
+        max_rows (int, optional): Row cap. Defaults to STREAM_CONFIG.
+        max_bytes (int, optional): DataFrame memory cap. Defaults to STREAM_CONFIG.
+        batch_size (int, optional): Rows parsed per chunk. Defaults to STREAM_CONFIG.
+        progress_callback (callable, optional): Called as `callback(rows, bytes)` after each chunk.
+
+    Returns:
+        DataFrame: The fetched (possibly truncated) rows, with `attrs["fetch"]`
+        as in `fetch_dataframe`.
+
+    Raises:
+        NotImplementedError: If the database is not PostgreSQL through psycopg2,
+            or the result has columns of other kinds than COPY_CSV_KINDS.
+    """
     try:
-        logger.info(f"Executing SQL query: {query}")
-        mydb = mysql.connector.connect(
-            host='localhost',
-            user='sid',
-            password='Sid123',
-            database='propertiesdb'
-        )
-        cursor = mydb.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-        cursor.close()
-        mydb.close()
-        logger.info("SQL query executed successfully.")
-        return data
+        max_rows = max_rows or STREAM_CONFIG["max_rows"]
+        max_bytes = max_bytes or STREAM_CONFIG["max_bytes"]
+        batch_size = batch_size or STREAM_CONFIG["batch_size"]
+        executor = get_query_executor(uri)
+        logger.info(f"Fetching SQL query with COPY: {query}")
+        # One extra row tells whether the cap truncated the result
+        capped_query = f"SELECT * FROM ({query.strip().rstrip(';')}) AS capped LIMIT {max_rows + 1}"
+
+        frames = []
+        rows_scanned = bytes_kept = 0
+        truncated = False
+        with tempfile.SpooledTemporaryFile(max_size=STREAM_CONFIG["copy_spool_bytes"]) as spool:
+            column_names, column_types = executor.copy_csv(capped_query, spool, kinds=COPY_CSV_KINDS)
+            has_rows = spool.tell() > 0
+            spool.seek(0)
+            dtypes = {position: COPY_CSV_DTYPES.get(kind, object) for position, kind in enumerate(column_types)}
+            reader = pd.read_csv(spool, header=None, names=list(range(len(column_names))), dtype=dtypes,
+                                 na_values=["\\N"], keep_default_na=False, true_values=["t"],
+                                 false_values=["f"], chunksize=batch_size) if has_rows else []
+            for chunk in reader:
+                rows_scanned += len(chunk)
+                if rows_scanned > max_rows:
+                    chunk = chunk.iloc[:len(chunk) - (rows_scanned - max_rows)]
+                    truncated = True
+                frames.append(chunk)
+                bytes_kept += int(chunk.memory_usage(deep=True).sum())
+                if progress_callback:
+                    progress_callback(min(rows_scanned, max_rows), bytes_kept)
+                if bytes_kept >= max_bytes:
+                    truncated = True
+                    break
+
+        if frames:
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            # Timestamps are parsed once over all chunks so an all-NULL chunk cannot lose the time zone
+            for position, kind in enumerate(column_types):
+                if kind in ("datetime", "date"):
+                    df[position] = convert_column(df[position], kind)
+                elif kind == "text":
+                    df[position] = convert_numeric_text(df[position])
+            df = compact_dataframe(df)
+            df.columns = list(column_names)
+        else:
+            df = create_dataframe([], column_names, column_types)
+        df.attrs["fetch"] = {
+            "rows_scanned": rows_scanned,
+            "rows": len(df),
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            "truncated": truncated,
+            "sampled": False,
+            "method": "copy",
+        }
+        record_fetch(df.attrs["fetch"])
+        if truncated:
+            logger.warning(f"Result capped at {len(df)} rows (truncated).")
+        logger.info(f"Fetched {len(df)} rows with COPY into a DataFrame of shape {df.shape}.")
+        return df
     except Exception as e:
-        logger.error(f"Error executing SQL query: {e}")
+        logger.error(f"Error fetching SQL query with COPY: {e}")
         raise
 
-def execute_sql_query_for_data(query):
+
+# Infer a column kind from its first non-null value (drivers such as SQLite report no types)
+@timed()
+def infer_column_kind(values):
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, (bool, np.bool_)):
+            return "bool"
+        if isinstance(value, (int, np.integer)):
+            return "int"
+        if isinstance(value, (float, np.floating)):
+            return "float"
+        if isinstance(value, Decimal):
+            return "decimal"
+        if isinstance(value, datetime):
+            return "datetime"
+        if isinstance(value, date):
+            return "date"
+        if isinstance(value, str):
+            return "text"
+        return None
+    return None
+
+
+# Convert one DataFrame column to the dtype of its kind
+@timed()
+def convert_column(series, kind):
+    if kind == "float" and series.dtype != np.float64:
+        return series.astype(np.float64)
+    if kind == "decimal" and series.dtype == object:
+        # Much faster than letting pandas convert the Decimal objects itself
+        return pd.Series(np.fromiter((np.nan if value is None else float(value) for value in series),
+                                     dtype=np.float64, count=len(series)), index=series.index)
+    if kind == "bool" and series.dtype != bool:
+        return series.astype("boolean")
+    if kind in ("datetime", "date") and not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return pd.to_datetime(series)
+    return series
+
+
+# Convert a text column that only holds numbers to a numeric one
+def convert_numeric_text(series):
+    if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) != "string":
+        return series
     try:
-        logger.info(f"Executing SQL query: {query}")
-        mydb = mysql.connector.connect(
-            host='localhost',
-            user='sid',
-            password='Sid123',
-            database='propertiesdb'
-        )
-        cursor = mydb.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-        column_names = [desc[0] for desc in cursor.description]
-        cursor.close()
-        mydb.close()
-        logger.info("SQL query executed successfully.")
-        return data, column_names
+        return pd.to_numeric(series)
+    except (TypeError, ValueError):
+        return series
+
+
+# Shrink DataFrame dtypes: narrowest integer width, categoricals for repetitive text
+@timed()
+def compact_dataframe(df, downcast_integers=None, category_max_ratio=None, category_min_rows=None):
+    try:
+        downcast_integers = DATAFRAME_CONFIG["downcast_integers"] if downcast_integers is None else downcast_integers
+        category_max_ratio = category_max_ratio or DATAFRAME_CONFIG["category_max_ratio"]
+        category_min_rows = category_min_rows or DATAFRAME_CONFIG["category_min_rows"]
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            if downcast_integers and pd.api.types.is_integer_dtype(series.dtype) and series.notna().any():
+                low, high = int(series.min()), int(series.max())
+                nullable = isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and series.hasnans
+                for width in (np.int8, np.int16, np.int32):
+                    info = np.iinfo(width)
+                    if info.min <= low and high <= info.max:
+                        if np.dtype(width).itemsize < series.dtype.itemsize:
+                            df.isetitem(position, series.astype(f"Int{info.bits}" if nullable else width))
+                        break
+            elif (series.dtype == object and len(series) >= category_min_rows
+                  and pd.api.types.infer_dtype(series, skipna=True) == "string"
+                  and series.nunique() <= category_max_ratio * len(series)):
+                df.isetitem(position, series.astype("category"))
+        return df
     except Exception as e:
-        logger.error(f"Error executing SQL query: {e}")
+        logger.error(f"Error compacting DataFrame: {e}")
         raise
 
+
 # Create Pandas DataFrame
-def create_dataframe(data, column_names):
+@timed()
+def create_dataframe(data, column_names, column_types=None, compact=True, numeric_text=True):
+    """
+    Build a typed DataFrame from query rows.
+
+    Each column is converted once, according to its kind from the cursor
+    description (see `QueryExecutor.column_types`) or, where the driver reports
+    none (e.g. SQLite), the first non-null value: Decimal becomes float64,
+    timestamps and dates datetime64, integers int64 (nullable Int64 when NULLs
+    are present). Text columns holding only numbers become numeric. With
+    `compact`, integers are then downcast and repetitive text becomes categorical.
+
+    Args:
+        data (list): Row tuples.
+        column_names (list): Column names, duplicates allowed.
+        column_types (list, optional): Column kinds, None entries are inferred.
+        compact (bool): Apply `compact_dataframe`.
+        numeric_text (bool): Convert text columns that only hold numbers.
+
+    Returns:
+        DataFrame: The typed result.
+    """
     try:
         logger.info("Creating DataFrame from query result...")
-        df = pd.DataFrame(data, columns=column_names)
-
-        # Data type conversions
-        for col in df.columns:
-            if df[col].dtype == object:
-                if len(df[col]) > 0 and isinstance(df[col].iloc[0], Decimal):
-                    df[col] = df[col].astype(float)
-                elif len(df[col]) > 0 and isinstance(df[col].iloc[0], datetime):
-                    df[col] = pd.to_datetime(df[col])
+        column_types = list(column_types or [])
+        column_types += [None] * (len(column_names) - len(column_types))
+        # The constructor already infers int64, float64, bool and datetime64 columns in C
+        df = pd.DataFrame(data, columns=range(len(column_names)))
+        for position in range(len(column_names)):
+            series = df[position]
+            kind = column_types[position]
+            if kind is None and (series.dtype == object or (series.dtype.kind == "f" and series.hasnans)):
+                # Integers with NULLs come out as float64 too, so look at the values themselves
+                kind = infer_column_kind(row[position] for row in data)
+            try:
+                if kind == "int" and series.dtype.kind != "i" and len(series):
+                    # Integers with NULLs come out as float64; rebuild them exactly as nullable Int64
+                    converted = pd.array([row[position] for row in data], dtype="Int64")
+                elif kind == "text" and numeric_text:
+                    converted = convert_numeric_text(series)
                 else:
-                    df[col] = pd.to_numeric(df[col], errors='ignore')
+                    converted = convert_column(series, kind)
+            except (TypeError, ValueError, OverflowError) as e:
+                # Values that do not match the declared kind (e.g. SQLite's dynamic typing)
+                logger.warning(f"Column '{column_names[position]}' does not match its type {kind}: {e}")
+                try:
+                    converted = pd.to_numeric(series)
+                except (TypeError, ValueError):
+                    converted = series
+            if converted is not series:
+                df[position] = converted
+        df.columns = list(column_names)
+        if compact:
+            compact_dataframe(df)
 
         logger.info("DataFrame created successfully.")
         return df
@@ -181,52 +516,131 @@ def create_dataframe(data, column_names):
         raise
 
 
+# Widen compact dtypes for LIDA, whose summarizer only profiles int64/float64 as numbers
+@timed()
+def widen_dtypes(df):
+    try:
+        widened = {}
+        for position in range(df.shape[1]):
+            dtype = df.iloc[:, position].dtype
+            if pd.api.types.is_integer_dtype(dtype):
+                nullable = isinstance(dtype, pd.api.extensions.ExtensionDtype)
+                widened[position] = np.float64 if nullable and df.iloc[:, position].hasnans else np.int64
+            elif pd.api.types.is_float_dtype(dtype):
+                widened[position] = np.float64
+        if not widened:
+            return df
+        result = df.copy(deep=False)
+        for position, dtype in widened.items():
+            result.isetitem(position, df.iloc[:, position].astype(dtype))
+        return result
+    except Exception as e:
+        logger.error(f"Error widening DataFrame dtypes: {e}")
+        raise
+
+
 # Generate Visualization
-def generate_visualization(lida, summary, user_query):
+@timed()
+def generate_visualization(lida, summary, user_query, library="seaborn"):
+    """
+    Generate chart candidates for the query. With VIZ_CONFIG['n'] > 1 each
+    candidate's code is requested by its own uncached LLM call, all in parallel;
+    the charts are then rendered one after another, since plotting goes through
+    pyplot's global state.
+    """
     try:
         logger.info("Generating visualization...")
-        visualization = lida.visualize(summary=summary, goal=user_query, textgen_config=TextGenerationConfig(**VIZ_CONFIG))
-        logger.info("Visualization generated successfully.")
+        from lida import TextGenerationConfig
+        from lida.datamodel import Goal
+        n = VIZ_CONFIG["n"]
+        if n <= 1:
+            visualization = lida.visualize(summary=summary, goal=user_query, textgen_config=TextGenerationConfig(**VIZ_CONFIG),
+                                           library=library)
+        else:
+            # Identical cached requests would return the same candidate n times
+            textgen_config = TextGenerationConfig(**dict(VIZ_CONFIG, n=1, use_cache=False))
+            lida.check_textgen(config=textgen_config)
+            goal = Goal(question=user_query, visualization=user_query, rationale="")
+            with ThreadPoolExecutor(max_workers=n, thread_name_prefix="viz") as pool:
+                batches = list(pool.map(
+                    lambda _: lida.vizgen.generate(summary=summary, goal=goal, textgen_config=textgen_config,
+                                                   text_gen=lida.text_gen, library=library),
+                    range(n)
+                ))
+            visualization = lida.execute(code_specs=[code for batch in batches for code in batch],
+                                         data=lida.data, summary=summary, library=library)
+        logger.info(f"Visualization generated successfully ({len(visualization)} candidates).")
         return visualization
     except Exception as e:
         logger.error(f"Error generating visualization: {e}")
         raise
 
 
-# Display Visualization
-def display_visualization(charts):
-    try:
-        if not charts:
-            logger.info("No charts to display.")
-            return None
+# Render charts to PNG bytes for the UI
+@timed()
+def render_charts(charts, n_cols=3, use_cache=True):
+    """
+    Return the PNG image of a chart, or of a grid of charts, for `st.image`.
 
-        logger.info(f"Displaying {len(charts) if isinstance(charts, list) else 1} charts...")
-        n_charts = len(charts) if isinstance(charts, list) else 1
-        n_cols = min(3, n_charts)
-        n_rows = (n_charts - 1) // n_cols + 1
+    A single chart's PNG, already rendered by LIDA, is decoded and passed
+    through as is; hashing it for a cache key would cost as much as decoding it.
+    Several charts are pasted into a grid of up to `n_cols` columns with PIL and
+    encoded once, without drawing them into a matplotlib figure. Grids are kept
+    in the render cache, keyed by a hash of the charts' code and raster, so
+    Streamlit reruns reuse them.
 
-        fig = plt.figure(figsize=(10 * n_cols, 7 * n_rows))
+    Args:
+        charts: A LIDA chart or a list of charts.
+        n_cols (int): Maximum columns of the grid.
+        use_cache (bool): Whether to look up and store a grid in the render cache.
 
-        for i, chart in enumerate(charts if isinstance(charts, list) else [charts]):
-            ax = fig.add_subplot(n_rows, n_cols, i + 1)
-            img_data = base64.b64decode(chart.raster)
-            img = Image.open(io.BytesIO(img_data))
-            ax.imshow(img)
-            ax.axis('off')
+    Returns:
+        bytes: The PNG image, or None if there are no charts.
+    """
+    try:
+        charts = [chart for chart in (charts if isinstance(charts, list) else [charts]) if chart is not None]
+        if not charts:
+            logger.info("No charts to render.")
+            return None
 
-        plt.tight_layout(pad=3.0)
-        plt.subplots_adjust(left=0.2)
-        logger.info("Charts displayed successfully.")
-        return fig
+        if len(charts) == 1:
+            return base64.b64decode(charts[0].raster)
+
+        key = chart_key(charts, n_cols)
+        image = get_render_cache().get(key) if use_cache else None
+        if image is not None:
+            return image
+
+        from PIL import Image
+        tiles = [Image.open(io.BytesIO(base64.b64decode(chart.raster))).convert("RGB") for chart in charts]
+        n_cols = min(n_cols, len(tiles))
+        n_rows = (len(tiles) - 1) // n_cols + 1
+        cell_width = max(tile.width for tile in tiles)
+        cell_height = max(tile.height for tile in tiles)
+        grid = Image.new("RGB", (cell_width * n_cols, cell_height * n_rows), "white")
+        for i, tile in enumerate(tiles):
+            row, col = divmod(i, n_cols)
+            grid.paste(tile, (col * cell_width + (cell_width - tile.width) // 2,
+                              row * cell_height + (cell_height - tile.height) // 2))
+        buffer = io.BytesIO()
+        grid.save(buffer, format="PNG", compress_level=1)
+        image = buffer.getvalue()
+
+        if use_cache:
+            get_render_cache().put(key, image)
+        logger.info(f"Rendered {len(charts)} chart(s) to a {len(image):,} byte PNG.")
+        return image
     except Exception as e:
-        logger.error(f"Error displaying visualization: {e}")
+        logger.error(f"Error rendering charts: {e}")
         raise
 
 
 # Initialize LLM
+@timed()
 def initialize_llm():
     try:
         logger.info("Initializing LLM...")
+        from langchain_google_vertexai import ChatVertexAI
         llm = ChatVertexAI(model="gemini-1.5-pro")
         logger.info("LLM initialized successfully.")
         return llm
@@ -236,6 +650,7 @@ def initialize_llm():
 
 
 # Clean SQL Query
+@timed()
 def clean_sql_query(query):
     try:
         logger.info("Cleaning SQL query...")
@@ -247,20 +662,3 @@ def clean_sql_query(query):
     except Exception as e:
         logger.error(f"Error cleaning SQL query: {e}")
         raise
-
-
-# Create QnA Chain
-def create_qna_chain(write_query, execute_query, answer):
-    try:
-        logger.info("Creating QnA chain...")
-        chain = (
-            RunnablePassthrough.assign(query=write_query)
-            .assign(cleaned_query=lambda x: clean_sql_query(x['query']))
-            .assign(result=lambda x: execute_query(x['cleaned_query']))
-            | answer
-        )
-        logger.info("QnA chain created successfully.")
-        return chain
-    except Exception as e:
-        logger.error(f"Error creating QnA chain: {e}")
-        raise
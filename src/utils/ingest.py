@@ -0,0 +1,194 @@
+import csv
+import io
+import logging
+import time
+import pandas as pd
+from sqlalchemy import MetaData, Table
+from sqlalchemy.exc import NoSuchTableError
+from src.utils.constants import INGEST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CSVIngestError(ValueError):
+    """Raised when a CSV does not fit the table it is loaded into."""
+    pass
+
+
+def sanitize_column_name(name):
+    """Column name as created by /api/create_table: only alphanumerics and underscores."""
+    return ''.join(e for e in str(name) if e.isalnum() or e == '_')
+
+
+def match_columns(header, table):
+    """
+    Map CSV header names to table columns.
+
+    Header names are compared after the same sanitizing /api/create_table applies.
+    Every table column without a default (other than auto-increment keys) must be
+    present and no header may be unknown.
+
+    Returns:
+        list: The table column name for each header position.
+
+    Raises:
+        CSVIngestError: On unknown, missing or duplicate columns.
+    """
+    columns = {column.name: column for column in table.columns}
+    targets = [sanitize_column_name(name) for name in header]
+    unknown = [name for name, target in zip(header, targets) if target not in columns]
+    duplicated = {target for target in targets if targets.count(target) > 1}
+    required = [name for name, column in columns.items()
+                if column.default is None and column.server_default is None
+                and not (column.primary_key and column.autoincrement in (True, "auto"))
+                and not column.nullable]
+    missing = [name for name in required if name not in targets]
+    if unknown or missing or duplicated:
+        problems = []
+        if unknown:
+            problems.append(f"unknown columns {unknown}")
+        if missing:
+            problems.append(f"missing columns {missing}")
+        if duplicated:
+            problems.append(f"duplicate columns {sorted(duplicated)}")
+        raise CSVIngestError(f"CSV columns do not match the table '{table.name}': {'; '.join(problems)}.")
+    return targets
+
+
+def _copy_chunk(conn, table, columns, chunk):
+    """Load a chunk with PostgreSQL's COPY FROM STDIN on the transaction's connection."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False, na_rep="\\N", quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    quoted = ", ".join(conn.dialect.identifier_preparer.quote(column) for column in columns)
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {conn.dialect.identifier_preparer.format_table(table)} ({quoted}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+# Positional placeholder of each DB-API paramstyle
+PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+
+def _insert_chunk(conn, table, columns, chunk):
+    """
+    Insert a chunk with one driver-level executemany, which MySQL drivers batch into
+    multi-row INSERTs. Positional row tuples skip SQLAlchemy's per-row parameter
+    processing.
+    """
+    preparer = conn.dialect.identifier_preparer
+    placeholder = PLACEHOLDERS.get(conn.dialect.paramstyle)
+    values = chunk.astype(object).where(chunk.notna(), None)
+    rows = list(values.itertuples(index=False, name=None))
+    if placeholder is None:
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+        return
+    conn.exec_driver_sql(
+        f"INSERT INTO {preparer.format_table(table)} ({', '.join(preparer.quote(column) for column in columns)}) "
+        f"VALUES ({', '.join([placeholder] * len(columns))})", rows
+    )
+
+
+def resolve_method(executor, method=None):
+    """Pick the load method: COPY on PostgreSQL through psycopg2, batched inserts elsewhere."""
+    method = method or INGEST_CONFIG["method"]
+    if method == "auto":
+        method = "copy" if executor.dialect == "postgresql" and executor.engine.driver == "psycopg2" else "insert"
+    return method
+
+
+def ingest_frames(header, chunks, table_name, executor, method=None, progress_callback=None):
+    """
+    Load DataFrame chunks into an existing table inside a single transaction.
+
+    The header is validated against the table before the first chunk is pulled,
+    so a mismatching file is rejected without parsing any data. Either every
+    chunk is inserted or nothing is.
+
+    Args:
+        header (list): Column names of the chunks.
+        chunks (iterable): DataFrames to load, pulled lazily.
+        table_name (str): Existing table to append to.
+        executor (QueryExecutor): Executor of the target database.
+        method (str, optional): "copy", "insert" or "auto". Defaults to INGEST_CONFIG.
+        progress_callback (callable, optional): Called as `callback(rows, rows_per_second)` after each chunk.
+
+    Returns:
+        dict: Rows loaded, chunks, method, elapsed seconds and rows per second.
+
+    Raises:
+        CSVIngestError: If the table does not exist or the header does not match it.
+    """
+    try:
+        method = resolve_method(executor, method)
+        load_chunk = _copy_chunk if method == "copy" else _insert_chunk
+        try:
+            table = Table(table_name, MetaData(), autoload_with=executor.engine)
+        except NoSuchTableError:
+            raise CSVIngestError(f"Table '{table_name}' does not exist.")
+        columns = match_columns(header, table)
+
+        start = time.perf_counter()
+        rows = loaded_chunks = 0
+        with executor.engine.begin() as conn:
+            for chunk in chunks:
+                load_chunk(conn, table, columns, chunk)
+                rows += len(chunk)
+                loaded_chunks += 1
+                rate = rows / max(time.perf_counter() - start, 1e-9)
+                logger.info(f"Loaded {rows} rows into '{table_name}' ({rate:,.0f} rows/s).")
+                if progress_callback:
+                    progress_callback(rows, rate)
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": rows,
+            "chunks": loaded_chunks,
+            "method": method,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed else 0.0,
+        }
+    except CSVIngestError:
+        raise
+    except Exception as e:
+        logger.error(f"Error ingesting into '{table_name}': {e}")
+        raise
+
+
+def ingest_csv(file, table_name, executor, chunk_size=None, method=None, progress_callback=None):
+    """
+    Stream a CSV file into an existing table.
+
+    Only the header is read before validation. The rows are then parsed in
+    chunks of `chunk_size`, so memory stays bounded by one chunk, and loaded by
+    `ingest_frames` inside a single transaction. PostgreSQL (psycopg2) loads
+    each chunk with COPY FROM STDIN, other databases with a batched driver-level
+    executemany insert.
+
+    Args:
+        file: Readable, seekable CSV file object.
+        table_name (str): Existing table to append to.
+        executor (QueryExecutor): Executor of the target database.
+        chunk_size (int, optional): Rows parsed and loaded per chunk. Defaults to INGEST_CONFIG.
+        method (str, optional): "copy", "insert" or "auto". Defaults to INGEST_CONFIG.
+        progress_callback (callable, optional): Called as `callback(rows, rows_per_second)` after each chunk.
+
+    Returns:
+        dict: Rows loaded, chunks, method, elapsed seconds and rows per second.
+
+    Raises:
+        CSVIngestError: If the table does not exist or the header does not match it.
+    """
+    chunk_size = chunk_size or INGEST_CONFIG["chunk_size"]
+    method = resolve_method(executor, method)
+    # COPY gets the values verbatim; inserts keep pandas' type inference as to_sql did
+    read_options = {"dtype": str, "keep_default_na": False, "na_values": [""]} if method == "copy" else {}
+    file.seek(0)
+    header = pd.read_csv(file, nrows=0).columns.tolist()
+    file.seek(0)
+    chunks = pd.read_csv(file, chunksize=chunk_size, **read_options)
+    return ingest_frames(header, chunks, table_name, executor, method=method, progress_callback=progress_callback)
@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.constants import JOB_CONFIG
+from src.utils.metrics import trace
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobLimitError(Exception):
+    """Raised when a job is rejected because its user or the queue is at capacity."""
+    pass
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation was requested."""
+    pass
+
+
+class Job:
+    """
+    A pipeline run submitted to the JobManager.
+
+    Handlers receive the job and may report progress with `update_progress`,
+    which also raises JobCancelled once cancellation was requested, so long
+    loops stop early. A handler that never reports progress runs to completion
+    and its result is discarded.
+    """
+
+    def __init__(self, kind, owner, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.progress = {}
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self.cancel_event = threading.Event()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled.")
+
+    def update_progress(self, **progress):
+        self.progress.update(progress)
+        self.check_cancelled()
+
+    def to_dict(self):
+        end = self.finished or time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "cancel_requested": self.cancel_event.is_set(),
+            "progress": dict(self.progress),
+            "error": self.error,
+            "submitted": self.submitted,
+            "wait_seconds": (self.started or end) - self.submitted,
+            "run_seconds": end - self.started if self.started else None,
+        }
+
+
+class JobManager:
+    """
+    Bounded worker pool running QnA and EDA pipelines in the background.
+
+    Jobs are submitted by kind to handlers registered with `register` and run
+    on a ThreadPoolExecutor of `max_workers` threads. Each user may have at most
+    `max_jobs_per_user` queued or running jobs and the queue holds at most
+    `max_queue` jobs, so one user cannot occupy every worker and the backlog
+    stays bounded. Finished jobs keep their result for `result_ttl` seconds.
+
+    Args:
+        max_workers (int): Jobs run concurrently.
+        max_jobs_per_user (int): Queued plus running jobs allowed per user.
+        max_queue (int): Jobs allowed to wait for a worker.
+        result_ttl (float): Seconds a finished job and its result are kept.
+    """
+
+    def __init__(self, max_workers=4, max_jobs_per_user=2, max_queue=64, result_ttl=3600):
+        self.max_workers = max_workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._handlers = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._stats = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+        self._started = self._ran = 0
+        self._wait_seconds = self._run_seconds = 0.0
+
+    def register(self, kind, handler):
+        """
+        Register the function running jobs of a kind.
+
+        Args:
+            kind (str): Job kind, e.g. "qna".
+            handler (callable): Called as `handler(params, job)` on a worker thread; its
+                return value becomes the job result.
+        """
+        self._handlers[kind] = handler
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, kind, owner, params):
+        """
+        Queue a job.
+
+        Args:
+            kind (str): Registered job kind.
+            owner (str): User the job belongs to.
+            params (dict): Arguments passed to the handler.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            KeyError: If no handler is registered for the kind.
+            JobLimitError: If the user or the queue is at capacity.
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind '{kind}'.")
+        with self._lock:
+            self._prune()
+            statuses = Counter(job.status for job in self._jobs.values())
+            active = sum(1 for job in self._jobs.values() if job.owner == owner and job.status in ACTIVE_STATES)
+            if active >= self.max_jobs_per_user:
+                self._stats["rejected"] += 1
+                raise JobLimitError(f"At most {self.max_jobs_per_user} jobs may be queued or running per user.")
+            if statuses["queued"] >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise JobLimitError("The job queue is full; try again later.")
+            job = Job(kind, owner, params)
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+            job.future = self._pool.submit(self._run, job)
+        logger.info(f"Queued {kind} job {job.id} for {owner}.")
+        return job
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+            self._stats[status] += 1
+            if job.started:
+                self._ran += 1
+                self._run_seconds += job.finished - job.started
+
+    def _run(self, job):
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started = time.time()
+            self._started += 1
+            self._wait_seconds += job.started - job.submitted
+        try:
+            # Each job is traced on its own, as it outlives the request that submitted it
+            with trace(f"job.{job.kind}", trace_id=f"job-{job.id}"):
+                job.check_cancelled()
+                result = self._handlers[job.kind](job.params, job)
+                job.check_cancelled()
+        except Exception as e:
+            # Pipelines wrap JobCancelled raised from their progress callbacks in their own errors
+            if job.cancel_event.is_set():
+                self._finish(job, "cancelled")
+                logger.info(f"Cancelled {job.kind} job {job.id}.")
+                return
+            logger.error(f"Error in {job.kind} job {job.id}: {e}")
+            self._finish(job, "failed", error=str(e))
+        else:
+            self._finish(job, "succeeded", result=result)
+            logger.info(f"Finished {job.kind} job {job.id} in {job.finished - job.started:.2f}s.")
+
+    def get(self, job_id, owner=None):
+        """Return a job, or None if it is unknown, expired or belongs to another user."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def list_jobs(self, owner):
+        """Return a user's jobs, newest first."""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.submitted, reverse=True)
+
+    def cancel(self, job_id, owner=None):
+        """
+        Cancel a job. A queued job is removed from the queue; a running one is
+        asked to stop and its result is discarded.
+
+        Returns:
+            bool: False if the job is unknown or already finished.
+        """
+        job = self.get(job_id, owner)
+        if job is None:
+            return False
+        with self._lock:
+            if job.status not in ACTIVE_STATES:
+                return False
+            job.cancel_event.set()
+            queued = job.status == "queued"
+        if queued and job.future.cancel():
+            self._finish(job, "cancelled")
+        logger.info(f"Requested cancellation of {job.kind} job {job.id}.")
+        return True
+
+    def stats(self):
+        with self._lock:
+            statuses = Counter(job.status for job in self._jobs.values())
+            return {
+                **self._stats,
+                "queue_depth": statuses["queued"],
+                "running": statuses["running"],
+                "max_workers": self.max_workers,
+                "max_jobs_per_user": self.max_jobs_per_user,
+                "max_queue": self.max_queue,
+                "active_users": len({job.owner for job in self._jobs.values() if job.status in ACTIVE_STATES}),
+                "avg_wait_seconds": self._wait_seconds / self._started if self._started else 0.0,
+                "avg_run_seconds": self._run_seconds / self._ran if self._ran else 0.0,
+            }
+
+    def shutdown(self, wait=True):
+        """Cancel queued jobs and stop the workers."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide job manager, creating it on first use."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager(**JOB_CONFIG)
+    return _job_manager
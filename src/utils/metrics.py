@@ -0,0 +1,429 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from src.utils.constants import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ROWS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+BYTES_BUCKETS = (1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20, 1 << 30)
+
+HELP = {
+    "span_seconds": "Duration of instrumented functions and pipeline stages.",
+    "span_errors_total": "Instrumented functions and stages that raised.",
+    "llm_calls_total": "LLM calls by client.",
+    "llm_errors_total": "LLM calls that raised, by client.",
+    "llm_prompt_tokens_total": "Prompt tokens sent to the LLM (reported by the provider, else estimated).",
+    "llm_completion_tokens_total": "Completion tokens received from the LLM (reported, else estimated).",
+    "llm_seconds": "LLM call latency.",
+    "llm_first_token_seconds": "Time to the first token of streamed LLM calls.",
+    "query_rows": "Rows returned by executed SQL queries.",
+    "fetch_rows": "Rows of streamed query results, by fetch method.",
+    "fetch_bytes": "In-memory bytes of streamed query results, by fetch method.",
+    "fetch_truncated_total": "Streamed query results capped by the row or byte limit.",
+    "http_requests_total": "HTTP requests by method, route and status.",
+    "http_request_seconds": "HTTP request latency by route.",
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) when the provider reports none."""
+    return len(text or "") // 4
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, exported in the Prometheus text format.
+
+    Series are keyed by metric name and label values. An update is a dict lookup
+    and a bisect under one lock, cheap enough to leave on in production; nothing
+    is recorded while METRICS_CONFIG["enabled"] is off.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        if not METRICS_CONFIG["enabled"]:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        if not METRICS_CONFIG["enabled"]:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.counts[bisect.bisect_left(histogram.buckets, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Counter values and histogram counts and sums, keyed by name and label pairs."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {"count": histogram.count, "sum": histogram.sum}
+                          for key, histogram in self._histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def render(self, gauges=()):
+        """
+        Export every series in the Prometheus text format (version 0.0.4).
+
+        Args:
+            gauges (iterable): Extra `(name, labels, value)` gauges sampled at scrape
+                time, e.g. cache statistics.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count))
+                                for key, histogram in self._histograms.items())
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for name, labels, value in sorted(gauges, key=lambda gauge: (gauge[0], sorted(gauge[1].items()))):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def stats_gauges(prefix, stats, label="cache"):
+    """
+    Gauges of a `stats()` dict per component (e.g. each cache), plus a hit ratio
+    where hits and misses are counted.
+
+    Args:
+        prefix (str): Metric name prefix, e.g. "cache".
+        stats (dict): Statistics dict of each component, by component name.
+        label (str): Label naming the component.
+
+    Returns:
+        list: `(name, labels, value)` gauges for `MetricsRegistry.render`.
+    """
+    gauges = []
+    for component, values in stats.items():
+        values = values or {}
+        for stat, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges.append((f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', stat)}", {label: component}, value))
+        hits = sum(values.get(stat, 0) for stat in ("hits", "disk_hits") if isinstance(values.get(stat), (int, float)))
+        if isinstance(values.get("misses"), (int, float)) and hits + values["misses"]:
+            gauges.append((f"{prefix}_hit_ratio", {label: component}, round(hits / (hits + values["misses"]), 4)))
+    return gauges
+
+
+class Trace:
+    """Spans recorded for one request or job, dumped as JSON when it finishes."""
+
+    def __init__(self, name, trace_id=None):
+        self.id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "started": self.started,
+                "seconds": round(time.perf_counter() - self.origin, 6), "spans": list(self.spans)}
+
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def start_trace(name, trace_id=None):
+    """
+    Start recording the spans of a request or job in this context, if tracing is
+    configured (METRICS_CONFIG["trace_dir"]).
+
+    Returns:
+        tuple: `(trace, token)` to pass to `finish_trace`, or None when tracing is off.
+    """
+    if not (METRICS_CONFIG["enabled"] and METRICS_CONFIG["trace_dir"]):
+        return None
+    trace = Trace(name, trace_id)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(started):
+    """Stop recording the trace returned by `start_trace` and write it to the trace directory."""
+    if started is None:
+        return
+    trace, token = started
+    _current_trace.reset(token)
+    directory = METRICS_CONFIG["trace_dir"]
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as handle:
+            json.dump(trace.to_dict(), handle, default=str)
+        os.replace(handle.name, os.path.join(directory, f"{trace.id}.json"))
+        _prune_traces(directory)
+    except Exception as e:
+        logger.warning(f"Could not write trace {trace.id}: {e}")
+
+
+def _prune_traces(directory):
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+    if len(files) <= METRICS_CONFIG["trace_max_files"]:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - METRICS_CONFIG["trace_max_files"]]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def trace(name, trace_id=None):
+    """Record the spans run inside the block as one trace (see `start_trace`)."""
+    started = start_trace(name, trace_id)
+    try:
+        yield started[0] if started else None
+    finally:
+        finish_trace(started)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block as `span_seconds{span=name}` and, inside a trace, record it with
+    its attributes. The block may add attributes (e.g. rows) to the yielded dict.
+    """
+    if not METRICS_CONFIG["enabled"]:
+        yield attributes
+        return
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        registry = get_metrics()
+        registry.observe("span_seconds", seconds, span=name)
+        if error:
+            registry.inc("span_errors_total", span=name)
+        current = _current_trace.get()
+        if current is not None:
+            record = {"name": name, "start": round(start - current.origin, 6), "seconds": round(seconds, 6),
+                      "thread": threading.current_thread().name, **attributes}
+            if error:
+                record["error"] = error
+            current.spans.append(record)
+
+
+def timed(name=None):
+    """Decorator running a function in a span named `<module>.<function>` unless `name` is given."""
+    def decorate(function):
+        span_name = name or f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS_CONFIG["enabled"]:
+                return function(*args, **kwargs)
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_llm_call(client, seconds, prompt_tokens, completion_tokens, error=False):
+    registry = get_metrics()
+    registry.inc("llm_calls_total", client=client)
+    registry.observe("llm_seconds", seconds, client=client)
+    if error:
+        registry.inc("llm_errors_total", client=client)
+        return
+    registry.inc("llm_prompt_tokens_total", prompt_tokens, client=client)
+    registry.inc("llm_completion_tokens_total", completion_tokens, client=client)
+
+
+def record_fetch(fetch):
+    """Record the `attrs["fetch"]` statistics of a streamed query result."""
+    registry = get_metrics()
+    registry.observe("fetch_rows", fetch["rows"], ROWS_BUCKETS, method=fetch["method"])
+    registry.observe("fetch_bytes", fetch["bytes"], BYTES_BUCKETS, method=fetch["method"])
+    if fetch["truncated"]:
+        registry.inc("fetch_truncated_total", method=fetch["method"])
+
+
+class LLMMetrics:
+    """LangChain callback methods counting LLM calls, their latency and prompt/completion tokens."""
+
+    def __init__(self, client="langchain"):
+        self.client = client
+        self._calls = {}
+        self._first_token_pending = set()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._calls[run_id] = (time.perf_counter(), sum(estimate_tokens(prompt) for prompt in prompts))
+        self._first_token_pending.add(run_id)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        # Only streamed calls report tokens; the first one of each call is timed
+        if run_id in self._first_token_pending:
+            self._first_token_pending.discard(run_id)
+            get_metrics().observe("llm_first_token_seconds", time.perf_counter() - self._calls[run_id][0],
+                                  client=self.client)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._first_token_pending.discard(run_id)
+        start, prompt_tokens = self._calls.pop(run_id, (time.perf_counter(), 0))
+        generations = [generation for candidates in response.generations for generation in candidates]
+        completion_tokens = sum(estimate_tokens(generation.text) for generation in generations)
+        usage = [getattr(getattr(generation, "message", None), "usage_metadata", None) for generation in generations]
+        if usage and all(usage):
+            prompt_tokens = sum(item.get("input_tokens", 0) for item in usage)
+            completion_tokens = sum(item.get("output_tokens", 0) for item in usage)
+        record_llm_call(self.client, time.perf_counter() - start, prompt_tokens, completion_tokens)
+        current = _current_trace.get()
+        if current is not None:
+            current.spans.append({"name": f"llm.{self.client}", "start": round(start - current.origin, 6),
+                                  "seconds": round(time.perf_counter() - start, 6),
+                                  "thread": threading.current_thread().name,
+                                  "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens})
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._first_token_pending.discard(run_id)
+        start, _ = self._calls.pop(run_id, (time.perf_counter(), 0))
+        record_llm_call(self.client, time.perf_counter() - start, 0, 0, error=True)
+
+
+_llm_handler = None
+_llm_handler_lock = threading.Lock()
+
+
+def get_llm_handler():
+    """The process-wide LangChain metrics callback, built on first use so LangChain loads only with an LLM."""
+    global _llm_handler
+    if _llm_handler is None:
+        with _llm_handler_lock:
+            if _llm_handler is None:
+                from langchain_core.callbacks import BaseCallbackHandler
+                handler_class = type("LLMMetricsHandler", (LLMMetrics, BaseCallbackHandler), {})
+                _llm_handler = handler_class()
+    return _llm_handler
+
+
+def instrument_llm(llm):
+    """Attach the LLM metrics callback to a LangChain model (once)."""
+    callbacks = list(llm.callbacks or []) if isinstance(llm.callbacks, (list, type(None))) else None
+    handler = get_llm_handler()
+    if callbacks is None or handler in callbacks:
+        return llm
+    llm.callbacks = callbacks + [handler]
+    return llm
+
+
+def instrument_text_generator(text_gen, client="lida"):
+    """Wrap a LIDA (llmx) text generator's `generate` to record its calls and tokens (once)."""
+    if getattr(text_gen, "_metrics_client", None):
+        return text_gen
+    generate = text_gen.generate
+
+    @functools.wraps(generate)
+    def instrumented(messages, config=None, **kwargs):
+        prompt_tokens = sum(estimate_tokens(str(message["content"])) for message in messages)
+        start = time.perf_counter()
+        try:
+            with span(f"llm.{client}", prompt_tokens=prompt_tokens) as attributes:
+                response = generate(messages, config=config, **kwargs)
+                usage = response.usage if isinstance(response.usage, dict) else {}
+                completion_tokens = usage.get("completion_tokens") or sum(
+                    estimate_tokens(str(choice["content"])) for choice in response.text)
+                prompt_tokens = usage.get("prompt_tokens") or prompt_tokens
+                attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        except Exception:
+            record_llm_call(client, time.perf_counter() - start, 0, 0, error=True)
+            raise
+        record_llm_call(client, time.perf_counter() - start, prompt_tokens, completion_tokens)
+        return response
+
+    text_gen.generate = instrumented
+    text_gen._metrics_client = client
+    return text_gen
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry, creating it on first use."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
@@ -0,0 +1,50 @@
+import logging
+import os
+import stat
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def private_directory(path):
+    """
+    Create a directory only the current user can access, or check that an existing one is.
+
+    Files loaded back from the directory are trusted, so it must not be
+    writable by anyone else: an existing directory has to be a real directory
+    (not a symlink) owned by the current user, and its mode is tightened to 0700.
+
+    Args:
+        path (str): Directory to create or check.
+
+    Returns:
+        str: The path.
+
+    Raises:
+        PermissionError: If the path is a symlink, not a directory, or owned by another user.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory.")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user.")
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def default_private_directory(name):
+    """
+    Private per-user directory `name` in the system temp dir, kept across restarts.
+
+    Falls back to a new `mkdtemp` directory when that path exists but is not
+    private to the current user, e.g. because another user created it first.
+    """
+    suffix = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    path = os.path.join(tempfile.gettempdir(), f"{name}-{suffix}")
+    try:
+        return private_directory(path)
+    except PermissionError as e:
+        logger.warning(f"Not using {path}: {e} Using a new temporary directory instead.")
+        return tempfile.mkdtemp(prefix=f"{name}-")
@@ -0,0 +1,75 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from src.utils.constants import RENDER_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def chart_key(charts, n_cols):
+    """Hash of a chart grid's code and rasters, so the same code plotted over changed data gets a new key."""
+    digest = hashlib.sha256(str(n_cols).encode())
+    for chart in charts:
+        digest.update(b"\x1f" + (chart.code or "").encode())
+        digest.update(b"\x1e" + (chart.raster or "").encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    LRU cache of rendered chart images (PNG bytes), bounded by entries and total bytes.
+
+    Args:
+        max_entries (int): Images kept.
+        max_bytes (int): Total size of the kept images.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._bytes += len(image)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Return the process-wide render cache, creating it on first use."""
+    global _render_cache
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                _render_cache = RenderCache(**RENDER_CACHE_CONFIG)
+    return _render_cache
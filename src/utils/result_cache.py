@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import pickle
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from src.utils.constants import RESULT_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+TABLE_PATTERN = re.compile(r"\b(?:from|join)\s+((?:[`\"\[]?\w+[`\"\]]?\.)*[`\"\[]?\w+[`\"\]]?)", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    """Collapse whitespace and drop a trailing semicolon so formatting differences share a key."""
+    return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+
+def referenced_tables(query):
+    """Return the lowercase names of the tables a query reads from."""
+    return {match.split(".")[-1].strip('`"[]').lower() for match in TABLE_PATTERN.findall(query)}
+
+
+def is_cacheable(query):
+    """Only read-only statements are cached."""
+    return re.match(r"\s*(select|with)\b", query, re.IGNORECASE) is not None
+
+
+class ResultCache:
+    """
+    LRU cache of executed query results, bounded by total bytes.
+
+    Values are pickled and zlib-compressed, which keeps them far smaller than
+    the live row tuples and makes their size measurable. Each entry has a TTL and
+    remembers the tables it read, so appending to a table drops only the results
+    that depend on it.
+
+    Args:
+        max_bytes (int): Total compressed size the cache may hold.
+        ttl (float): Default seconds an entry stays valid.
+        max_entry_bytes (int): Larger results are not cached.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=300, max_entry_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0, "oversized": 0}
+
+    @staticmethod
+    def make_key(query, scope, variant=""):
+        return hashlib.sha256(f"{scope}\x1f{variant}\x1f{normalize_sql(query)}".encode()).hexdigest()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry["blob"])
+
+    def get(self, query, scope, variant=""):
+        """
+        Return the cached result of a query, or None.
+
+        Args:
+            query (str): SQL text.
+            scope (str): Identifies the database the query ran against.
+            variant (str): Tells apart results of the same query fetched differently, e.g. with other row caps.
+        """
+        key = self.make_key(query, scope, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry["expires_at"] < time.time():
+                self._drop(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            blob = entry["blob"]
+        return pickle.loads(zlib.decompress(blob))
+
+    def put(self, query, scope, value, ttl=None, variant=""):
+        """
+        Cache the result of a read-only query.
+
+        Args:
+            query (str): SQL text.
+            scope (str): Identifies the database the query ran against.
+            value: Picklable result, e.g. `(data, column_names)`.
+            ttl (float, optional): Seconds the entry stays valid.
+            variant (str): Tells apart results of the same query fetched differently, e.g. with other row caps.
+
+        Returns:
+            bool: Whether the result was cached.
+        """
+        if not is_cacheable(query):
+            return False
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        if len(blob) > min(self.max_entry_bytes, self.max_bytes):
+            with self._lock:
+                self._stats["oversized"] += 1
+            return False
+
+        key = self.make_key(query, scope, variant)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "blob": blob,
+                "scope": scope,
+                "tables": referenced_tables(query),
+                "expires_at": time.time() + (self.ttl if ttl is None else ttl),
+            }
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def invalidate_table(self, scope, table_name):
+        """Drop results of a database that read from a table (or whose tables are unknown)."""
+        table_name = table_name.lower()
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry["scope"] == scope and (table_name in entry["tables"] or not entry["tables"])]
+            for key in stale:
+                self._drop(key)
+            self._stats["invalidations"] += len(stale)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached results reading from '{table_name}'.")
+
+    def clear(self, scope=None):
+        """Drop every entry, or every entry of one database."""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if scope is None or entry["scope"] == scope]:
+                self._drop(key)
+
+    def stats(self):
+        """
+        Report cache effectiveness and size.
+
+        Returns:
+            dict: Hit/miss/eviction counters, entry count, bytes used and hit rate.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide result cache, creating it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(**RESULT_CACHE_CONFIG)
+    return _result_cache
@@ -0,0 +1,127 @@
+import logging
+import numpy as np
+import pandas as pd
+from src.utils.constants import RESULT_DIGEST_CONFIG
+from src.utils.text_index import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value):
+    if isinstance(value, (float, np.floating)):
+        return "null" if np.isnan(value) else f"{value:.10g}"
+    return str(value)
+
+
+def _render_rows(df):
+    return df.to_csv(index=False, lineterminator="\n").rstrip("\n")
+
+
+def column_stats(df):
+    """
+    Describe every column in one line each: dtype, null count and either numeric
+    range/mean/sum, time range, or the number of distinct values with the most
+    frequent ones.
+    """
+    nulls = df.isna().sum().to_numpy()
+    lines = []
+    for position, name in enumerate(df.columns):
+        # By position, so columns sharing a name each get their own stats
+        series = df.iloc[:, position]
+        line = f"- {name} ({series.dtype}, {nulls[position]} nulls): "
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            stats = series.agg(["min", "max", "mean", "sum"])
+            line += ", ".join(f"{stat} {_format_value(stats[stat])}" for stat in ("min", "max", "mean", "sum"))
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            line += f"from {series.min()} to {series.max()}"
+        else:
+            counts = series.value_counts(dropna=True)
+            top = ", ".join(f"{value} ({count})" for value, count in counts.head(3).items())
+            line += f"{len(counts)} distinct; most frequent: {top}"
+        lines.append(line)
+    return lines
+
+
+def group_summary(df, max_groups=10, max_cardinality=50):
+    """
+    Aggregate the numeric columns by the first low-cardinality text column.
+
+    Returns:
+        str: A CSV of the largest groups with their row count, sums and means, or
+        an empty string when the result has no suitable grouping column.
+    """
+    if df.columns.has_duplicates:
+        return ""
+    numeric = [name for name in df.select_dtypes(include="number").columns
+               if not pd.api.types.is_bool_dtype(df[name].dtype)]
+    for name in df.columns:
+        series = df[name]
+        if not (isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object):
+            continue
+        if series.nunique() > max_cardinality or series.nunique() == len(series):
+            continue
+        grouped = df.groupby(name, observed=True, sort=False)
+        summary = grouped.size().rename("rows").to_frame()
+        if numeric:
+            aggregated = grouped[[column for column in numeric if column != name]].agg(["sum", "mean"])
+            aggregated.columns = [f"{column}_{stat}" for column, stat in aggregated.columns]
+            summary = summary.join(aggregated)
+        summary = summary.sort_values("rows", ascending=False).head(max_groups)
+        return f"By {name} (largest {len(summary)} of {series.nunique()} groups):\n" + \
+            summary.reset_index().to_csv(index=False, float_format="%.10g", lineterminator="\n").rstrip("\n")
+    return ""
+
+
+def digest_result(df, token_budget=None, top_k=None):
+    """
+    Render a query result for the answer prompt within a token budget.
+
+    Results that fit the budget are passed through as CSV. Larger ones become a
+    digest: the row count, per-column statistics, group summaries over a
+    low-cardinality column and the first rows of the result (which carry the
+    query's ORDER BY), with the sample shrunk and the group summary dropped as
+    needed to fit.
+
+    Args:
+        df (DataFrame): The query result.
+        token_budget (int, optional): Maximum estimated tokens. Defaults to RESULT_DIGEST_CONFIG.
+        top_k (int, optional): Rows included in a digest. Defaults to RESULT_DIGEST_CONFIG.
+
+    Returns:
+        str: The rows or their digest.
+    """
+    try:
+        token_budget = token_budget or RESULT_DIGEST_CONFIG["token_budget"]
+        top_k = top_k or RESULT_DIGEST_CONFIG["top_k"]
+        if df.shape[1] == 0:
+            return "The query returned no columns."
+        if len(df) == 0:
+            return "The query returned no rows. Columns: " + ", ".join(map(str, df.columns))
+
+        # Every cell renders to at least two characters, which bounds what can fit before rendering
+        if len(df) * df.shape[1] * 2 <= token_budget * 4:
+            rows = _render_rows(df)
+            if estimate_tokens(rows) <= token_budget:
+                return rows
+
+        header = f"The query returned {len(df):,} rows and {df.shape[1]} columns; only a digest is shown."
+        stats = "Columns:\n" + "\n".join(column_stats(df))
+        groups = group_summary(df, max_groups=RESULT_DIGEST_CONFIG["max_groups"])
+        while True:
+            sample = f"First {min(top_k, len(df))} rows:\n" + _render_rows(df.head(top_k)) if top_k else ""
+            digest = "\n\n".join(part for part in (header, stats, groups, sample) if part)
+            if estimate_tokens(digest) <= token_budget:
+                break
+            if top_k > 1:
+                top_k //= 2
+            elif groups:
+                groups, top_k = "", RESULT_DIGEST_CONFIG["top_k"]
+            else:
+                # Wide results: keep as many column lines as fit
+                digest = digest[:token_budget * 4]
+                break
+        logger.info(f"Digested {len(df)} result rows into {estimate_tokens(digest)} tokens.")
+        return digest
+    except Exception as e:
+        logger.error(f"Error digesting query result: {e}")
+        raise
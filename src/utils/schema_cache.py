@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from sqlalchemy import inspect
+from src.utils.constants import SCHEMA_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Cheap catalog queries whose output changes whenever a table or column does
+CATALOG_QUERIES = {
+    "postgresql": (
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() ORDER BY table_name, ordinal_position"
+    ),
+    "mysql": (
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() ORDER BY table_name, ordinal_position"
+    ),
+    "sqlite": (
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ),
+}
+
+
+class SchemaCache:
+    """
+    Cache of the schema context handed to the SQL generation prompts.
+
+    Entries are keyed by database and validated against a catalog fingerprint
+    (a hash of every table and column name and type). Within `ttl` seconds an
+    entry is served without touching the database; after that only the cheap
+    fingerprint query runs, and the full context (DDL plus sample rows per table)
+    is rebuilt only when the fingerprint changed or the entry was invalidated.
+
+    Args:
+        ttl (float): Seconds an entry is trusted before its fingerprint is rechecked.
+        cache_dir (str, optional): Directory to persist entries in, so a fresh
+            process can serve the schema without querying the database.
+        sample_rows_in_table_info (int): Sample rows included per table.
+    """
+
+    def __init__(self, ttl=300, cache_dir=None, sample_rows_in_table_info=3):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.sample_rows_in_table_info = sample_rows_in_table_info
+        self._entries = {}
+        self._catalogs = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(engine):
+        return engine.url.render_as_string(hide_password=True)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"schema_{digest}.json")
+
+    def _load(self, key):
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key)) as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schema cache file: {e}")
+            return None
+
+    def _save(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def _read_catalog(self, engine):
+        """Return the catalog fingerprint and the table names it covers."""
+        query = CATALOG_QUERIES.get(engine.dialect.name)
+        if query:
+            with engine.connect() as conn:
+                rows = [tuple(str(value) for value in row) for row in conn.exec_driver_sql(query)]
+        else:
+            inspector = inspect(engine)
+            rows = [(table, column["name"], str(column["type"]))
+                    for table in inspector.get_table_names()
+                    for column in inspector.get_columns(table)]
+        fingerprint = hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+        table_names = sorted({row[0] for row in rows})
+        return fingerprint, table_names
+
+    def catalog(self, engine):
+        """
+        Return the catalog fingerprint and table names, rechecked at most every `ttl` seconds.
+
+        Args:
+            engine (Engine): SQLAlchemy engine of the database.
+
+        Returns:
+            dict: `fingerprint`, `table_names` and `checked_at`.
+        """
+        key = self._key(engine)
+        catalog = self._catalogs.get(key)
+        if catalog and time.time() - catalog["checked_at"] < self.ttl:
+            return catalog
+        with self._key_lock(f"catalog:{key}"):
+            catalog = self._catalogs.get(key)
+            if catalog and time.time() - catalog["checked_at"] < self.ttl:
+                return catalog
+            fingerprint, table_names = self._read_catalog(engine)
+            catalog = {"fingerprint": fingerprint, "table_names": table_names, "checked_at": time.time()}
+            self._catalogs[key] = catalog
+            return catalog
+
+    def table_names(self, engine):
+        """Return the table names of the database."""
+        return self.catalog(engine)["table_names"]
+
+    def _build(self, engine, fingerprint):
+        logger.info("Building schema context...")
+        start = time.perf_counter()
+        from langchain_community.utilities import SQLDatabase
+        db = SQLDatabase(engine, sample_rows_in_table_info=self.sample_rows_in_table_info,
+                         lazy_table_reflection=True)
+        inspector = inspect(engine)
+        tables = {}
+        for table_name in db.get_usable_table_names():
+            try:
+                comment = inspector.get_table_comment(table_name).get("text")
+            except NotImplementedError:
+                comment = None
+            tables[table_name] = {
+                "columns": [{"name": column["name"], "type": str(column["type"]),
+                             "comment": column.get("comment")}
+                            for column in inspector.get_columns(table_name)],
+                "foreign_keys": [{"columns": fk["constrained_columns"], "referred_table": fk["referred_table"],
+                                  "referred_columns": fk["referred_columns"]}
+                                 for fk in inspector.get_foreign_keys(table_name)],
+                "comment": comment,
+                "info": db.get_table_info_no_throw([table_name]),
+            }
+        entry = {
+            "fingerprint": fingerprint,
+            "dialect": engine.dialect.name,
+            "table_names": list(tables),
+            "table_info": "\n\n".join(table["info"] for table in tables.values()),
+            "tables": tables,
+            "built_at": time.time(),
+            "checked_at": time.time(),
+        }
+        logger.info(f"Schema context for {len(tables)} tables built in {time.perf_counter() - start:.3f}s.")
+        return entry
+
+    def get_context(self, engine):
+        """
+        Return the schema context for a database.
+
+        Args:
+            engine (Engine): SQLAlchemy engine of the database.
+
+        Returns:
+            dict: `fingerprint`, `table_names`, the combined `table_info` and per-table
+            details under `tables` (columns, foreign keys, comment and info text).
+        """
+        key = self._key(engine)
+        entry = self._entries.get(key)
+        if entry and time.time() - entry["checked_at"] < self.ttl:
+            return entry
+
+        with self._key_lock(key):
+            entry = self._entries.get(key) or self._load(key)
+            if entry and time.time() - entry["checked_at"] < self.ttl:
+                self._entries[key] = entry
+                return entry
+
+            fingerprint = self.catalog(engine)["fingerprint"]
+            if entry and entry["fingerprint"] == fingerprint:
+                entry["checked_at"] = time.time()
+            else:
+                entry = self._build(engine, fingerprint)
+            self._entries[key] = entry
+            self._save(key, entry)
+            return entry
+
+    def fingerprint(self, engine):
+        """Return the fingerprint of the cached schema context."""
+        return self.get_context(engine)["fingerprint"]
+
+    def invalidate(self, engine=None):
+        """
+        Drop cached schema context so the next access rebuilds it.
+
+        Args:
+            engine (Engine, optional): Database to invalidate. Invalidates all if None.
+        """
+        with self._lock:
+            keys = [self._key(engine)] if engine is not None else list(set(self._entries) | set(self._catalogs))
+            for key in keys:
+                self._entries.pop(key, None)
+                self._catalogs.pop(key, None)
+                if self.cache_dir and os.path.exists(self._path(key)):
+                    os.remove(self._path(key))
+            if engine is None and self.cache_dir:
+                for file_name in os.listdir(self.cache_dir):
+                    if file_name.startswith("schema_") and file_name.endswith(".json"):
+                        os.remove(os.path.join(self.cache_dir, file_name))
+        logger.info(f"Invalidated schema context for {len(keys)} database(s).")
+
+
+_schema_cache = None
+_schema_cache_lock = threading.Lock()
+
+
+def get_schema_cache():
+    """Return the process-wide schema cache, creating it on first use."""
+    global _schema_cache
+    if _schema_cache is None:
+        with _schema_cache_lock:
+            if _schema_cache is None:
+                _schema_cache = SchemaCache(**SCHEMA_CACHE_CONFIG)
+    return _schema_cache
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from src.utils.constants import SCHEMA_SELECTION_CONFIG
+from src.utils.text_index import BM25Index, tokenize, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Number of schema indexes (one per schema fingerprint) kept in memory
+MAX_CACHED_INDEXES = 8
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _table_document(table_name, table):
+    """Text indexed for a table: its name (weighted), column names and comments."""
+    parts = [table_name] * 3
+    if table.get("comment"):
+        parts.append(table["comment"])
+    for column in table["columns"]:
+        parts.append(column["name"])
+        if column.get("comment"):
+            parts.append(column["comment"])
+    return " ".join(parts)
+
+
+def get_schema_index(schema_context):
+    """
+    Return the BM25 index and reverse foreign-key map of a schema context.
+
+    Indexes are cached by schema fingerprint, so they are built once per schema
+    version rather than once per question.
+
+    Args:
+        schema_context (dict): Entry returned by `SchemaCache.get_context`.
+
+    Returns:
+        tuple: (BM25Index over the tables, dict of table -> tables referencing it)
+    """
+    fingerprint = schema_context["fingerprint"]
+    with _indexes_lock:
+        if fingerprint in _indexes:
+            _indexes.move_to_end(fingerprint)
+            return _indexes[fingerprint]
+
+    index = BM25Index()
+    referrers = {}
+    for table_name, table in schema_context["tables"].items():
+        index.add(table_name, _table_document(table_name, table))
+        for fk in table["foreign_keys"]:
+            referrers.setdefault(fk["referred_table"], []).append(table_name)
+
+    with _indexes_lock:
+        _indexes[fingerprint] = (index, referrers)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index, referrers
+
+
+def _compact_table_info(table_name, table, question_terms, columns_only_matching=False):
+    """Render a table as a short CREATE TABLE without sample rows, optionally keeping only relevant columns."""
+    fk_columns = {column for fk in table["foreign_keys"] for column in fk["columns"]}
+    columns = []
+    for position, column in enumerate(table["columns"]):
+        matches = set(tokenize(column["name"])) & question_terms
+        if not columns_only_matching or position == 0 or column["name"] in fk_columns or matches:
+            columns.append(f"{column['name']} {column['type']}")
+    lines = columns + [
+        f"FOREIGN KEY({', '.join(fk['columns'])}) REFERENCES {fk['referred_table']}({', '.join(fk['referred_columns'])})"
+        for fk in table["foreign_keys"]
+    ]
+    return f"CREATE TABLE {table_name} (\n\t" + ",\n\t".join(lines) + "\n)"
+
+
+def select_schema(question, schema_context, top_k=None, token_budget=None):
+    """
+    Select the part of the schema relevant to a question.
+
+    Tables are ranked with BM25 over table names, column names and comments, the
+    top `top_k` are expanded with the tables they reference or are referenced by,
+    and the result is packed into `token_budget`: full table info (with sample rows)
+    where it fits, otherwise a compact CREATE TABLE, otherwise only the key,
+    foreign-key and question-matching columns. Schemas that already fit the budget
+    are passed through unchanged.
+
+    Args:
+        question (str): The user's question.
+        schema_context (dict): Entry returned by `SchemaCache.get_context`.
+        top_k (int, optional): Number of directly matching tables to keep.
+        token_budget (int, optional): Maximum estimated tokens of table info.
+
+    Returns:
+        dict: `table_info`, selected `table_names`, estimated `tokens` and
+        `full_tokens`, whether the schema was `pruned` and the `selection_seconds`.
+    """
+    start = time.perf_counter()
+    top_k = top_k or SCHEMA_SELECTION_CONFIG["top_k"]
+    token_budget = token_budget or SCHEMA_SELECTION_CONFIG["token_budget"]
+    full_tokens = estimate_tokens(schema_context["table_info"])
+    if full_tokens <= token_budget:
+        return {
+            "table_info": schema_context["table_info"],
+            "table_names": list(schema_context["table_names"]),
+            "tokens": full_tokens,
+            "full_tokens": full_tokens,
+            "pruned": False,
+            "selection_seconds": time.perf_counter() - start,
+        }
+
+    tables = schema_context["tables"]
+    index, referrers = get_schema_index(schema_context)
+    question_terms = set(tokenize(question))
+    hits = [table_name for table_name, _ in index.search(question, top_k=top_k)]
+    if not hits:
+        hits = list(tables)[:top_k]
+
+    candidates = list(hits)
+    for table_name in hits:
+        neighbours = [fk["referred_table"] for fk in tables[table_name]["foreign_keys"]]
+        neighbours += referrers.get(table_name, [])
+        candidates += [neighbour for neighbour in neighbours
+                       if neighbour in tables and neighbour not in candidates]
+
+    selected, parts, used = [], [], 0
+    for table_name in candidates:
+        table = tables[table_name]
+        for render in (lambda: table["info"],
+                       lambda: _compact_table_info(table_name, table, question_terms),
+                       lambda: _compact_table_info(table_name, table, question_terms, columns_only_matching=True)):
+            text = render()
+            tokens = estimate_tokens(text)
+            if used + tokens <= token_budget:
+                selected.append(table_name)
+                parts.append(text)
+                used += tokens
+                break
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Selected {len(selected)} of {len(tables)} tables ({used} of {full_tokens} tokens) "
+                f"in {elapsed * 1000:.1f}ms.")
+    return {
+        "table_info": "\n\n".join(parts),
+        "table_names": selected,
+        "tokens": used,
+        "full_tokens": full_tokens,
+        "pruned": True,
+        "selection_seconds": elapsed,
+    }
@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.utils.constants import SQL_CACHE_CONFIG
+from src.utils.helpers import clean_sql_query
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+def template_fingerprint(prompt_template):
+    """Hash the rendered prompt template so edits to its wording or examples change the key."""
+    rendered = prompt_template.format(input="", top_k="", table_info="")
+    # Examples chosen per question: any change to the example store changes the key
+    store = getattr(getattr(prompt_template, "example_selector", None), "store", None)
+    if store is not None:
+        rendered += "\x1f" + store.fingerprint()
+    return hashlib.sha256(rendered.encode()).hexdigest()
+
+
+class SQLCache:
+    """
+    Two-tier cache of generated SQL.
+
+    Keys combine the normalized question, the prompt template fingerprint, the
+    schema fingerprint and the database, so a schema change never serves stale
+    SQL; entries of superseded schema versions are purged the first time a new
+    fingerprint is seen. Lookups go to an in-memory LRU first, then to an
+    optional SQLite file bounded to `max_disk_entries` least recently used rows.
+
+    Args:
+        max_memory_entries (int): Entries kept in the in-memory LRU.
+        path (str, optional): SQLite file of the persistent tier. Memory only if None.
+        max_disk_entries (int): Entries kept in the persistent tier.
+    """
+
+    def __init__(self, max_memory_entries=512, path=None, max_disk_entries=10000):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sql_cache ("
+                "key TEXT PRIMARY KEY, scope TEXT, schema_fingerprint TEXT, question TEXT, "
+                "sql TEXT, created_at REAL, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sql_cache_last_used ON sql_cache (last_used)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(question, prompt_template, schema_fingerprint, scope=""):
+        parts = [normalize_question(question), template_fingerprint(prompt_template), schema_fingerprint, scope]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def _remember(self, key, sql, scope):
+        self._memory[key] = (sql, scope)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key):
+        """Return the cached SQL for a key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key][0]
+            if self._conn is not None:
+                row = self._conn.execute("SELECT sql, scope FROM sql_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._conn.execute("UPDATE sql_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    self._remember(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, sql, question="", schema_fingerprint="", scope=""):
+        """Store generated SQL in both tiers."""
+        with self._lock:
+            self._remember(key, sql, scope)
+            if self._conn is None:
+                return
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, schema_fingerprint, question, sql, now, now),
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM sql_cache").fetchone()[0] - self.max_disk_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM sql_cache WHERE key IN "
+                    "(SELECT key FROM sql_cache ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._stats["evictions"] += excess
+            self._conn.commit()
+
+    def observe_schema(self, scope, schema_fingerprint):
+        """Purge entries of a database generated against a different schema version."""
+        with self._lock:
+            if self._fingerprints.get(scope) == schema_fingerprint:
+                return
+            self._fingerprints[scope] = schema_fingerprint
+            # Memory entries of this scope were all generated before the change
+            stale = [key for key, (_, entry_scope) in self._memory.items() if entry_scope == scope]
+            for key in stale:
+                del self._memory[key]
+            if self._conn is not None:
+                deleted = self._conn.execute(
+                    "DELETE FROM sql_cache WHERE scope = ? AND schema_fingerprint != ?",
+                    (scope, schema_fingerprint),
+                ).rowcount
+                self._conn.commit()
+                if deleted:
+                    self._stats["invalidations"] += deleted
+                    logger.info(f"Purged {deleted} cached SQL entries for a changed schema.")
+
+    def get_or_generate(self, question, prompt_template, schema_fingerprint, generate, scope=""):
+        """
+        Return cached SQL for a question, generating and storing it on a miss.
+
+        Args:
+            question (str): The user's question.
+            prompt_template: Prompt template used for SQL generation.
+            schema_fingerprint (str): Fingerprint of the schema the SQL targets.
+            generate (callable): Produces cleaned SQL on a cache miss.
+            scope (str): Identifies the database.
+
+        Returns:
+            str: The cleaned SQL query.
+        """
+        self.observe_schema(scope, schema_fingerprint)
+        key = self.make_key(question, prompt_template, schema_fingerprint, scope)
+        sql = self.get(key)
+        if sql is not None:
+            logger.info("Using cached SQL query.")
+            return sql
+        sql = generate()
+        self.put(key, sql, question=question, schema_fingerprint=schema_fingerprint, scope=scope)
+        return sql
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM sql_cache")
+                self._conn.commit()
+
+    def stats(self):
+        """
+        Report hit and miss counters.
+
+        Returns:
+            dict: Counters, current sizes and the overall hit rate.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM sql_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def cached_sql_chain(chain, prompt_template, schema_fingerprint, scope="", cache=None):
+    """
+    Wrap a SQL generation chain so repeated questions are served from the cache.
+
+    Args:
+        chain: Chain returned by `create_sql_chain`.
+        prompt_template: The prompt template the chain was built with.
+        schema_fingerprint (str): Fingerprint of the current schema.
+        scope (str): Identifies the database.
+        cache (SQLCache, optional): Cache to use. Defaults to the process-wide cache.
+
+    Returns:
+        Runnable: Takes the same inputs as `chain` and returns cleaned SQL.
+    """
+    from langchain_core.runnables import RunnableLambda
+    cache = cache or get_sql_cache()
+
+    def generate(inputs):
+        return cache.get_or_generate(inputs["question"], prompt_template, schema_fingerprint,
+                                     lambda: clean_sql_query(chain.invoke(inputs)), scope=scope)
+
+    return RunnableLambda(generate)
+
+
+_sql_cache = None
+_sql_cache_lock = threading.Lock()
+
+
+def get_sql_cache():
+    """Return the process-wide SQL cache, creating it on first use."""
+    global _sql_cache
+    if _sql_cache is None:
+        with _sql_cache_lock:
+            if _sql_cache is None:
+                _sql_cache = SQLCache(**SQL_CACHE_CONFIG)
+    return _sql_cache
@@ -0,0 +1,123 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src.utils.constants import STAGE_CONFIG
+from src.utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class StageScheduler:
+    """
+    Run the stages of a pipeline on a thread pool as soon as their dependencies finish.
+
+    Stages are added with the names of the stages they require, which must have
+    been added before, so the stages always form an acyclic graph. A stage is
+    called with the results of its requirements as keyword arguments. Stages
+    without a dependency between them run concurrently, which pays off for the
+    I/O-bound work of the pipelines (LLM calls, database queries, client setup).
+    Each stage runs in a `<name>.<stage>` metrics span, in the caller's context so
+    its spans join the caller's trace.
+
+    Args:
+        max_workers (int, optional): Stages run at once. Defaults to STAGE_CONFIG.
+        name (str): Pipeline name, prefixing the stages' span names.
+    """
+
+    def __init__(self, max_workers=None, name="stages"):
+        self.max_workers = max_workers or STAGE_CONFIG["max_workers"]
+        self.name = name
+        self._stages = {}
+        self.timings = {}
+        self.wall_seconds = None
+
+    def add(self, name, function, requires=()):
+        """
+        Add a stage.
+
+        Args:
+            name (str): Stage name, also the keyword its result is passed as.
+            function (callable): Called with the results of `requires` as keyword arguments.
+            requires (iterable): Names of previously added stages this stage needs.
+
+        Returns:
+            StageScheduler: The scheduler, for chaining.
+
+        Raises:
+            ValueError: If the name is taken or a requirement was not added yet.
+        """
+        requires = tuple(requires)
+        unknown = [required for required in requires if required not in self._stages]
+        if name in self._stages or unknown:
+            raise ValueError(f"Cannot add stage '{name}': duplicate name or unknown requirements {unknown}.")
+        self._stages[name] = (function, requires)
+        return self
+
+    def _timed(self, name, function, kwargs, origin):
+        start = time.perf_counter()
+        with span(f"{self.name}.{name}"):
+            result = function(**kwargs)
+        end = time.perf_counter()
+        return result, {"start": start - origin, "seconds": end - start}
+
+    def run(self, on_result=None):
+        """
+        Run every stage.
+
+        Args:
+            on_result (callable, optional): Called with the name and result of each stage
+                as it finishes, in the thread running the scheduler.
+
+        Returns:
+            dict: The result of each stage by name.
+
+        Raises:
+            Exception: The first exception raised by a stage; stages that have not
+                started yet are skipped.
+        """
+        with span(self.name):
+            return self._run(on_result)
+
+    def _run(self, on_result):
+        pending = dict(self._stages)
+        results, timings, running = {}, {}, {}
+        origin = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        try:
+            while pending or running:
+                for name in [name for name, (_, requires) in pending.items()
+                             if all(required in results for required in requires)]:
+                    function, requires = pending.pop(name)
+                    kwargs = {required: results[required] for required in requires}
+                    running[pool.submit(contextvars.copy_context().run, self._timed, name, function, kwargs,
+                                        origin)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], timings[name] = future.result()
+                    if on_result is not None:
+                        on_result(name, results[name])
+        except Exception:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+        self.timings = timings
+        self.wall_seconds = time.perf_counter() - origin
+        return results
+
+    def report(self):
+        """
+        Per-stage timing breakdown of the last run.
+
+        Returns:
+            dict: `stages` (start offset and duration of each stage in seconds),
+            `wall_seconds` and `stage_seconds`, the sum of the stage durations,
+            which exceeds the wall time by what ran concurrently.
+        """
+        return {
+            "stages": {name: {key: round(value, 4) for key, value in timing.items()}
+                       for name, timing in sorted(self.timings.items(), key=lambda item: item[1]["start"])},
+            "wall_seconds": round(self.wall_seconds or 0.0, 4),
+            "stage_seconds": round(sum(timing["seconds"] for timing in self.timings.values()), 4),
+        }
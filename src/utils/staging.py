@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import pandas as pd
+from src.utils.constants import CSV_PROFILE_CONFIG, INGEST_CONFIG, STAGING_CONFIG
+from src.utils.csv_profile import ColumnProfile, rows_per_chunk, profile_csv
+from src.utils.ingest import ingest_csv, ingest_frames
+from src.utils.private_dir import default_private_directory, private_directory
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow.parquet  # noqa: F401
+    PART_FORMAT = "parquet"
+except ImportError:
+    # Without pyarrow, parts are plain CSV: slower to reload, but never unsafe to load
+    PART_FORMAT = "csv_parts"
+
+PART_READERS = {".parquet": pd.read_parquet, ".csv": pd.read_csv}
+
+STAGING_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def hash_file(file, block_size=1024 * 1024):
+    """SHA-256 of a file object's content, read in blocks; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(block_size), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _write_part(chunk, path):
+    if PART_FORMAT == "parquet":
+        try:
+            chunk.to_parquet(f"{path}.parquet", index=False)
+            return f"{os.path.basename(path)}.parquet"
+        except Exception as e:
+            # Mixed-type object columns cannot be written as parquet
+            logger.warning(f"Falling back to CSV for staged part {os.path.basename(path)}: {e}")
+    chunk.to_csv(f"{path}.csv", index=False)
+    return f"{os.path.basename(path)}.csv"
+
+
+def _read_part(path):
+    return PART_READERS[os.path.splitext(path)[1]](path)
+
+
+def _directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+class StagingArea:
+    """
+    Content-addressed store of uploaded CSV files between /api/describe_table,
+    /api/create_table and /api/upload_csv.
+
+    A file is keyed by the SHA-256 of its bytes. Staging it parses the CSV once,
+    in chunks, folding every chunk into the column profile and writing it as a
+    columnar part file, so later steps reload typed chunks instead of parsing the
+    CSV again, and staging a known file again only costs hashing it. Sampled
+    (fast) profiles keep a copy of the raw CSV instead of parsing all of it.
+
+    Entries expire `ttl` seconds after their last use and the least recently
+    used ones are removed while the area holds more than `max_bytes`. The root
+    must be private to the current user, since staged parts are loaded back as-is.
+
+    Args:
+        root (str): Directory holding the entries, created with mode 0700.
+        max_bytes (int): Total size the staged entries may take.
+        ttl (float): Seconds an unused entry is kept.
+    """
+
+    def __init__(self, root, max_bytes=2 * 1024 ** 3, ttl=24 * 3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        private_directory(root)
+
+    def _entry_dir(self, staging_id):
+        return os.path.join(self.root, staging_id)
+
+    def _load(self, staging_id, touch=True):
+        if not staging_id or not STAGING_ID_PATTERN.match(staging_id):
+            return None
+        path = os.path.join(self._entry_dir(staging_id), "entry.json")
+        try:
+            with open(path) as handle:
+                entry = json.load(handle)
+            stale = time.time() - os.path.getmtime(path) > self.ttl
+            # Entries staged in a format that is no longer read (e.g. pickled parts) are dropped
+            unreadable = any(os.path.splitext(part)[1] not in PART_READERS for part in entry["parts"])
+            if stale or unreadable:
+                self._remove(staging_id)
+                with self._lock:
+                    self._stats["expired"] += 1
+                return None
+            if touch:
+                os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry
+
+    def _remove(self, staging_id):
+        shutil.rmtree(self._entry_dir(staging_id), ignore_errors=True)
+
+    def get(self, staging_id):
+        """
+        Look up a staged entry.
+
+        Args:
+            staging_id (str): ID returned when the file was staged.
+
+        Returns:
+            dict: The entry (`id`, `format`, `header`, `parts`, `profile`, `bytes`), or None if unknown or expired.
+        """
+        entry = self._load(staging_id)
+        with self._lock:
+            self._stats["hits" if entry else "misses"] += 1
+        return entry
+
+    def find(self, file):
+        """Return the entry staged from a file with the same content, or None."""
+        return self.get(hash_file(file))
+
+    def stage(self, file, fast=False):
+        """
+        Stage a CSV file, or return the existing entry for the same content.
+
+        Args:
+            file: Readable, seekable binary CSV file object.
+            fast (bool): Profile a sample of large files and keep the raw CSV
+                instead of parsing all of it. An exact entry is reused for fast
+                requests, while an exact request upgrades a sampled entry.
+
+        Returns:
+            dict: The staged entry, with `cached` telling whether it already existed.
+        """
+        try:
+            staging_id = hash_file(file)
+            entry = self._load(staging_id)
+            if entry and (fast or entry["profile"]["exact"]):
+                with self._lock:
+                    self._stats["hits"] += 1
+                logger.info(f"Reusing staged upload {staging_id[:12]}.")
+                return dict(entry, cached=True)
+            with self._lock:
+                self._stats["misses"] += 1
+
+            start = time.perf_counter()
+            build_dir = os.path.join(self.root, f".tmp-{staging_id}-{uuid.uuid4().hex}")
+            os.makedirs(build_dir)
+            try:
+                entry = self._build(file, staging_id, build_dir, fast)
+                target = self._entry_dir(staging_id)
+                self._remove(staging_id)
+                try:
+                    os.rename(build_dir, target)
+                except OSError:
+                    # Another request staged the same content concurrently
+                    shutil.rmtree(build_dir, ignore_errors=True)
+            except Exception:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+            logger.info(f"Staged upload {staging_id[:12]} ({entry['format']}, {entry['bytes']:,} bytes) "
+                        f"in {time.perf_counter() - start:.2f}s.")
+            self.evict()
+            return dict(entry, cached=False)
+        except Exception as e:
+            logger.error(f"Error staging CSV file: {e}")
+            raise
+
+    def _build(self, file, staging_id, build_dir, fast):
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+        if fast and size > CSV_PROFILE_CONFIG["sample_bytes"]:
+            profile = profile_csv(file, fast=True)
+            file.seek(0)
+            header = pd.read_csv(file, nrows=0).columns.tolist()
+            file.seek(0)
+            with open(os.path.join(build_dir, "data.csv"), "wb") as handle:
+                shutil.copyfileobj(file, handle, 1024 * 1024)
+            data_format, parts, column_types = "csv", ["data.csv"], []
+        else:
+            # One parse: each chunk updates the profile and is written as a part
+            chunk_size = rows_per_chunk(file, CSV_PROFILE_CONFIG["chunk_bytes"])
+            profiles, parts = None, []
+            for number, chunk in enumerate(pd.read_csv(file, chunksize=chunk_size)):
+                if profiles is None:
+                    profiles = [ColumnProfile(name) for name in chunk.columns]
+                for position, column in enumerate(profiles):
+                    column.update(chunk.iloc[:, position])
+                parts.append(_write_part(chunk, os.path.join(build_dir, f"part-{number:05d}")))
+            profiles = profiles or []
+            header = [column.name for column in profiles]
+            profile = {
+                "column_info": [column.to_dict() for column in profiles],
+                "total_rows": profiles[0].rows if profiles else 0,
+                "total_columns": len(profiles),
+                "exact": True,
+            }
+            data_format = PART_FORMAT
+            # Column types merged over all chunks, used to give every part the same dtypes
+            column_types = [column.type for column in profiles]
+        entry = {
+            "id": staging_id,
+            "format": data_format,
+            "header": header,
+            "parts": parts,
+            "column_types": column_types,
+            "profile": profile,
+            "source_bytes": size,
+            "created": time.time(),
+        }
+        entry["bytes"] = _directory_bytes(build_dir)
+        with open(os.path.join(build_dir, "entry.json"), "w") as handle:
+            json.dump(entry, handle)
+        return entry
+
+    def iter_chunks(self, entry, chunk_size=None):
+        """
+        Yield the staged rows of a parsed entry in chunks of `chunk_size` rows
+        (default INGEST_CONFIG), reading one part at a time.
+
+        Integer columns whose part held NULLs (and was therefore read as float)
+        are returned as nullable integers, so every part carries the column type
+        of the whole file.
+        """
+        chunk_size = chunk_size or INGEST_CONFIG["chunk_size"]
+        column_types = entry["column_types"]
+        for part in entry["parts"]:
+            chunk = _read_part(os.path.join(self._entry_dir(entry["id"]), part))
+            for position, column_type in enumerate(column_types):
+                series = chunk.iloc[:, position]
+                if column_type == "int" and pd.api.types.is_float_dtype(series.dtype):
+                    chunk.isetitem(position, series.astype("Int64"))
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk.iloc[start:start + chunk_size]
+
+    def csv_path(self, entry):
+        """Path of the raw CSV kept by a sampled entry."""
+        return os.path.join(self._entry_dir(entry["id"]), "data.csv")
+
+    def ingest(self, entry, table_name, executor, method=None, progress_callback=None):
+        """
+        Load a staged file into an existing table, like `ingest_csv` but from the staged parts.
+
+        Args:
+            entry (dict): Entry returned by `stage` or `get`.
+            table_name (str): Existing table to append to.
+            executor (QueryExecutor): Executor of the target database.
+            method (str, optional): "copy", "insert" or "auto". Defaults to INGEST_CONFIG.
+            progress_callback (callable, optional): Called as `callback(rows, rows_per_second)` after each chunk.
+
+        Returns:
+            dict: The ingest report, with `staging_id`.
+        """
+        if entry["format"] == "csv":
+            with open(self.csv_path(entry), "rb") as handle:
+                report = ingest_csv(handle, table_name, executor, method=method, progress_callback=progress_callback)
+        else:
+            report = ingest_frames(entry["header"], self.iter_chunks(entry), table_name, executor,
+                                   method=method, progress_callback=progress_callback)
+        return dict(report, staging_id=entry["id"])
+
+    def evict(self):
+        """Remove expired entries, then the least recently used ones while over `max_bytes`."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name, "entry.json")
+                if name.startswith(".tmp-") or not os.path.exists(path):
+                    continue
+                entries.append((os.path.getmtime(path), name, _directory_bytes(os.path.join(self.root, name))))
+            now = time.time()
+            total = sum(size for _, _, size in entries)
+            for last_used, name, size in sorted(entries):
+                expired = now - last_used > self.ttl
+                if not expired and total <= self.max_bytes:
+                    break
+                self._remove(name)
+                total -= size
+                self._stats["expired" if expired else "evictions"] += 1
+            return total
+
+    def stats(self):
+        total = self.evict()
+        with self._lock:
+            entries = sum(1 for name in os.listdir(self.root) if STAGING_ID_PATTERN.match(name))
+            return {**self._stats, "entries": entries, "bytes": total, "max_bytes": self.max_bytes,
+                    "format": PART_FORMAT}
+
+
+_staging_area = None
+_staging_area_lock = threading.Lock()
+
+
+def get_staging_area():
+    """Return the process-wide staging area configured by STAGING_CONFIG."""
+    global _staging_area
+    if _staging_area is None:
+        with _staging_area_lock:
+            if _staging_area is None:
+                _staging_area = StagingArea(
+                    STAGING_CONFIG["dir"] or default_private_directory("eda_staging"),
+                    max_bytes=STAGING_CONFIG["max_bytes"],
+                    ttl=STAGING_CONFIG["ttl"],
+                )
+    return _staging_area
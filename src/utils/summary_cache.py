@@ -0,0 +1,237 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.utils.constants import SUMMARY_CACHE_CONFIG
+from src.utils.private_dir import default_private_directory, private_directory
+
+logger = logging.getLogger(__name__)
+
+
+def dataframe_fingerprint(df, max_rows=None):
+    """
+    Fast content fingerprint of a DataFrame: its column names, dtypes and shape,
+    plus a hash of every row, or of `max_rows` evenly spaced rows (including the
+    first and last) for larger frames.
+
+    Args:
+        df (DataFrame): The data.
+        max_rows (int, optional): Rows hashed at most. Defaults to SUMMARY_CACHE_CONFIG.
+
+    Returns:
+        str: Hex digest.
+    """
+    max_rows = max_rows or SUMMARY_CACHE_CONFIG["fingerprint_rows"]
+    digest = hashlib.sha256()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode())
+    digest.update(repr(df.shape).encode())
+    rows = df if len(df) <= max_rows else df.iloc[np.linspace(0, len(df) - 1, max_rows).astype(np.int64)]
+    try:
+        hashes = pd.util.hash_pandas_object(rows, index=False)
+    except TypeError:
+        # Unhashable cell values (e.g. lists from JSON columns)
+        hashes = pd.util.hash_pandas_object(rows.astype(str), index=False)
+    digest.update(hashes.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _exact_ranges(summary, data):
+    """Replace a sampled summary's numeric and date ranges with those of the full frame, which are cheap to compute."""
+    for position, field in enumerate(summary.get("fields", [])):
+        properties = field["properties"]
+        series = data.iloc[:, position]
+        if properties.get("dtype") == "number":
+            cast = float if pd.api.types.is_float_dtype(series.dtype) else int
+            properties["min"], properties["max"] = cast(series.min()), cast(series.max())
+            properties["std"] = cast(series.std())
+        elif properties.get("dtype") == "date" and pd.api.types.is_datetime64_any_dtype(series.dtype):
+            properties["min"], properties["max"] = series.min(), series.max()
+
+
+def _json_default(value):
+    """JSON form of the non-JSON values in LIDA summaries: numpy scalars as numbers, dates and the rest as text."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def summary_key(fingerprint, summary_method, textgen_config, sample_rows):
+    """Cache key of a summary: the data, how it is summarized and, for LLM enrichment, by which model."""
+    model = (getattr(textgen_config, "model", None), getattr(textgen_config, "n", None),
+             getattr(textgen_config, "temperature", None))
+    return hashlib.sha256(f"{fingerprint}\x1f{summary_method}\x1f{model}\x1f{sample_rows}".encode()).hexdigest()
+
+
+class SummaryCache:
+    """
+    Two-level LRU cache of LIDA data summaries.
+
+    Summaries are kept in memory and, when `directory` is set, written to disk
+    as JSON so they survive restarts. Both levels hold the JSON form of the
+    summary (dates as text), so a summary reads the same from either. Both levels
+    are bounded by entry count; the disk level drops its least recently used files.
+
+    Args:
+        directory (str, optional): Directory of the disk level, created private to
+            the current user; memory only if None.
+        max_entries (int): Summaries kept in memory.
+        max_disk_entries (int): Summaries kept on disk.
+    """
+
+    def __init__(self, directory=None, max_entries=64, max_disk_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if directory:
+            private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy.deepcopy(self._entries[key])
+        summary = None
+        if self.directory:
+            try:
+                with open(self._path(key)) as handle:
+                    summary = json.load(handle)
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cached summary {key[:12]}: {e}")
+        with self._lock:
+            if summary is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, summary)
+        return copy.deepcopy(summary)
+
+    def _remember(self, key, summary):
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def put(self, key, summary):
+        text = json.dumps(summary, default=_json_default)
+        summary = json.loads(text)
+        with self._lock:
+            self._remember(key, summary)
+        if not self.directory:
+            return
+        try:
+            # Write then rename, so readers never see a partial file
+            with tempfile.NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False) as handle:
+                handle.write(text)
+            os.replace(handle.name, self._path(key))
+            self._prune_disk()
+        except Exception as e:
+            logger.warning(f"Could not persist summary {key[:12]}: {e}")
+
+    def _prune_disk(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+                with self._lock:
+                    self._stats["disk_evictions"] += 1
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            stats = {**self._stats, "entries": len(self._entries)}
+        if self.directory:
+            stats["disk_entries"] = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        return stats
+
+
+def cached_summarize(lida, data, summary_method="default", textgen_config=None, sample_rows=None, use_cache=True):
+    """
+    Summarize a DataFrame with LIDA, reusing the summary of identical data.
+
+    Frames longer than `sample_rows` are summarized from a seeded random sample
+    of that many rows, which bounds the summarizer's time (its per-column
+    datetime parsing, unique counts and samples). Numeric and date ranges are
+    then taken from the full frame, while unique counts stay those of the
+    sample, as the summary's description says. Either way `lida.data` is set to
+    the full frame, which the charts are plotted from.
+
+    Args:
+        lida (Manager): LIDA manager.
+        data (DataFrame): The data to summarize.
+        summary_method (str): LIDA summary method.
+        textgen_config (TextGenerationConfig, optional): Text generation settings for enrichment.
+        sample_rows (int, optional): Rows summarized at most; 0 summarizes everything.
+            Defaults to SUMMARY_CACHE_CONFIG.
+        use_cache (bool): Whether to look up and store the summary.
+
+    Returns:
+        dict: The LIDA summary.
+    """
+    try:
+        start = time.perf_counter()
+        sample_rows = SUMMARY_CACHE_CONFIG["sample_rows"] if sample_rows is None else sample_rows
+        sampled = bool(sample_rows) and len(data) > sample_rows
+        cache = get_summary_cache()
+        key = summary_key(dataframe_fingerprint(data), summary_method, textgen_config,
+                          sample_rows if sampled else 0)
+        summary = cache.get(key) if use_cache else None
+        if summary is None:
+            subset = data.sample(n=sample_rows, random_state=0).sort_index() if sampled else data
+            kwargs = {"textgen_config": textgen_config} if textgen_config is not None else {}
+            summary = lida.summarize(subset, summary_method=summary_method, **kwargs)
+            if sampled:
+                _exact_ranges(summary, data)
+                if not summary.get("dataset_description"):
+                    summary["dataset_description"] = (f"Unique counts and samples computed from a random sample of "
+                                                      f"{sample_rows:,} of {len(data):,} rows.")
+            if use_cache:
+                cache.put(key, summary)
+            logger.info(f"Summarized {len(subset):,} of {len(data):,} rows in {time.perf_counter() - start:.2f}s.")
+        else:
+            logger.info(f"Reused cached summary of {len(data):,} rows ({time.perf_counter() - start:.2f}s).")
+        # Charts are plotted from lida.data, which must be the full frame
+        lida.data = data
+        return summary
+    except Exception as e:
+        logger.error(f"Error summarizing data: {e}")
+        raise
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Return the process-wide summary cache, creating it on first use."""
+    global _summary_cache
+    if _summary_cache is None:
+        with _summary_cache_lock:
+            if _summary_cache is None:
+                _summary_cache = SummaryCache(
+                    directory=SUMMARY_CACHE_CONFIG["dir"] or default_private_directory("eda_summaries"),
+                    max_entries=SUMMARY_CACHE_CONFIG["max_entries"],
+                    max_disk_entries=SUMMARY_CACHE_CONFIG["max_disk_entries"],
+                )
+    return _summary_cache
@@ -0,0 +1,126 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+# Words that carry no signal for matching questions to tables or examples
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "list", "me", "many", "much", "of", "on", "or", "show", "that", "the", "their", "there", "this",
+    "to", "was", "what", "when", "where", "which", "who", "with", "all", "each", "per", "give", "find",
+}
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+
+    Identifiers are split on snake_case and camelCase boundaries and a trailing
+    plural "s" is dropped, so "orderItems" and "order_item" both give
+    ["order", "item"].
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "")
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def estimate_tokens(text):
+    """Approximate the LLM token count of a text (about four characters per token)."""
+    return len(text or "") // 4 + 1
+
+
+class BM25Index:
+    """
+    In-memory BM25 index over short documents with incremental add and remove.
+
+    Args:
+        k1 (float): Term frequency saturation.
+        b (float): Document length normalization.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id, text):
+        """
+        Index a document, replacing any document with the same id.
+
+        Args:
+            doc_id: Hashable document id.
+            text (str | list): Document text, or a list of pre-tokenized terms.
+        """
+        terms = Counter(tokenize(text) if isinstance(text, str) else text)
+        with self._lock:
+            self._remove(doc_id)
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            length = sum(terms.values())
+            self._doc_terms[doc_id] = list(terms)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def _remove(self, doc_id):
+        if doc_id not in self._doc_lengths:
+            return False
+        for term in self._doc_terms.pop(doc_id):
+            docs = self._postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def remove(self, doc_id):
+        """Remove a document. Returns False if it was not indexed."""
+        with self._lock:
+            return self._remove(doc_id)
+
+    def search(self, query, top_k=None):
+        """
+        Rank documents against a query.
+
+        Args:
+            query (str | list): Query text, or a list of pre-tokenized terms.
+            top_k (int, optional): Number of results to return. Returns all matches if None.
+
+        Returns:
+            list: (doc_id, score) pairs, best first. Documents sharing no term with
+            the query are not returned.
+        """
+        terms = set(tokenize(query) if isinstance(query, str) else query)
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs or 1
+            scores = {}
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        if top_k:
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+# The app is run from the repository root, which makes `src` and `benchmarks` importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sales_db(tmp_path):
+    """URI of a seeded SQLite sales table (region, amount) with 200 rows."""
+    from benchmarks.fakes import seed_database
+    path = tmp_path / "sales.db"
+    seed_database(str(path), rows=200)
+    return f"sqlite:///{path}"
@@ -0,0 +1,157 @@
+import base64
+import io
+import os
+import stat
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from langchain_core.prompts import PromptTemplate
+from PIL import Image
+from src.utils.edit_cache import EditCache, edit_key
+from src.utils.helpers import render_charts
+from src.utils.render_cache import RenderCache
+from src.utils.result_cache import ResultCache, referenced_tables
+from src.utils.sql_cache import SQLCache
+from src.utils.summary_cache import SummaryCache, dataframe_fingerprint
+
+PROMPT = PromptTemplate.from_template("{table_info}\n{top_k}\n{input}")
+
+
+class TestResultCache:
+    def test_round_trip(self):
+        cache = ResultCache()
+        assert cache.put("SELECT * FROM sales", "db", ([(1, "east")], ["id", "region"]))
+        assert cache.get("SELECT *\n  FROM sales;", "db") == ([(1, "east")], ["id", "region"])
+        assert cache.get("SELECT * FROM sales", "other") is None
+
+    def test_only_queries_are_cached(self):
+        cache = ResultCache()
+        assert not cache.put("DELETE FROM sales", "db", ([], []))
+        assert cache.get("DELETE FROM sales", "db") is None
+
+    def test_variants_are_kept_apart(self):
+        cache = ResultCache()
+        cache.put("SELECT * FROM sales", "db", "capped", variant="stream:10")
+        assert cache.get("SELECT * FROM sales", "db") is None
+        assert cache.get("SELECT * FROM sales", "db", "stream:10") == "capped"
+
+    def test_invalidating_a_table_drops_every_variant_reading_it(self):
+        cache = ResultCache()
+        cache.put("SELECT * FROM sales", "db", "whole")
+        cache.put("SELECT * FROM sales", "db", "capped", variant="stream:10")
+        cache.put("SELECT * FROM regions", "db", "regions")
+        cache.invalidate_table("db", "SALES")
+        assert cache.get("SELECT * FROM sales", "db") is None
+        assert cache.get("SELECT * FROM sales", "db", "stream:10") is None
+        assert cache.get("SELECT * FROM regions", "db") == "regions"
+
+    def test_evicts_least_recently_used_beyond_max_bytes(self):
+        cache = ResultCache(max_bytes=4000)
+        rng = np.random.default_rng(0)
+        for i in range(5):
+            cache.put(f"SELECT * FROM t{i}", "db", rng.bytes(1500))
+        assert cache.get("SELECT * FROM t0", "db") is None
+        assert cache.get("SELECT * FROM t4", "db") is not None
+        assert cache.stats()["evictions"] >= 3
+
+    def test_referenced_tables(self):
+        query = 'SELECT * FROM public."Sales" s JOIN regions r ON r.id = s.region_id'
+        assert referenced_tables(query) == {"sales", "regions"}
+
+
+class TestSQLCache:
+    def test_trivial_variants_of_a_question_share_sql(self):
+        cache, generated = SQLCache(), []
+        generate = lambda: generated.append(1) or "SELECT 1"  # noqa: E731
+        assert cache.get_or_generate("How many sales?", PROMPT, "v1", generate, scope="db") == "SELECT 1"
+        assert cache.get_or_generate("  how many SALES ", PROMPT, "v1", generate, scope="db") == "SELECT 1"
+        assert len(generated) == 1
+
+    def test_schema_change_purges_older_sql(self, tmp_path):
+        cache = SQLCache(path=str(tmp_path / "sql.db"))
+        cache.get_or_generate("How many sales?", PROMPT, "v1", lambda: "SELECT 1", scope="db")
+        cache.get_or_generate("How many sales?", PROMPT, "v2", lambda: "SELECT 2", scope="db")
+        assert cache.stats()["disk_entries"] == 1
+        assert cache.get(SQLCache.make_key("How many sales?", PROMPT, "v1", "db")) is None
+
+    def test_disk_tier_survives_restarts(self, tmp_path):
+        path = str(tmp_path / "sql.db")
+        SQLCache(path=path).get_or_generate("How many sales?", PROMPT, "v1", lambda: "SELECT 1", scope="db")
+        restarted = SQLCache(path=path)
+        assert restarted.get(SQLCache.make_key("How many sales?", PROMPT, "v1", "db")) == "SELECT 1"
+        assert restarted.stats()["disk_hits"] == 1
+
+
+class TestSummaryCache:
+    def test_summaries_persist_as_json(self, tmp_path):
+        directory = str(tmp_path / "summaries")
+        summary = {"fields": [{"column": "amount", "properties": {"min": np.int64(1), "max": 2.5}},
+                              {"column": "day", "properties": {"min": pd.Timestamp("2024-01-01")}}]}
+        SummaryCache(directory).put("key", summary)
+
+        assert os.listdir(directory) == ["key.json"]
+        loaded = SummaryCache(directory).get("key")
+        assert loaded["fields"][0]["properties"] == {"min": 1, "max": 2.5}
+        assert loaded["fields"][1]["properties"]["min"] == "2024-01-01 00:00:00"
+
+    def test_directory_is_private(self, tmp_path):
+        directory = tmp_path / "summaries"
+        directory.mkdir(mode=0o777)
+        SummaryCache(str(directory))
+        assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+    def test_symlinked_directory_is_refused(self, tmp_path):
+        (tmp_path / "elsewhere").mkdir()
+        (tmp_path / "summaries").symlink_to(tmp_path / "elsewhere")
+        with pytest.raises(PermissionError):
+            SummaryCache(str(tmp_path / "summaries"))
+
+    def test_returns_copies(self):
+        cache = SummaryCache()
+        cache.put("key", {"fields": []})
+        cache.get("key")["fields"].append("changed")
+        assert cache.get("key") == {"fields": []}
+
+    def test_fingerprint_follows_content(self):
+        df = pd.DataFrame({"a": range(10), "b": list("abcdefghij")})
+        assert dataframe_fingerprint(df) == dataframe_fingerprint(df.copy())
+        changed = df.copy()
+        changed.loc[5, "a"] = 99
+        assert dataframe_fingerprint(changed) != dataframe_fingerprint(df)
+
+
+class TestEditCache:
+    def test_lru(self):
+        cache = EditCache(max_entries=2)
+        keys = [edit_key(f"code {i}", ["make it blue"], "seaborn") for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, f"edited {i}")
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) == "edited 2"
+
+
+class TestRenderCharts:
+    @staticmethod
+    def chart(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+        return SimpleNamespace(code=f"# {color}", raster=base64.b64encode(buffer.getvalue()).decode("ascii"))
+
+    def test_single_chart_is_passed_through_without_the_cache(self, monkeypatch):
+        cache = RenderCache()
+        monkeypatch.setattr("src.utils.helpers.get_render_cache", lambda: cache)
+        chart = self.chart("red")
+
+        assert render_charts(chart) == base64.b64decode(chart.raster)
+        assert cache.stats()["entries"] == 0 and cache.stats()["misses"] == 0
+
+    def test_grids_are_cached(self, monkeypatch):
+        cache = RenderCache()
+        monkeypatch.setattr("src.utils.helpers.get_render_cache", lambda: cache)
+        charts = [self.chart("red"), self.chart("blue"), self.chart("green")]
+
+        image = render_charts(charts, n_cols=2)
+        assert Image.open(io.BytesIO(image)).size == (80, 60)
+        assert render_charts(charts, n_cols=2) == image
+        assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 1
@@ -0,0 +1,56 @@
+import io
+import numpy as np
+import pandas as pd
+from src.utils.csv_profile import profile_csv
+
+
+def csv_file(df):
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+def by_name(profile):
+    return {column["name"]: column for column in profile["column_info"]}
+
+
+def test_exact_profile_merges_chunks():
+    df = pd.DataFrame({
+        "id": range(1000),
+        "price": [0.125 if i == 500 else float(i % 7) for i in range(1000)],
+        "city": ["Berlin" if i % 2 else "Rome" for i in range(1000)],
+        "seen": pd.date_range("2024-01-01", periods=1000, freq="h").strftime("%Y-%m-%dT%H:%M:%S"),
+        "note": [None if i % 10 else "x" for i in range(1000)],
+    })
+    profile = profile_csv(csv_file(df), chunk_size=128)
+    columns = by_name(profile)
+
+    assert profile["exact"] and profile["total_rows"] == 1000 and profile["total_columns"] == 5
+    assert columns["id"]["original_dtype"] == "int64"
+    assert (columns["id"]["min"], columns["id"]["max"]) == (0, 999)
+    assert columns["price"]["original_dtype"] == "float64"
+    # The longest value is neither the min nor the max
+    assert columns["price"]["max_length"] == len("0.125")
+    assert columns["city"]["original_dtype"] == "object" and columns["city"]["max_length"] == 6
+    assert columns["seen"]["original_dtype"] == "datetime64[ns]"
+    assert columns["note"]["null_count"] == 900 and columns["note"]["has_nulls"]
+
+
+def test_chunks_that_disagree_widen_the_type():
+    # An int chunk followed by a float chunk is float; numbers followed by text is text
+    data = "a,b\n" + "1,1\n" * 100 + "1.5,x\n"
+    columns = by_name(profile_csv(io.BytesIO(data.encode()), chunk_size=50))
+
+    assert columns["a"]["original_dtype"] == "float64"
+    assert columns["b"]["original_dtype"] == "object"
+
+
+def test_fast_profile_samples_large_files():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"amount": rng.random(200000), "flag": rng.choice(["y", None], 200000)})
+    profile = profile_csv(csv_file(df), fast=True, sample_bytes=256 * 1024)
+
+    assert not profile["exact"]
+    low, high = profile["total_rows_bounds"]
+    assert low <= 200000 <= high
+    assert 0.9 * 200000 <= profile["total_rows"] <= 1.1 * 200000
+    low, high = by_name(profile)["flag"]["null_fraction_bounds"]
+    assert low <= 0.5 <= high
@@ -0,0 +1,64 @@
+from decimal import Decimal
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from src.utils.executor import get_query_executor
+from src.utils.helpers import create_dataframe, execute_query, fetch_dataframe
+from src.utils.result_cache import get_result_cache
+
+
+def test_create_dataframe_types_columns_by_kind():
+    rows = [(1, Decimal("2.50"), datetime(2024, 1, 1), "east"), (2, None, datetime(2024, 1, 2), "west")]
+    df = create_dataframe(rows, ["id", "amount", "day", "region"], ["int", "decimal", "datetime", "text"],
+                          compact=False)
+
+    assert df.dtypes.astype(str).tolist() == ["int64", "float64", "datetime64[ns]", "object"]
+
+
+def test_create_dataframe_infers_types_without_driver_kinds():
+    rows = [(1, "1.5", "a", 2.5), (None, "2", "b", None), (3, None, "7", 1.0)]
+    df = create_dataframe(rows, ["id", "price", "code", "ratio"], compact=False)
+
+    # Integers with NULLs are nullable integers, numeric text becomes numbers
+    assert df.dtypes.astype(str).tolist() == ["Int64", "float64", "object", "float64"]
+    assert df["id"].tolist()[0] == 1 and df["id"].isna().sum() == 1
+
+
+def test_duplicate_column_names_are_kept():
+    df = create_dataframe([(1, "a")], ["x", "x"], ["int", "text"])
+    assert list(df.columns) == ["x", "x"]
+
+
+@pytest.mark.parametrize("max_rows, truncated", [(199, True), (200, False), (201, False)])
+def test_fetch_dataframe_flags_truncation_only_when_rows_are_left_out(sales_db, max_rows, truncated):
+    df = fetch_dataframe("SELECT * FROM sales", sales_db, max_rows=max_rows, batch_size=50, use_cache=False)
+
+    assert len(df) == min(max_rows, 200)
+    assert df.attrs["fetch"]["truncated"] is truncated
+
+
+def test_fetch_dataframe_samples_instead_of_truncating(sales_db):
+    df = fetch_dataframe("SELECT * FROM sales", sales_db, max_rows=50, sample=True, batch_size=30, use_cache=False)
+
+    assert len(df) == 50
+    assert df.attrs["fetch"]["sampled"] and df.attrs["fetch"]["rows_scanned"] == 200
+
+
+def test_appending_to_a_table_invalidates_cached_results(sales_db):
+    query = "SELECT region, amount FROM sales"
+    assert len(fetch_dataframe(query, sales_db, max_rows=1000)) == 200
+    assert len(execute_query(query, sales_db)[0]) == 200
+
+    executor = get_query_executor(sales_db)
+    with executor.engine.begin() as conn:
+        conn.execute(text("INSERT INTO sales VALUES ('east', 1.0)"))
+    get_result_cache().invalidate_table(str(executor.engine.url), "sales")
+
+    assert len(fetch_dataframe(query, sales_db, max_rows=1000)) == 201
+    assert len(execute_query(query, sales_db)[0]) == 201
+
+
+def test_generated_sql_cannot_change_the_database(sales_db):
+    with pytest.raises(Exception):
+        execute_query("DELETE FROM sales", sales_db, use_cache=False)
+    assert execute_query("SELECT COUNT(*) FROM sales", sales_db, use_cache=False)[0] == [(200,)]
@@ -0,0 +1,8 @@
+import pytest
+from benchmarks.import_time import ENTRY_MODULES, import_once
+
+
+@pytest.mark.parametrize("module", list(ENTRY_MODULES))
+def test_entry_modules_do_not_load_their_forbidden_backends(module):
+    _, _, backends = import_once(module)
+    assert not set(backends) & set(ENTRY_MODULES[module])
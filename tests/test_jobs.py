@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import wait
+import pytest
+import new_app
+import src.pipeline.QNA_pipeline as qna_pipeline
+from benchmarks.fakes import make_context
+from src.utils.jobs import JobLimitError, JobManager
+
+
+def blocking(gate):
+    """Handler holding its worker until the gate is set."""
+    def handler(params, job):
+        gate.wait(5)
+        return params
+    return handler
+
+
+def started(job):
+    while job.status == "queued":
+        time.sleep(0.01)
+    return job
+
+
+def finish(*jobs):
+    assert not wait([job.future for job in jobs], timeout=5).not_done
+
+
+@pytest.fixture
+def gate():
+    gate = threading.Event()
+    yield gate
+    gate.set()
+
+
+@pytest.fixture
+def manager(gate):
+    manager = JobManager(max_workers=1, max_jobs_per_user=2, max_queue=1)
+    manager.register("block", blocking(gate))
+    yield manager
+    manager.shutdown(wait=False)
+
+
+def test_each_user_is_limited(manager):
+    started(manager.submit("block", "alice", {}))
+    manager.submit("block", "alice", {})
+
+    with pytest.raises(JobLimitError, match="per user"):
+        manager.submit("block", "alice", {})
+    assert manager.stats()["rejected"] == 1
+    # The queue, not the user limit, holds back other users
+    with pytest.raises(JobLimitError, match="queue is full"):
+        manager.submit("block", "bob", {})
+
+
+def test_queue_is_bounded(manager):
+    started(manager.submit("block", "alice", {}))
+    manager.submit("block", "bob", {})
+
+    with pytest.raises(JobLimitError, match="queue is full"):
+        manager.submit("block", "carol", {})
+    stats = manager.stats()
+    assert (stats["queue_depth"], stats["running"], stats["active_users"]) == (1, 1, 2)
+
+
+def test_cancelled_queued_jobs_never_run(manager, gate):
+    running = started(manager.submit("block", "alice", {}))
+    queued = manager.submit("block", "bob", {})
+
+    assert manager.cancel(queued.id)
+    assert queued.status == "cancelled" and queued.future.cancelled()
+    assert manager.stats()["queue_depth"] == 0
+    gate.set()
+    finish(running)
+    assert running.status == "succeeded" and queued.started is None
+
+
+def test_running_jobs_stop_at_their_next_progress_report(manager):
+    def count(params, job):
+        for step in range(500):
+            job.update_progress(step=step)
+            time.sleep(0.01)
+        return "done"
+
+    manager.register("count", count)
+    job = manager.submit("count", "alice", {})
+    while not job.progress:
+        time.sleep(0.01)
+
+    assert manager.cancel(job.id)
+    finish(job)
+    assert job.status == "cancelled" and job.result is None
+    assert job.progress["step"] < 499
+    assert not manager.cancel(job.id)
+
+
+@pytest.fixture
+def client(monkeypatch, sales_db, tmp_path):
+    """Logged-in test client of the app, running QnA jobs on fake clients against `sales_db`."""
+    manager = JobManager(max_workers=2, max_jobs_per_user=2, max_queue=4)
+    manager.register("qna", new_app.run_qna_job)
+    monkeypatch.setattr(new_app, "job_manager", manager)
+    monkeypatch.setattr(qna_pipeline, "DATABASE_URI", sales_db)
+
+    def use_context(**kwargs):
+        context = make_context(0.0, 0.0, str(tmp_path / "llmx"), **kwargs)
+        monkeypatch.setattr(qna_pipeline, "get_pipeline_context", lambda: context)
+
+    client = new_app.app.test_client()
+    client.post("/api/login", json={"email": "alice@example.com"})
+    client.use_context = use_context
+    yield client
+    manager.shutdown(wait=False)
+
+
+def submit(client, question="Total amount by region?"):
+    response = client.post("/api/jobs", json={"kind": "qna", "question": question})
+    assert response.status_code == 202
+    return new_app.job_manager.get(response.json["job_id"])
+
+
+def test_results_are_polled_until_the_job_succeeds(client):
+    client.use_context(token_latency=0.01, answer=" ".join(["word"] * 20))
+    job = submit(client)
+
+    assert client.get(f"/api/jobs/{job.id}/result").status_code == 202
+    finish(job)
+    response = client.get(f"/api/jobs/{job.id}/result")
+    assert response.status_code == 200
+    assert response.json["result"]["answer"] == " ".join(["word"] * 20)
+    assert response.json["result"]["result"]["rows"] == 200
+    assert response.json["progress"]["rows"] == 200
+
+
+def test_failed_jobs_return_their_error(client):
+    client.use_context(sql="SELECT missing FROM sales")
+    job = submit(client, "Show the missing column")
+    finish(job)
+
+    response = client.get(f"/api/jobs/{job.id}/result")
+    assert response.status_code == 500
+    assert "missing" in response.json["error"]
+
+
+def test_cancelling_a_running_qna_job_stops_its_pipeline(client):
+    # The whole answer would take 4 seconds
+    client.use_context(token_latency=0.02, answer=" ".join(["word"] * 200))
+    job = submit(client)
+    while "rows" not in job.progress:
+        time.sleep(0.01)
+
+    assert client.delete(f"/api/jobs/{job.id}").status_code == 200
+    finish(job)
+    assert client.get(f"/api/jobs/{job.id}/result").status_code == 410
+    assert job.finished - job.started < 1
+    deadline = time.monotonic() + 1
+    while any(thread.name == "qna-stream" for thread in threading.enumerate()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not any(thread.name == "qna-stream" for thread in threading.enumerate())
+
+
+def test_users_over_their_limit_are_told_to_retry(client):
+    client.use_context(token_latency=0.02, answer=" ".join(["word"] * 200))
+    jobs = [submit(client), submit(client)]
+
+    response = client.post("/api/jobs", json={"kind": "qna", "question": "One more?"})
+    assert response.status_code == 429
+    assert client.get("/api/job_stats").json["rejected"] == 1
+    for job in jobs:
+        client.delete(f"/api/jobs/{job.id}")
+    finish(*jobs)
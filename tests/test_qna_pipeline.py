@@ -0,0 +1,87 @@
+import threading
+import time
+import pytest
+import src.pipeline.QNA_pipeline as qna_pipeline
+from benchmarks.fakes import SlowLLM, make_context
+from src.utils.executor import QueryExecutor
+
+
+@pytest.fixture
+def calls(monkeypatch, sales_db):
+    """Count SQL generations, answer generations and executed statements of the QnA pipeline."""
+    counts = {"sql": 0, "answer": 0, "executions": 0}
+    call, stream, execute = SlowLLM._call, SlowLLM._stream, QueryExecutor.execute
+
+    def counting_call(self, prompt, *args, **kwargs):
+        counts["answer" if prompt.rstrip().endswith("Answer:") else "sql"] += 1
+        return call(self, prompt, *args, **kwargs)
+
+    def counting_stream(self, prompt, *args, **kwargs):
+        counts["answer" if prompt.rstrip().endswith("Answer:") else "sql"] += 1
+        return stream(self, prompt, *args, **kwargs)
+
+    def counting_execute(self, *args, **kwargs):
+        counts["executions"] += 1
+        return execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(SlowLLM, "_call", counting_call)
+    monkeypatch.setattr(SlowLLM, "_stream", counting_stream)
+    monkeypatch.setattr(QueryExecutor, "execute", counting_execute)
+    monkeypatch.setattr(qna_pipeline, "DATABASE_URI", sales_db)
+    return counts
+
+
+@pytest.fixture
+def context(tmp_path):
+    return make_context(0.0, 0.0, str(tmp_path / "llmx"), answer="The east region sells the most.")
+
+
+def test_run_generates_and_executes_sql_once(calls, context):
+    answer, df = qna_pipeline.run_qna_pipeline("Which region sells the most?", context=context)
+
+    assert answer == "The east region sells the most."
+    assert list(df.columns) == ["region", "amount"]
+    assert len(df) == 200
+    assert calls == {"sql": 1, "answer": 1, "executions": 1}
+    assert set(df.attrs["stages"]["stages"]) >= {"query", "rows", "df", "result", "answer"}
+
+
+def test_repeated_question_is_served_from_the_caches(calls, context):
+    qna_pipeline.run_qna_pipeline("Total amount per region?", context=context)
+    qna_pipeline.run_qna_pipeline("total amount per region", context=context)
+
+    # The SQL and its result are cached; only the answer is generated again
+    assert calls == {"sql": 1, "answer": 2, "executions": 1}
+
+
+def test_stream_yields_progress_then_answer(calls, context):
+    events = list(qna_pipeline.stream_qna_pipeline("Amount of each region?", context=context))
+
+    names = [event["event"] for event in events]
+    assert names[:2] == ["sql", "rows"]
+    assert names[-1] == "answer"
+    assert "".join(event["text"] for event in events if event["event"] == "token") == events[-1]["answer"]
+    assert events[1]["rows"] == 200
+    assert events[-1]["df"].attrs["stages"]["first_token_seconds"] is not None
+    assert calls == {"sql": 1, "answer": 1, "executions": 1}
+
+
+def test_closing_the_stream_stops_the_pipeline(calls, tmp_path):
+    context = make_context(0.0, 0.0, str(tmp_path / "llmx"), token_latency=0.02, answer=" ".join(["word"] * 200))
+    events = qna_pipeline.stream_qna_pipeline("Average amount by region?", context=context)
+    for event in events:
+        if event["event"] == "token":
+            break
+    events.close()
+
+    # The whole answer would take 4 seconds
+    deadline = time.monotonic() + 1
+    while any(thread.name == "qna-stream" for thread in threading.enumerate()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not any(thread.name == "qna-stream" for thread in threading.enumerate())
+
+
+def test_errors_are_raised_as_qna_errors(calls, tmp_path):
+    context = make_context(0.0, 0.0, str(tmp_path / "llmx"), sql="SELECT missing FROM sales")
+    with pytest.raises(qna_pipeline.QNAError):
+        qna_pipeline.run_qna_pipeline("Show the missing column", context=context)
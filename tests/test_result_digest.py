@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.utils.result_digest import column_stats, digest_result, group_summary
+from src.utils.text_index import estimate_tokens
+
+
+def sales(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "amount": np.round(rng.random(rows) * 1000, 2),
+        "quantity": rng.integers(1, 10, rows),
+    })
+
+
+def test_small_results_are_passed_through_as_csv():
+    df = sales(5)
+    assert digest_result(df, token_budget=2000) == df.to_csv(index=False, lineterminator="\n").rstrip("\n")
+
+
+def test_large_results_are_digested_within_the_budget():
+    df = sales(100000)
+    digest = digest_result(df, token_budget=500, top_k=20)
+
+    assert estimate_tokens(digest) <= 500
+    assert digest.startswith("The query returned 100,000 rows and 3 columns")
+    assert "- amount (float64, 0 nulls): min" in digest
+    assert "By region" in digest
+
+
+def test_empty_results():
+    assert digest_result(pd.DataFrame(columns=["a", "b"])) == "The query returned no rows. Columns: a, b"
+    assert digest_result(pd.DataFrame()) == "The query returned no columns."
+
+
+def test_column_stats_of_duplicate_names_are_per_column():
+    df = pd.DataFrame([[1, 10.0, "a"], [3, 30.0, "b"]], columns=["value", "value", "value"])
+    lines = column_stats(df)
+
+    assert lines[0] == "- value (int64, 0 nulls): min 1, max 3, mean 2, sum 4"
+    assert lines[1] == "- value (float64, 0 nulls): min 10, max 30, mean 20, sum 40"
+    assert lines[2].startswith("- value (object, 0 nulls): 2 distinct")
+
+
+def test_group_summary_aggregates_by_low_cardinality_text():
+    df = pd.DataFrame({"region": ["east", "east", "west"], "amount": [1.0, 2.0, 5.0]})
+    summary = group_summary(df)
+
+    assert summary.splitlines()[0] == "By region (largest 2 of 2 groups):"
+    assert "east,2,3,1.5" in summary
+    assert "west,1,5,5" in summary
@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import stat
+import pandas as pd
+import pytest
+from sqlalchemy import text
+import src.utils.staging as staging
+from src.utils.executor import get_query_executor
+from src.utils.staging import StagingArea
+
+CSV = b"id,amount,region\n1,2.5,east\n2,,west\n,4.0,east\n4,5.5,\n"
+
+
+@pytest.fixture
+def area(tmp_path, monkeypatch):
+    # Parts as CSV, the format used without pyarrow
+    monkeypatch.setattr(staging, "PART_FORMAT", "csv_parts")
+    return StagingArea(str(tmp_path / "staging"))
+
+
+def test_staging_parses_once_and_reuses_the_entry(area):
+    entry = area.stage(io.BytesIO(CSV))
+
+    assert not entry["cached"]
+    assert entry["format"] == "csv_parts" and entry["parts"] == ["part-00000.csv"]
+    assert entry["header"] == ["id", "amount", "region"]
+    assert entry["profile"]["total_rows"] == 4
+    assert area.stage(io.BytesIO(CSV))["cached"]
+    assert area.find(io.BytesIO(CSV))["id"] == entry["id"]
+
+
+def test_chunks_reload_the_parsed_rows(area):
+    entry = area.stage(io.BytesIO(CSV))
+    chunks = list(area.iter_chunks(entry, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks), pd.read_csv(io.BytesIO(CSV)))
+
+
+def test_sampled_entries_keep_the_raw_csv(area, monkeypatch):
+    monkeypatch.setitem(staging.CSV_PROFILE_CONFIG, "sample_bytes", 16)
+    entry = area.stage(io.BytesIO(CSV), fast=True)
+
+    assert entry["format"] == "csv" and not entry["profile"]["exact"]
+    with open(area.csv_path(entry), "rb") as handle:
+        assert handle.read() == CSV
+    # An exact request upgrades the sampled entry
+    assert area.stage(io.BytesIO(CSV))["profile"]["exact"]
+
+
+def test_ingest_appends_the_staged_rows(area, tmp_path):
+    executor = get_query_executor(f"sqlite:///{tmp_path / 'upload.db'}")
+    with executor.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE sales (id INTEGER, amount REAL, region TEXT)"))
+
+    report = area.ingest(area.stage(io.BytesIO(CSV)), "sales", executor, method="insert")
+
+    assert report["rows"] == 4
+    with executor.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*), SUM(amount) FROM sales")).one() == (4, 12.0)
+
+
+def test_root_is_private(tmp_path):
+    root = tmp_path / "staging"
+    root.mkdir(mode=0o777)
+    StagingArea(str(root))
+    assert stat.S_IMODE(root.stat().st_mode) == 0o700
+
+    (tmp_path / "link").symlink_to(root)
+    with pytest.raises(PermissionError):
+        StagingArea(str(tmp_path / "link"))
+
+
+def test_entries_with_parts_in_other_formats_are_dropped(area):
+    entry = area.stage(io.BytesIO(CSV))
+    path = os.path.join(area.root, entry["id"], "entry.json")
+    with open(path, "w") as handle:
+        json.dump(dict(entry, parts=["part-00000.pkl"]), handle)
+
+    assert area.get(entry["id"]) is None
+    assert not os.path.exists(path)
+
+
+def test_unknown_ids_and_expired_entries_are_misses(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "PART_FORMAT", "csv_parts")
+    area = StagingArea(str(tmp_path / "staging"), ttl=0)
+    entry = area.stage(io.BytesIO(CSV))
+
+    assert area.get("../../etc") is None
+    assert area.get(entry["id"]) is None
+    assert area.stats()["entries"] == 0